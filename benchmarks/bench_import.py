@@ -0,0 +1,43 @@
+import sys
+import pytest
+import subprocess
+
+# The most time (in ms) that importing the package may take, beyond the time it 
+# takes to start the interpreter.  This is generous, so that the benchmark only 
+# fails if something expensive starts being imported up front.
+IMPORT_BUDGET_MS = 50
+
+@pytest.mark.parametrize(
+        'code', ['pass', 'import parametrize_from_file'],
+        ids=['interpreter', 'package'],
+)
+def bench_import(benchmark, code):
+    # Each round starts a fresh interpreter, since modules are only ever 
+    # imported once per process.  The time to start an interpreter that 
+    # doesn't import anything is included as a baseline.
+    def run():
+        subprocess.run([sys.executable, '-c', code], check=True)
+
+    benchmark.pedantic(run, rounds=20)
+
+def bench_import_budget():
+    # With `-X importtime`, the interpreter reports the cumulative time taken 
+    # to import each module, including any modules it imports that weren't 
+    # already imported by the interpreter itself.  Take the best of a few 
+    # runs, to avoid failing because of an unrelated hiccup.
+    def measure():
+        result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', 'import parametrize_from_file'],
+                capture_output=True,
+                text=True,
+                check=True,
+        )
+        for line in result.stderr.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == 'parametrize_from_file':
+                return int(fields[1]) / 1000
+
+        raise AssertionError(f"import time not found:\n{result.stderr}")
+
+    import_ms = min(measure() for _ in range(5))
+    assert import_ms <= IMPORT_BUDGET_MS
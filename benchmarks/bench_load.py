@@ -0,0 +1,52 @@
+import pytest
+import parametrize_from_file as pff
+from conftest import SIZES, ROUNDS, DEFAULTS
+
+def bench_load(benchmark, param_file, size):
+    # Clear the cache before each round, so that the file is actually parsed.
+    def load():
+        return pff.load_parameters(param_file, 'cases', schema=DEFAULTS)
+
+    keys, values = benchmark.pedantic(
+            load,
+            setup=pff.get_cache().clear,
+            rounds=ROUNDS[size],
+    )
+    assert len(values) == SIZES[size]
+
+@pytest.mark.parametrize('backend', ['json', 'orjson', 'simdjson', 'ujson'])
+def bench_load_json_backend(benchmark, make_param_file, backend, size):
+    try:
+        loader = pff.json_loader(backend)
+    except pff.ConfigError:
+        pytest.skip(f"JSON backend not installed: {backend}")
+
+    param_file = make_param_file('json', size)
+
+    def load():
+        return pff.load_parameters(
+                param_file,
+                'cases',
+                loaders={'.json': loader},
+                schema=DEFAULTS,
+        )
+
+    keys, values = benchmark.pedantic(
+            load,
+            setup=pff.get_cache().clear,
+            rounds=ROUNDS[size],
+    )
+    assert len(values) == SIZES[size]
+
+def bench_load_cached(benchmark, make_param_file, keep_cache, size):
+    # Only the first round parses the file; the rest measure how long it takes 
+    # to turn the cached parameters into `pytest.param` objects.
+    param_file = make_param_file('json', size)
+
+    keys, values = benchmark(
+            pff.load_parameters,
+            param_file,
+            'cases',
+            schema=DEFAULTS,
+    )
+    assert len(values) == SIZES[size]
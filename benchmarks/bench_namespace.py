@@ -0,0 +1,131 @@
+import math
+import random
+import pytest
+import parametrize_from_file as pff
+from conftest import SIZES, assert_faster
+
+@pytest.fixture(scope='module')
+def ns():
+    # A namespace of about the size that a real test module would use: a few 
+    # imports, a star-import, and a few hundred constants.
+    return pff.Namespace(
+            'import math, fractions, decimal',
+            'from operator import add, sub, mul, floordiv',
+            pff.star(math),
+            {f'CONST_{i}': i for i in range(250)},
+    )
+
+def make_literals(n, seed=0):
+    rng = random.Random(seed)
+    makers = [
+            lambda: str(rng.randint(-10**6, 10**6)),
+            lambda: repr(rng.random()),
+            lambda: rng.choice(['True', 'False', 'None']),
+            lambda: repr(f'str-{rng.randint(0, 100)}'),
+            lambda: str([rng.randint(0, 9) for _ in range(3)]),
+    ]
+    return [rng.choice(makers)() for _ in range(n)]
+
+def make_expressions(n, seed=0):
+    # Realistic parameter files repeat the same handful of expressions many 
+    # times, e.g. a type name or a constant.
+    rng = random.Random(seed)
+    exprs = [
+            'add(CONST_1, CONST_2)',
+            'fractions.Fraction(1, 3)',
+            'decimal.Decimal("0.1")',
+            'sqrt(CONST_16) * pi',
+            '[CONST_1, CONST_2, CONST_3]',
+            'inf',
+    ]
+    exprs += [f'CONST_{i}' for i in range(20)]
+    return [rng.choice(exprs) for _ in range(n)]
+
+@pytest.mark.parametrize(
+        'make_values', [make_literals, make_expressions],
+        ids=['literals', 'expressions'],
+)
+def bench_eval(benchmark, ns, make_values, size):
+    values = make_values(SIZES[size])
+
+    def eval_each():
+        return [ns.eval(x) for x in values]
+
+    results = benchmark(eval_each)
+    assert len(results) == len(values)
+
+@pytest.mark.parametrize(
+        'make_values', [make_literals, make_expressions],
+        ids=['literals', 'expressions'],
+)
+def bench_eval_builtin(benchmark, ns, make_values, size):
+    # The baseline for `bench_eval`: call the built-in `eval()` on every 
+    # value, without any of the shortcuts that `Namespace.eval` takes.
+    values = make_values(SIZES[size])
+    globals = ns._dict
+
+    def eval_each():
+        return [eval(x, globals.copy()) for x in values]
+
+    results = benchmark(eval_each)
+    assert len(results) == len(values)
+
+@pytest.mark.parametrize(
+        'make_values', [make_literals, make_expressions],
+        ids=['literals', 'expressions'],
+)
+def bench_eval_many(benchmark, ns, make_values, size):
+    values = make_values(SIZES[size])
+    results = benchmark(ns.eval_many, values)
+    assert len(results) == len(values)
+
+@pytest.mark.parametrize(
+        'make_values, method, factor', [
+            # Literals are parsed without calling `eval()`, which is about 2x 
+            # faster.
+            (make_literals, 'eval', 0.8),
+            # Repeated expressions are only evaluated once, which is about 50x 
+            # faster.
+            (make_expressions, 'eval_many', 0.5),
+        ],
+        ids=['literals', 'expressions'],
+)
+def bench_eval_speedup(ns, make_values, method, factor, size):
+    values = make_values(SIZES[size])
+    globals = ns._dict
+
+    def eval_builtin():
+        return [eval(x, globals.copy()) for x in values]
+
+    if method == 'eval':
+        def eval_ns():
+            return [ns.eval(x) for x in values]
+    else:
+        def eval_ns():
+            return ns.eval_many(values)
+
+    assert eval_ns() == eval_builtin()
+    assert_faster(eval_ns, eval_builtin, size=size, factor=factor)
+
+def bench_exec(benchmark, ns, size):
+    # Snippets are usually unique, and much more expensive than expressions, 
+    # so use fewer of them.
+    n = SIZES[size] // 10
+    snippets = [
+            f'x = add(CONST_{i % 250}, {i})\ny = [x] * 3\n'
+            for i in range(n)
+    ]
+
+    def exec_each():
+        return [ns.exec(x, get='y') for x in snippets]
+
+    results = benchmark(exec_each)
+    assert len(results) == n
+
+def bench_fork(benchmark, ns, size):
+    n = SIZES[size] // 10
+
+    def fork_each():
+        return [ns.fork({'i': i}) for i in range(n)]
+
+    benchmark(fork_each)
@@ -0,0 +1,47 @@
+import pytest
+from conftest import SIZES, assert_faster
+from parametrize_from_file.parameters import (
+        _init_parametrize_args, _check_test_params_keys,
+)
+
+def init_parametrize_args_baseline(test_params):
+    # The implementation that `_init_parametrize_args()` replaced, which 
+    # builds two sets for each test case.
+    keys = sorted(_check_test_params_keys(test_params))
+    values = [
+            pytest.param(
+                *(x[k] for k in keys),
+                id=x.get('id', str(i)),
+                marks=x.get('marks', ()),
+            )
+            for i, x in enumerate(test_params, 1)
+    ]
+    return keys, values
+
+@pytest.mark.parametrize(
+        'init', [init_parametrize_args_baseline, _init_parametrize_args],
+        ids=['baseline', 'one_pass'],
+)
+def bench_init_parametrize_args(benchmark, init, size):
+    test_params = [
+            {f'x{j}': i * j for j in range(15)}
+            for i in range(SIZES[size])
+    ]
+    keys, values = benchmark(init, test_params)
+    assert len(values) == len(test_params)
+
+def bench_init_parametrize_args_speedup(size):
+    test_params = [
+            {f'x{j}': i * j for j in range(15)}
+            for i in range(SIZES[size])
+    ]
+    assert _init_parametrize_args(test_params) == \
+            init_parametrize_args_baseline(test_params)
+
+    # The one-pass implementation is about 40% faster for 100k test cases.
+    assert_faster(
+            lambda: _init_parametrize_args(test_params),
+            lambda: init_parametrize_args_baseline(test_params),
+            size=size,
+            factor=0.9,
+    )
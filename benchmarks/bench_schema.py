@@ -0,0 +1,118 @@
+import math
+import pytest
+import parametrize_from_file as pff
+from parametrize_from_file.schema import _fuse_schema
+from conftest import SIZES, DEFAULTS, assert_faster
+
+with_ops = pff.Namespace(
+        'from operator import add, sub, mul, floordiv',
+        'from fractions import Fraction',
+        'from decimal import Decimal',
+        pff.star(math),
+)
+
+# Schemas of increasing depth, in the styles recommended by the 
+# documentation.  Every schema accepts every test case made by `make_cases()`.
+SCHEMAS = {
+        'defaults': [
+            DEFAULTS,
+        ],
+        'cast': [
+            DEFAULTS,
+            pff.cast(a=int, b=int, scale=int),
+        ],
+        'eval': [
+            DEFAULTS,
+            pff.cast(op=with_ops.eval, a=with_ops.eval, b=with_ops.eval, scale=int),
+        ],
+        'eval_many': [
+            DEFAULTS,
+            pff.cast(op=with_ops.eval_many, a=with_ops.eval_many, b=with_ops.eval_many, scale=int),
+        ],
+        'error_or': [
+            pff.defaults(scale='1'),
+            pff.cast(a=int, b=int, scale=int),
+            with_ops.error_or('expected'),
+        ],
+        'pipeline': [
+            pff.rename(op='func'),
+            pff.defaults(scale='1'),
+            pff.cast(func=with_ops.eval, a=int, b=int, scale=int),
+            with_ops.error_or('expected'),
+            lambda x: {**x, 'expected': x['expected'] if x['error'] else int(x['expected'])},
+        ],
+}
+
+@pytest.mark.parametrize('schema', SCHEMAS.keys())
+def bench_schema(benchmark, make_param_file, keep_cache, schema, size):
+    param_file = make_param_file('json', size)
+
+    # Parse the file before starting the benchmark.
+    pff.load_parameters(param_file, 'cases', schema=DEFAULTS)
+
+    keys, values = benchmark(
+            pff.load_parameters,
+            param_file,
+            'cases',
+            schema=SCHEMAS[schema],
+    )
+    assert len(values) == SIZES[size]
+
+@pytest.mark.parametrize('schema', ['cast', 'pipeline'])
+def bench_schema_lazy(benchmark, make_param_file, keep_cache, schema, size):
+    param_file = make_param_file('json', size)
+    pff.load_parameters(param_file, 'cases', schema=DEFAULTS)
+
+    keys, values = benchmark(
+            pff.load_parameters,
+            param_file,
+            'cases',
+            schema=SCHEMAS[schema],
+            lazy=True,
+    )
+    assert len(values) == SIZES[size]
+
+@pytest.mark.parametrize('fused', [False, True], ids=['separate', 'fused'])
+def bench_fuse_schema(benchmark, fused, size):
+    # Apply the schema directly, without loading anything, to isolate the 
+    # effect of combining adjacent `rename`, `defaults`, and `cast` functions 
+    # into one.
+    schema, params = make_fuse_schema(SIZES[size])
+    if fused:
+        schema = _fuse_schema(schema)
+
+    results = benchmark(eval_schema, schema, params)
+    assert len(results) == len(params)
+
+def bench_fuse_schema_speedup(size):
+    schema, params = make_fuse_schema(SIZES[size])
+    fused = _fuse_schema(schema)
+    assert eval_schema(fused, params) == eval_schema(schema, params)
+
+    # Fusing makes this schema about 10x faster.
+    assert_faster(
+            lambda: eval_schema(fused, params),
+            lambda: eval_schema(schema, params),
+            size=size,
+            factor=0.5,
+    )
+
+def make_fuse_schema(n):
+    schema = [
+            pff.rename(input='x'),
+            pff.defaults(y='0', z='0'),
+            pff.cast(x=int, y=int, z=[int, abs]),
+    ]
+    params = [
+            {'input': str(i), 'y': str(-i)}
+            for i in range(n)
+    ]
+    return schema, params
+
+def eval_schema(schema, params):
+    out = []
+    for params_i in params:
+        for schema_i in schema:
+            params_i = schema_i(params_i)
+        out.append(params_i)
+    return out
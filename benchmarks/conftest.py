@@ -0,0 +1,200 @@
+"""
+Fixtures shared by the benchmarks.
+
+The parameter files are generated on the fly, using a fixed random seed, so 
+that every run benchmarks exactly the same data.  Each file has a single 
+top-level key (``cases``) containing the requested number of test cases.  
+Every value is a string, as it would be in a NestedText file, so the same 
+schemas can be used for every format.
+"""
+
+import json
+import random
+import timeit
+import pytest
+import parametrize_from_file as pff
+
+SIZES = {
+        '1k': 1_000,
+        '100k': 100_000,
+        '1M': 1_000_000,
+}
+FORMATS = ['json', 'yaml', 'toml', 'nt']
+
+# Not every test case has the same parameters, so this is the simplest schema 
+# that can be used to load them.
+DEFAULTS = pff.defaults(scale='1', expected='', error='')
+
+# The number of rounds to use for benchmarks that can't be calibrated 
+# automatically, e.g. because the cache has to be cleared before each round.
+ROUNDS = {
+        '1k': 20,
+        '100k': 3,
+        '1M': 1,
+}
+
+def pytest_addoption(parser):
+    parser.addoption(
+            '--pff-bench-sizes',
+            default='1k,100k',
+            help=f"A comma-separated list of the number of test cases to benchmark, from: {', '.join(SIZES)}.  Default: %(default)s",
+    )
+
+def pytest_generate_tests(metafunc):
+    if 'size' in metafunc.fixturenames:
+        sizes = metafunc.config.getoption('pff_bench_sizes').split(',')
+
+        for size in sizes:
+            if size not in SIZES:
+                raise pytest.UsageError(f"pff_bench_sizes: expected {', '.join(SIZES)}, not {size!r}")
+
+        metafunc.parametrize('size', sizes)
+
+    if 'format' in metafunc.fixturenames:
+        metafunc.parametrize('format', FORMATS)
+
+@pytest.fixture(scope='session')
+def make_param_file(tmp_path_factory):
+    root = tmp_path_factory.mktemp('params')
+    paths = {}
+
+    def make(format, size):
+        key = format, size
+
+        if key not in paths:
+            path = root / f'{size}.{format}'
+            cases = make_cases(SIZES[size])
+            WRITERS[format](path, {'cases': cases})
+            paths[key] = path
+
+        return paths[key]
+
+    return make
+
+@pytest.fixture
+def param_file(make_param_file, format, size):
+    return make_param_file(format, size)
+
+@pytest.fixture
+def keep_cache():
+    # Keep the parsed files in memory between rounds, so that only the 
+    # processing of the test cases is benchmarked.
+    cache = pff.get_cache()
+    retention, cache.retention = cache.retention, 'keep'
+
+    yield cache
+
+    cache.retention = retention
+    cache.clear()
+
+def min_time(f, *, rounds):
+    """
+    Return the fastest of the given number of calls to *f*, in seconds.
+    """
+    return min(timeit.repeat(f, number=1, repeat=rounds))
+
+def assert_faster(f, baseline, *, size, factor):
+    """
+    Check that calling *f* takes at most *factor* times as long as calling 
+    *baseline*.  Both are called without arguments.
+
+    Pytest-benchmark only compares timings between sessions (see 
+    ``--benchmark-compare``), so this is how a benchmark can fail if an 
+    optimization stops paying for itself.  The comparison is only made for 
+    sizes of at least 100k, since the timings for smaller sizes are too 
+    noisy.
+    """
+    if SIZES[size] < 100_000:
+        pytest.skip("timings are too noisy to compare for small sizes")
+
+    t = min_time(f, rounds=ROUNDS[size])
+    t_baseline = min_time(baseline, rounds=ROUNDS[size])
+    assert t <= factor * t_baseline, f"{t:.3g}s > {factor} * {t_baseline:.3g}s"
+
+def make_cases(n, seed=0):
+    """
+    Return *n* test cases for a simple arithmetic function, in the style 
+    recommended by the documentation: an operator and two operands, either an 
+    expected result or an expected error, and an optional scale factor.
+    """
+    rng = random.Random(seed)
+    ops = {
+            'add': lambda a, b: a + b,
+            'sub': lambda a, b: a - b,
+            'mul': lambda a, b: a * b,
+            'floordiv': lambda a, b: a // b,
+    }
+    cases = []
+
+    for i in range(n):
+        op = rng.choice(list(ops))
+        a = rng.randint(-1000, 1000)
+        b = rng.randint(-10, 10)
+
+        case = {
+                'id': f'case-{i}',
+                'op': op,
+                'a': str(a),
+                'b': str(b),
+        }
+
+        if rng.random() < 0.5:
+            case['scale'] = str(rng.randint(1, 5))
+
+        if op == 'floordiv' and b == 0:
+            case['error'] = 'ZeroDivisionError'
+        else:
+            scale = int(case.get('scale', 1))
+            case['expected'] = str(scale * ops[op](a, b))
+
+        cases.append(case)
+
+    return cases
+
+def write_json(path, params):
+    # Indent the file, so that it can be indexed if it's large enough.
+    with open(path, 'w') as f:
+        json.dump(params, f, indent=2)
+
+def write_yaml(path, params):
+    # Writing the files by hand is much faster than using the libraries, and 
+    # the JSON string syntax is valid in both YAML and TOML.
+    lines = []
+
+    for key, cases in params.items():
+        lines.append(f'{key}:')
+        for case in cases:
+            prefix = '  - '
+            for k, v in case.items():
+                lines.append(f'{prefix}{k}: {json.dumps(v)}')
+                prefix = '    '
+
+    path.write_text('\n'.join(lines) + '\n')
+
+def write_toml(path, params):
+    lines = []
+
+    for key, cases in params.items():
+        for case in cases:
+            lines.append(f'[[{key}]]')
+            lines += [f'{k} = {json.dumps(v)}' for k, v in case.items()]
+
+    path.write_text('\n'.join(lines) + '\n')
+
+def write_nt(path, params):
+    lines = []
+
+    for key, cases in params.items():
+        lines.append(f'{key}:')
+        for case in cases:
+            lines.append('  -')
+            lines += [f'    {k}: {v}' for k, v in case.items()]
+
+    path.write_text('\n'.join(lines) + '\n')
+
+WRITERS = {
+        'json': write_json,
+        'yaml': write_yaml,
+        'toml': write_toml,
+        'nt': write_nt,
+}
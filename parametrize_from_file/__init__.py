@@ -29,10 +29,12 @@ instead to import the module as ``pff``, e.g.:
 """
 
 from .parameters import parametrize, fixture, load_parameters
-from .namespace import Namespace, star
-from .schema import defaults, cast, rename, error, error_or
-from .loaders import add_loader, drop_loader
+from .namespace import Namespace, star, compile_cache_info, clear_compile_cache
+from .schema import defaults, cast, rename, vectorized, error, error_or
+from .loaders import add_loader, drop_loader, json_loader, LazySuiteParams
+from .cache import get_cache
 from .errors import ConfigError
+from .utils import MISSING
 
 __version__ = '0.20.0'
 
@@ -44,10 +46,16 @@ for obj in [
         defaults,
         cast,
         rename,
+        vectorized,
         error,
         error_or,
         add_loader,
         drop_loader,
+        json_loader,
+        LazySuiteParams,
+        get_cache,
+        compile_cache_info,
+        clear_compile_cache,
         load_parameters,
         ConfigError,
 ]:
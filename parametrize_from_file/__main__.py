@@ -0,0 +1,197 @@
+"""
+Command-line tools for working with parameter files.
+
+Usage:
+    python -m parametrize_from_file compile [options] [<path>...]
+
+The ``compile`` command loads every parameter file it can find, and stores the 
+loaded parameters in a bundle (i.e. a directory of cache entries) that can be 
+used by later test sessions to skip parsing entirely.  See the "Performance" 
+tutorial for more information.
+"""
+
+import os
+import sys
+import argparse
+import importlib
+import importlib.util
+from .cache import DiskCache
+from .loaders import get_loaders
+from .prefetch import find_param_paths
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+# The same defaults that pytest uses.
+_NORECURSEDIRS = [
+        '*.egg', '.*', '_darcs', 'build', 'CVS', 'dist', 'node_modules', 'venv',
+        '{arch}',
+]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+            prog='python -m parametrize_from_file',
+            description="Command-line tools for working with parameter files.",
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    compile_parser = commands.add_parser(
+            'compile',
+            description="Load every parameter file in the given paths, and write the loaded parameters to a bundle that can be passed to `pytest --pff-bundle`.  Directories are searched for test modules, and the parameter files with the same names as those modules are loaded.  Parameter files can also be specified directly.",
+    )
+    compile_parser.add_argument(
+            'paths',
+            metavar='PATH',
+            nargs='*',
+            default=['.'],
+            help="The test modules, parameter files, and directories to compile.  Default: the current directory.",
+    )
+    compile_parser.add_argument(
+            '-o', '--output',
+            metavar='DIR',
+            required=True,
+            help="The directory where the bundle will be written.  Existing entries are updated as necessary.",
+    )
+    compile_parser.add_argument(
+            '-r', '--root',
+            metavar='DIR',
+            default='.',
+            help="The pytest root directory.  Parameter files are identified by their paths relative to this directory, so the bundle can be used from any checkout of the project.  Default: the current directory.",
+    )
+    compile_parser.add_argument(
+            '-i', '--import',
+            dest='imports',
+            metavar='MODULE',
+            action='append',
+            default=[],
+            help="Import the given module (or python file, e.g. `conftest.py`) before loading any parameters.  This is necessary if the module registers any custom loaders.  Can be specified multiple times.",
+    )
+    compile_parser.add_argument(
+            '-j', '--jobs',
+            metavar='N',
+            type=int,
+            default=1,
+            help="The number of processes to use.  Default: %(default)s",
+    )
+    compile_parser.add_argument(
+            '--python-files',
+            metavar='GLOB',
+            action='append',
+            help="A glob pattern matching the names of test modules.  Can be specified multiple times.  Default: `test_*.py` and `*_test.py`, same as pytest.",
+    )
+
+    args = parser.parse_args(argv)
+
+    for module in args.imports:
+        _import(module)
+
+    num_ok, num_err = compile_bundle(
+            args.paths,
+            args.output,
+            root=args.root,
+            python_files=args.python_files or ['test_*.py', '*_test.py'],
+            jobs=args.jobs,
+    )
+    print(f"compiled {num_ok} parameter file(s) into: {args.output}")
+
+    if num_err:
+        print(f"failed to compile {num_err} parameter file(s)", file=sys.stderr)
+        sys.exit(1)
+
+def compile_bundle(
+        paths,
+        output,
+        *,
+        root=None,
+        python_files=('test_*.py', '*_test.py'),
+        jobs=1,
+):
+    """
+    Load the parameter files in the given paths, and store the results in 
+    the given bundle directory.
+
+    Returns:
+        The number of files that were successfully compiled, and the number 
+        that couldn't be loaded.  Error messages for the latter are printed 
+        to stderr.
+    """
+    loaders = get_loaders()
+    param_paths = {}
+
+    for path in paths:
+        path = Path(os.path.abspath(path))
+        if path.is_file() and path.suffix in loaders:
+            param_paths[path] = loaders[path.suffix]
+        else:
+            param_paths.update(
+                    find_param_paths(
+                        [path],
+                        python_files=python_files,
+                        norecursedirs=_NORECURSEDIRS,
+                        loaders=loaders,
+                    )
+            )
+
+    bundle = DiskCache(output, root=root)
+    num_ok = num_err = 0
+
+    def record(param_path, loader, stat, suite_params):
+        nonlocal num_ok, num_err
+        if bundle.put(loader, param_path, suite_params, stat):
+            num_ok += 1
+        else:
+            num_err += 1
+            print(f"{param_path}: can't store parameters loaded by {loader!r}", file=sys.stderr)
+
+    def report(param_path, err):
+        nonlocal num_err
+        num_err += 1
+        print(f"{param_path}: {err}", file=sys.stderr)
+
+    if jobs == 1:
+        for param_path, loader in param_paths.items():
+            try:
+                stat = os.stat(param_path)
+                suite_params = loader(param_path)
+            except Exception as err:
+                report(param_path, err)
+            else:
+                record(param_path, loader, stat, suite_params)
+
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                    param_path: pool.submit(_load, loader, param_path)
+                    for param_path, loader in param_paths.items()
+            }
+            for param_path, future in futures.items():
+                try:
+                    stat, suite_params = future.result()
+                except Exception as err:
+                    report(param_path, err)
+                else:
+                    record(param_path, param_paths[param_path], stat, suite_params)
+
+    return num_ok, num_err
+
+def _load(loader, param_path):
+    stat = os.stat(param_path)
+    return stat, loader(param_path)
+
+def _import(module):
+    if not module.endswith('.py'):
+        return importlib.import_module(module)
+
+    # Python files (e.g. `conftest.py`) are imported with the same name that 
+    # pytest would give them, so that any loaders they define can be matched 
+    # with the same entries in the bundle.
+    path = Path(module).resolve()
+    sys.path.insert(0, str(path.parent))
+
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[path.stem] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,647 @@
+import os
+import sys
+import time
+import functools
+import threading
+from .utils import MISSING
+from pathlib import Path
+from collections import OrderedDict, namedtuple
+
+# The on-disk format of cache entries.  Increment this whenever the format 
+# changes, so that stale entries are simply ignored.
+_DISK_CACHE_FORMAT = 2
+
+CacheStats = namedtuple(
+        'CacheStats', [
+            'hits',
+            'misses',
+            'invalidations',
+            'evictions',
+            'releases',
+            'entries',
+            'nbytes',
+            'max_entries',
+            'max_bytes',
+        ],
+)
+
+class SuiteCache:
+    """
+    Keep recently loaded parameters in memory, so that files referenced by 
+    multiple tests only need to be loaded once.
+
+    Each entry remembers the size, modification time, change time, and inode 
+    of the file it was loaded from.  Entries are only reused if all of these 
+    are unchanged, so long-running processes (e.g. watch-mode test runners) 
+    will see any edits made to parameter files.
+
+    The cache can optionally be bounded, either by number of entries or by 
+    total size.  The size of an entry is taken to be the size of the file it 
+    was loaded from, which is a cheap (if rough) proxy for the amount of memory 
+    it occupies.  When either bound is exceeded, the least recently used 
+    entries are evicted.
+
+    Entries can also be released once they're no longer needed, depending on 
+    the *retention* policy:
+
+    - ``'keep'`` (default): Never release entries, so each file is only loaded 
+      once (unless it changes or is evicted).
+    - ``'collection'``: Keep every entry until `release()` is called.  The 
+      pytest plugin calls this once all tests have been collected.
+    - ``'consumed'``: Release each entry as soon as every top-level key in 
+      the file has been consumed (see `consume()`).  This lowers peak memory 
+      use when each key is only read once, but any file whose keys are read 
+      again will be loaded again.
+
+    If a released file is needed again later, it's simply loaded again.
+    """
+
+    def __init__(self, *, max_entries=None, max_bytes=None, retention='keep'):
+        self._entries = OrderedDict()
+        self._consumed = {}
+        self._lock = threading.RLock()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._evictions = 0
+        self._releases = 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.retention = retention
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} entries={len(self._entries)} nbytes={self._nbytes}>'
+
+    def get(self, loader, param_path, stat):
+        """
+        Return the cached parameters for the given file, or `MISSING` if the 
+        file hasn't been loaded yet or has changed since it was loaded.
+
+        The *stat* argument should be the result of calling `os.stat` on the 
+        parameter file.
+        """
+        key = loader, param_path
+
+        with self._lock:
+            try:
+                signature, suite_params, nbytes = self._entries[key]
+            except KeyError:
+                self._misses += 1
+                return MISSING
+
+            if signature != _get_stat_signature(stat):
+                self._invalidations += 1
+                self._misses += 1
+                self._remove(key)
+                return MISSING
+
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return suite_params
+
+    def put(self, loader, param_path, suite_params, stat):
+        """
+        Store the given parameters in the cache.
+
+        The *stat* argument should be the result of calling `os.stat` on the 
+        parameter file *before* it was loaded.
+        """
+        key = loader, param_path
+        nbytes = stat.st_size
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _get_stat_signature(stat), suite_params, nbytes
+            self._nbytes += nbytes
+            self._evict()
+
+    def consume(self, loader, param_path, key):
+        """
+        Record that the parameters for the given top-level key have been used.  
+        If the retention policy is ``'consumed'``, also release the entry for 
+        the given file if every top-level key has now been used.
+        """
+        if self.retention != 'consumed':
+            return
+
+        cache_key = loader, param_path
+
+        with self._lock:
+            try:
+                _, suite_params, _ = self._entries[cache_key]
+            except KeyError:
+                return
+
+            consumed = self._consumed.setdefault(cache_key, set())
+            consumed.add(key)
+
+            try:
+                is_consumed = consumed.issuperset(suite_params.keys())
+            except Exception:
+                return
+
+            if is_consumed:
+                self._remove(cache_key)
+                self._releases += 1
+
+    def release(self):
+        """
+        Remove every entry from the cache, unless the retention policy is 
+        ``'keep'``.  Unlike `clear()`, the statistics are not reset.
+        """
+        if self.retention == 'keep':
+            return
+
+        with self._lock:
+            self._releases += len(self._entries)
+            self._entries.clear()
+            self._consumed.clear()
+            self._nbytes = 0
+
+    def discard(self, loader, param_path):
+        """
+        Remove the entry for the given file, if there is one.
+        """
+        with self._lock:
+            self._remove((loader, param_path))
+
+    def clear(self):
+        """
+        Remove every entry from the cache, and reset the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._consumed.clear()
+            self._nbytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._invalidations = 0
+            self._evictions = 0
+            self._releases = 0
+
+    def stats(self):
+        """
+        Return a `CacheStats` tuple describing the current state of the cache.
+
+        The *hits* and *misses* fields count lookups.  The *invalidations* 
+        field counts the misses that were caused by files changing after they 
+        were loaded.  The *evictions* field counts entries that were removed to 
+        keep the cache within its bounds, and the *releases* field counts 
+        entries that were removed because they were no longer needed (see 
+        *retention*).
+        """
+        with self._lock:
+            return CacheStats(
+                    hits=self._hits,
+                    misses=self._misses,
+                    invalidations=self._invalidations,
+                    evictions=self._evictions,
+                    releases=self._releases,
+                    entries=len(self._entries),
+                    nbytes=self._nbytes,
+                    max_entries=self.max_entries,
+                    max_bytes=self.max_bytes,
+            )
+
+    def resize(self, *, max_entries=None, max_bytes=None):
+        """
+        Change the bounds of the cache, evicting entries if necessary.
+
+        Either bound can be None, meaning unlimited.
+        """
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def _remove(self, key):
+        self._consumed.pop(key, None)
+
+        try:
+            _, _, nbytes = self._entries.pop(key)
+        except KeyError:
+            return
+
+        self._nbytes -= nbytes
+
+    def _evict(self):
+        def is_full():
+            if self.max_entries is not None and len(self._entries) > self.max_entries:
+                return True
+            if self.max_bytes is not None and self._nbytes > self.max_bytes:
+                return True
+            return False
+
+        while self._entries and is_full():
+            key, (_, _, nbytes) = self._entries.popitem(last=False)
+            self._consumed.pop(key, None)
+            self._nbytes -= nbytes
+            self._evictions += 1
+
+class DiskCache:
+    """
+    Store the parameters loaded from each file in a directory, so that files 
+    that haven't changed don't need to be parsed again in later sessions.
+
+    Each entry is a pickle file named after the loader and the path to the 
+    parameter file.  The entry begins with a small header recording the size, 
+    modification time, and content hash of the parameter file, followed by the 
+    loaded parameters themselves.  An entry is reused if the size and 
+    modification time of the parameter file are unchanged, or if the 
+    modification time changed but the content hash didn't (e.g. after a fresh 
+    checkout).
+
+    The header also records the version of this package, the version of the 
+    library the loader comes from (if any), and a hash of the loader's code.  
+    If any of these change, e.g. because a dependency was upgraded or a custom 
+    loader was edited, every entry made by the old loader is ignored.
+
+    Only loaders with a stable identity (i.e. module-level functions) are 
+    cached, because the entries need to be matched to loaders across sessions. 
+    Any errors encountered while reading or writing the cache are ignored; the 
+    worst that can happen is that the file is parsed again.
+    """
+
+    def __init__(self, cache_dir, *, root=None, readonly=False):
+        self.cache_dir = Path(cache_dir)
+        self.root = Path(root).resolve() if root else None
+        self.readonly = readonly
+
+        # The reason that each parameter file couldn't be found in the cache, 
+        # keyed by the same path used to identify the file in the cache.  This 
+        # is mostly useful for bundles, which are expected to contain every 
+        # parameter file.
+        self.misses = {}
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({str(self.cache_dir)!r})'
+
+    def get(self, loader, param_path, stat):
+        """
+        Return the cached parameters for the given file, or `MISSING` if the 
+        cache has no up-to-date entry for it.
+
+        The *stat* argument should be the result of calling `os.stat` on the 
+        parameter file.
+        """
+        key = self._get_key(loader, param_path)
+        if key is None:
+            return self._miss(param_path, f"can't cache parameters loaded by {loader!r}")
+
+        import pickle
+
+        try:
+            with open(self._get_entry_path(key), 'rb') as f:
+                header = pickle.load(f)
+
+                if header['format'] != _DISK_CACHE_FORMAT:
+                    return self._miss(key[1], "made by an incompatible version of parametrize_from_file")
+                if header['key'] != key:
+                    return self._miss(key[1], "no entry")
+                if header['loader_version'] != _get_loader_version(loader):
+                    return self._miss(key[1], "made by a different version of the loader")
+                if header['size'] != stat.st_size:
+                    return self._miss(key[1], "file changed")
+
+                if header['mtime_ns'] == stat.st_mtime_ns:
+                    return pickle.load(f)
+
+                digest = _hash_file(param_path)
+                if header['digest'] != digest:
+                    return self._miss(key[1], "file changed")
+
+                suite_params = pickle.load(f)
+
+        except FileNotFoundError:
+            return self._miss(key[1], "no entry")
+        except Exception as err:
+            return self._miss(key[1], f"can't read entry: {err}")
+
+        # The file was touched, but not changed.  Record the new modification 
+        # time, so we don't need to hash the file next time.
+        self._write(loader, key, suite_params, stat, digest)
+        return suite_params
+
+    def put(self, loader, param_path, suite_params, stat):
+        """
+        Store the given parameters in the cache.
+
+        The *stat* argument should be the result of calling `os.stat` on the 
+        parameter file *before* it was loaded.  If the file changes while it's 
+        being loaded, nothing will be cached.
+
+        Returns True if the parameters were stored, or False otherwise.
+        """
+        key = self._get_key(loader, param_path)
+        if key is None:
+            return False
+
+        try:
+            digest = _hash_file(param_path)
+            if not _same_stat(stat, os.stat(param_path)):
+                return False
+        except OSError:
+            return False
+
+        return self._write(loader, key, suite_params, stat, digest)
+
+    def _miss(self, path, reason):
+        self.misses[str(path)] = reason
+        return MISSING
+
+    def _get_key(self, loader, param_path):
+        loader_id = _get_loader_id(loader)
+        if loader_id is None:
+            return None
+
+        path = Path(param_path).resolve()
+        if self.root:
+            try:
+                path = path.relative_to(self.root)
+            except ValueError:
+                pass
+
+        return loader_id, path.as_posix()
+
+    def _get_entry_path(self, key):
+        import hashlib
+        name = hashlib.blake2b('\0'.join(key).encode(), digest_size=16)
+        return self.cache_dir / f'{name.hexdigest()}.pickle'
+
+    def _write(self, loader, key, suite_params, stat, digest):
+        if self.readonly:
+            return False
+
+        import pickle
+
+        header = dict(
+                format=_DISK_CACHE_FORMAT,
+                key=key,
+                loader_version=_get_loader_version(loader),
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                digest=digest,
+        )
+        entry_path = self._get_entry_path(key)
+        tmp_path = entry_path.with_name(f'{entry_path.name}.{os.getpid()}.tmp')
+
+        # Write to a temporary file and then move it into place, so that 
+        # concurrent sessions never see a partially-written entry.
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(suite_params, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+            return True
+
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+            return False
+
+class DirCache:
+    """
+    Remember which files are in each directory, so that the default parameter 
+    file for each test can be found without checking every possible file name 
+    individually.
+
+    Each listing is reused for as long as the modification time of the 
+    directory stays the same, which is the case until a file is added to, 
+    removed from, or renamed within the directory.  Directories that were 
+    modified very recently aren't cached at all, because some filesystems only 
+    record modification times to the nearest second (or worse), so another 
+    change could happen without the modification time changing.
+    """
+
+    # How recently (in ns) a directory must have been modified for its listing 
+    # to not be cached.
+    racy_ns = 2 * 10**9
+
+    def __init__(self):
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} listings={len(self._listings)}>'
+
+    def listdir(self, dir):
+        """
+        Return the names of the files in the given directory, as a frozenset.
+
+        Symbolic links are included only if their targets exist.  Raises 
+        `OSError` if the directory can't be listed.
+        """
+        key = os.fspath(dir)
+        signature = _get_stat_signature(os.stat(key))
+
+        with self._lock:
+            try:
+                cached_signature, names = self._listings[key]
+            except KeyError:
+                pass
+            else:
+                if cached_signature == signature:
+                    return names
+
+        names = frozenset(_list_existing_names(key))
+
+        if time.time_ns() - signature[1] > self.racy_ns:
+            with self._lock:
+                self._listings[key] = signature, names
+
+        return names
+
+    def clear(self):
+        """
+        Forget every directory listing.
+        """
+        with self._lock:
+            self._listings.clear()
+
+_SUITE_CACHE = SuiteCache()
+_DISK_CACHE = None
+_DIR_CACHE = DirCache()
+
+def get_cache():
+    """
+    Return the object that holds the parameters loaded in this process.
+
+    This is mainly useful for long-running processes that need to control how 
+    much memory is used by loaded parameters, e.g.:
+
+    .. code-block:: python
+
+        import parametrize_from_file as pff
+
+        cache = pff.get_cache()
+        cache.resize(max_entries=100)
+        print(cache.stats())
+        cache.clear()
+
+    There's no need to clear the cache just because parameter files might have 
+    been edited, though.  Cached parameters are automatically reloaded when 
+    the underlying file changes.
+    """
+    return _SUITE_CACHE
+
+def enable_disk_cache(cache_dir, *, root=None, readonly=False):
+    """
+    Store loaded parameters in the given directory, and reuse them in future 
+    sessions if the parameter files haven't changed.
+
+    Arguments:
+        cache_dir (str, pathlib.Path):
+            The directory where the cache entries will be stored.  It will be 
+            created if necessary.
+
+        root (str, pathlib.Path):
+            If given, parameter files within this directory will be identified 
+            by their path relative to it.  This allows the cache to be reused 
+            even if the whole project is moved.
+
+        readonly (bool):
+            If true, read existing entries but never create or update any.
+    """
+    global _DISK_CACHE
+    _DISK_CACHE = DiskCache(cache_dir, root=root, readonly=readonly)
+    return _DISK_CACHE
+
+def disable_disk_cache():
+    """
+    Stop reading and writing loaded parameters to disk.
+    """
+    global _DISK_CACHE
+    _DISK_CACHE = None
+
+def get_disk_cache():
+    """
+    Return the active `DiskCache`, or None if parameters aren't being cached on 
+    disk.
+    """
+    return _DISK_CACHE
+
+def get_dir_cache():
+    """
+    Return the `DirCache` used to find default parameter files.
+    """
+    return _DIR_CACHE
+
+def _get_loader_id(loader):
+    # Lambdas, closures, and callable objects can't be reliably identified 
+    # across sessions, so don't cache anything they load.
+    module = getattr(loader, '__module__', None)
+    qualname = getattr(loader, '__qualname__', None)
+
+    if not isinstance(module, str) or not isinstance(qualname, str):
+        return None
+    if '<' in qualname:
+        return None
+
+    return f'{module}.{qualname}'
+
+@functools.lru_cache(maxsize=None)
+def _get_loader_version(loader):
+    # Return a summary of everything that could make the same loader return 
+    # different parameters for the same file.  Code called by the loader isn't 
+    # hashed, so changes to it are only noticed if a version number changes.
+    from . import __version__
+    from .loaders import _LazyLoader
+
+    # Lazy loaders are named after a library that might not have been 
+    # imported yet.  Import it anyways, because the version has to be the same 
+    # either way.  This isn't much of a cost, since the library will almost 
+    # certainly be needed soon.  Any other loader is defined in a module that 
+    # has necessarily been imported already.
+    is_lazy = isinstance(loader, _LazyLoader)
+    func = loader.load if is_lazy else loader
+
+    return (
+            __version__,
+            _get_library_version(loader.__module__, is_lazy),
+            _hash_code(getattr(func, '__code__', None)),
+    )
+
+def _get_library_version(module_name, allow_import):
+    import importlib
+
+    name = module_name.partition('.')[0]
+    if name == __package__:
+        return None
+
+    try:
+        module = sys.modules[name]
+    except KeyError:
+        if not allow_import:
+            return None
+        try:
+            module = importlib.import_module(name)
+        except Exception:
+            return None
+
+    version = getattr(module, '__version__', None)
+    if version is not None:
+        return str(version)
+
+    try:
+        from importlib.metadata import version
+        return version(name)
+    except Exception:
+        return None
+
+def _hash_code(code):
+    if code is None:
+        return None
+
+    import hashlib
+
+    hash = hashlib.blake2b(digest_size=16)
+    _update_code_hash(hash, code)
+    return hash.hexdigest()
+
+def _update_code_hash(hash, code):
+    # Only hash what the code does, and not where it came from (e.g. the file 
+    # name and line numbers), so that the same loader has the same hash no 
+    # matter where it's installed.  Nested functions are code objects among 
+    # the constants, so they're hashed the same way.
+    from types import CodeType
+
+    hash.update(code.co_code)
+    hash.update(repr(code.co_names).encode('utf8'))
+
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            _update_code_hash(hash, const)
+        else:
+            hash.update(_repr_const(const).encode('utf8'))
+
+def _repr_const(const):
+    # The order of the items in a frozenset depends on their hashes, which are 
+    # randomized for strings.
+    if isinstance(const, frozenset):
+        return f'frozenset({sorted(_repr_const(x) for x in const)!r})'
+    if isinstance(const, tuple):
+        return repr(tuple(_repr_const(x) for x in const))
+    return repr(const)
+
+def _get_stat_signature(stat):
+    return stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_ino
+
+def _hash_file(path):
+    import hashlib
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read()).hexdigest()
+
+def _list_existing_names(dir):
+    with os.scandir(dir) as entries:
+        for entry in entries:
+            if entry.is_symlink() and not os.path.exists(entry.path):
+                continue
+            yield entry.name
+
+def _same_stat(a, b):
+    return (a.st_size, a.st_mtime_ns) == (b.st_size, b.st_mtime_ns)
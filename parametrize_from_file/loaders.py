@@ -1,25 +1,179 @@
+import os
+import re
 import json
-import toml
-import yaml
-import nestedtext as nt
 import functools
+import importlib
+from .errors import ConfigError
+from .utils import MISSING, gc_paused
+from collections.abc import Mapping
+
+# Third-party JSON parsers that can be used instead of the standard library, 
+# in order of preference, and the names of the packages that provide them.
+_JSON_BACKENDS = {
+        'orjson': 'orjson',
+        'simdjson': 'pysimdjson',
+        'ujson': 'ujson',
+}
+
+# Files smaller than this are always parsed in their entirety, because the 
+# overhead of indexing them isn't worth it.
+_LAZY_MIN_BYTES = 1 << 20
+
+class LazySuiteParams(Mapping):
+    """
+    A mapping from test names to test parameters, where the parameters for 
+    each test are only parsed the first time they are accessed.
+
+    Loaders can return instances of this class to avoid parsing parts of a 
+    file that no test will ever use.  The idea is that the loader makes a cheap 
+    pass over the file to find where the value associated with each top-level 
+    key begins and ends, then the value is parsed on demand.
+
+    Arguments:
+        index (dict):
+            A dictionary mapping each top-level key to an object describing 
+            where to find the corresponding value.  These objects are opaque 
+            to this class; they're just passed on to *load_value*.
+
+        load_value (collections.abc.Callable):
+            A function that will be called with a key and the associated 
+            object from *index*, and should return the parsed value.  If it 
+            raises an exception, *load_all* will be used instead.
+
+        load_all (collections.abc.Callable):
+            A no-argument function that parses the whole file.  This is used 
+            as a fallback in the event that the index turns out to be wrong.
+
+    When pickled, instances of this class are converted to regular 
+    dictionaries.  This requires parsing every value that hasn't been parsed 
+    yet, so pickling costs about as much as parsing the whole file.  This is 
+    deliberate: the disk cache and ``--pff-xdist-share`` pickle the parameters 
+    precisely so that they don't have to be parsed again, which wouldn't be 
+    the case if the raw text was pickled along with the index.
+    """
+
+    def __init__(self, index, load_value, load_all):
+        self._index = index
+        self._load_value = load_value
+        self._load_all = load_all
+        self._values = {}
+        self._fallback = None
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} keys={list(self)!r}>'
+
+    def __getitem__(self, key):
+        if self._fallback is not None:
+            return self._fallback[key]
+
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+
+        span = self._index[key]
+
+        # If the value can't be parsed in isolation, parse the whole file.  
+        # Either the index was wrong, in which case this will give the right 
+        # value, or the file really is malformed, in which case this will give 
+        # the most accurate error message.
+        try:
+            value = self._load_value(key, span)
+        except Exception:
+            value = MISSING
+
+        if value is MISSING:
+            self._fallback = self._load_all()
+            return self._fallback[key]
+
+        self._values[key] = value
+        return value
+
+    def __iter__(self):
+        # Be careful to notice if the fallback is triggered while iterating, 
+        # e.g. because the caller is looking up the value for each key.
+        keys = set()
+
+        for key in self._index:
+            if self._fallback is not None:
+                break
+            keys.add(key)
+            yield key
+
+        if self._fallback is not None:
+            yield from (k for k in self._fallback if k not in keys)
+
+    def __len__(self):
+        if self._fallback is not None:
+            return len(self._fallback)
+        return len(self._index)
+
+    def __reduce__(self):
+        return dict, (dict(self.items()),)
+
+class _LazyLoader:
+    """
+    A loader for a file format that depends on a third-party library, where 
+    the library is only imported the first time a file is actually loaded.
+
+    Each loader takes the name of the library function that it stands in for 
+    (e.g. ``yaml.safe_load``).  This name appears in error messages, and is 
+    used to identify the loader in the disk cache.  Because the library 
+    hasn't necessarily been imported, the name has to be given explicitly 
+    rather than copied from the function itself (e.g. via `functools.wraps`).
+    """
+
+    def __init__(self, load, name):
+        self.load = load
+        self.__module__, _, self.__qualname__ = name.rpartition('.')
+        self.__name__ = self.__qualname__
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.__module__}.{self.__qualname__}>'
+
+    def __call__(self, path):
+        return self.load(path)
+
+    def __reduce__(self):
+        # The name of the loader doesn't refer to the loader itself, so the 
+        # default pickling behavior (i.e. by name) wouldn't work.
+        return self.__class__, (self.load, f'{self.__module__}.{self.__qualname__}')
 
 @functools.wraps(json.load)
 def _load_json(path):
-    with open(path, 'rb') as f:
-        return json.load(f)
+    if _JSON_LOADS is None:
+        set_json_backend('auto')
+    return _load_json_with(path, _JSON_LOADS)
 
-@functools.wraps(yaml.safe_load)
 def _load_yml(path):
-    with open(path, 'rb') as f:
-        return yaml.safe_load(f)
+    text = _read_if_large(path)
+
+    if text is None:
+        with open(path, 'rb') as f:
+            return _safe_load_yml(f)
+
+    return _index_yml(text) or _safe_load_yml(text)
+
+def _load_toml(path):
+    import toml
+    return toml.load(path)
+
+def _load_nt(path):
+    import nestedtext as nt
+
+    text = _read_if_large(path)
+
+    if text is None:
+        return nt.load(path)
+
+    return _index_nt(text, path) or nt.loads(text, source=str(path))
 
 _LOADERS = {
         '.json': _load_json,
-        '.yaml': _load_yml,
-        '.yml': _load_yml,
-        '.toml': toml.load,
-        '.nt': nt.load,
+        '.yaml': _LazyLoader(_load_yml, 'yaml.safe_load'),
+        '.yml': _LazyLoader(_load_yml, 'yaml.safe_load'),
+        '.toml': _LazyLoader(_load_toml, 'toml.decoder.load'),
+        '.nt': _LazyLoader(_load_nt, 'nestedtext.nestedtext.load'),
 }
 
 def add_loader(suffix, loader):
@@ -39,10 +193,15 @@ def add_loader(suffix, loader):
                 def loader(path: pathlib.Path) -> Dict[str, List[Dict[str, Any]]]
 
             In other words, it should accept a path and return the top-level 
-            data structure expected by :deco:`parametrize_from_file`.
+            data structure expected by :deco:`parametrize_from_file`.  Any 
+            mapping can be returned, including a `LazySuiteParams` that only 
+            parses the parameters for each test when they are needed.
 
     Note:
-        Each file is only loaded once per pytest session.
+        By default, each file is only loaded once per process, unless it 
+        changes or is evicted from the cache.  Files may be loaded more than 
+        once if the cache is configured to release them early.  See 
+        `get_cache` for more information.
     """
     _LOADERS[suffix] = loader
 
@@ -57,3 +216,443 @@ def get_loaders():
     Return the dictionary of known loaders.
     """
     return _LOADERS
+
+def json_loader(backend='auto'):
+    """
+    Return a function that loads JSON files using the given library.
+
+    Arguments:
+        backend (str):
+            The name of the library to use: ``'orjson'``, ``'simdjson'``, 
+            ``'ujson'``, or ``'json'`` (the standard library).  The default, 
+            ``'auto'``, picks the first of these libraries that is installed.
+
+    The third-party libraries are much faster than the standard library for 
+    large files, but they aren't all equally permissive.  Any file that the 
+    chosen library can't parse is therefore parsed again using the standard 
+    library, so that the result (or the error message) is the same regardless 
+    of which library is used.  Note that the JSON backend can also be 
+    configured for the whole test suite via the ``pff_json_backend`` ini 
+    option.  This function is only needed to use different backends for 
+    different suffixes, e.g.:
+
+    .. code-block:: python
+
+        import parametrize_from_file as pff
+        pff.add_loader('.golden', pff.json_loader('orjson'))
+    """
+    _, loads = _find_json_backend(backend)
+
+    @functools.wraps(json.load)
+    def load_json(path):
+        return _load_json_with(path, loads)
+
+    return load_json
+
+def get_json_backend():
+    """
+    Return the name of the library that the default loader will use to parse 
+    JSON files.
+    """
+    if _JSON_BACKEND is None:
+        set_json_backend('auto')
+    return _JSON_BACKEND
+
+def set_json_backend(backend):
+    """
+    Change the library that the default loader will use to parse JSON files.
+
+    See `json_loader` for a description of the possible backends.
+    """
+    global _JSON_BACKEND, _JSON_LOADS
+    _JSON_BACKEND, _JSON_LOADS = _find_json_backend(backend)
+
+def get_yml_backend():
+    """
+    Return the name of the library that will be used to parse YAML files.
+
+    This is ``'libyaml'`` if PyYAML was built with libyaml support, which is 
+    much faster, or ``'python'`` otherwise.
+    """
+    return 'libyaml' if _get_yml_c_loader() else 'python'
+
+def _find_json_backend(backend):
+    if backend == 'auto':
+        for name in _JSON_BACKENDS:
+            try:
+                return name, importlib.import_module(name).loads
+            except ImportError:
+                pass
+
+        return 'json', json.loads
+
+    if backend == 'json':
+        return 'json', json.loads
+
+    if backend not in _JSON_BACKENDS:
+        err = ConfigError(
+                backend=backend,
+                known_backends=['auto', 'json', *_JSON_BACKENDS],
+        )
+        err.brief = "unknown JSON backend: {backend!r}"
+        err.info += lambda e: "known backends: " + ', '.join(repr(x) for x in e.known_backends)
+        raise err
+
+    try:
+        return backend, importlib.import_module(backend).loads
+    except ImportError:
+        err = ConfigError(backend=backend, package=_JSON_BACKENDS[backend])
+        err.brief = "JSON backend not installed: {backend!r}"
+        err.hints += "try: pip install {package}"
+        raise err from None
+
+# The backend is chosen the first time it's needed, because importing the 
+# third-party libraries is relatively slow.
+_JSON_BACKEND = _JSON_LOADS = None
+
+def _load_json_with(path, loads):
+    text = _read_if_large(path)
+
+    if text is None:
+        with open(path, 'rb') as f:
+            return _loads_json(f.read(), loads)
+
+    return _index_json(text, loads) or _loads_json(text, loads)
+
+def _loads_json(data, loads):
+    """
+    Parse the given JSON using the given backend, but fall back to the 
+    standard library if the backend fails.
+
+    The third-party parsers reject some inputs that the standard library 
+    accepts (e.g. ``NaN``), and their error messages are less informative.  
+    Some also silently convert integers that don't fit in 64 bits to floats, 
+    so any input with a long run of digits is left to the standard library.
+    """
+    with gc_paused():
+        if loads is not json.loads and not _has_long_digits(data):
+            try:
+                return loads(data)
+            except Exception:
+                pass
+
+        return json.loads(data)
+
+def _has_long_digits(data):
+    # This is several times faster than searching with a regular expression.
+    if isinstance(data, bytes):
+        return b'0' * 19 in data.translate(_BYTES_DIGITS_TO_ZERO)
+    else:
+        return '0' * 19 in data.translate(_STR_DIGITS_TO_ZERO)
+
+_BYTES_DIGITS_TO_ZERO = bytes.maketrans(b'123456789', b'000000000')
+_STR_DIGITS_TO_ZERO = str.maketrans('123456789', '000000000')
+
+def _safe_load_yml(stream):
+    """
+    Equivalent to `yaml.safe_load`, but using libyaml if it's available.
+
+    The two parsers don't agree on every input.  In particular, libyaml is 
+    more lenient about some things that the YAML spec doesn't allow, e.g. a 
+    tab between a key and its value (``a:\t1``), which libyaml parses but the 
+    pure-python parser rejects.  Whatever libyaml accepts is used as is; the 
+    pure-python parser is only used to report errors for files that libyaml 
+    rejects.  This means that such files may load on a machine with libyaml, 
+    and fail on one without it.  The backend in use is shown in the pytest 
+    header (see `get_yml_backend`).
+    """
+    import yaml
+
+    c_loader = _get_yml_c_loader()
+    if not c_loader:
+        return yaml.safe_load(stream)
+
+    try:
+        return yaml.load(stream, Loader=c_loader)
+
+    # The pure-python parser gives more helpful error messages, so use it to 
+    # report any errors.
+    except yaml.YAMLError:
+        if hasattr(stream, 'seek'):
+            stream.seek(0)
+        return yaml.safe_load(stream)
+
+@functools.lru_cache(maxsize=None)
+def _get_yml_c_loader():
+    # PyYAML only provides this loader if it was built with libyaml support.
+    import yaml
+    return getattr(yaml, 'CSafeLoader', None)
+
+def _read_if_large(path):
+    """
+    Return the contents of the given file if it's large enough to be worth 
+    indexing, otherwise None.
+
+    Files that aren't UTF-8, or that begin with a byte-order mark, are also 
+    never indexed.  This way the scanning code only needs to deal with one 
+    encoding, and any other encodings are handled by the usual parsers.
+    """
+    if os.stat(path).st_size < _LAZY_MIN_BYTES:
+        return None
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if data.startswith((b'\xef\xbb\xbf', b'\xfe\xff', b'\xff\xfe')):
+        return None
+
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+
+def _index_json(text, loads=json.loads):
+    """
+    Index the top-level keys of a JSON object, or return None if the text 
+    isn't laid out in a way that can be cheaply indexed.
+
+    The scan relies on the layout produced by ``json.dump(..., indent=N)``, 
+    where each top-level key starts on its own line with the same 
+    indentation.  Minified files can't be indexed without a full tokenization, 
+    which is no faster than just parsing them.
+    """
+    head = re.match(r'\s*\{[ \t\r]*\n([ \t]+)"', text)
+    tail = re.search(r'\}\s*$', text)
+
+    if not head or not tail:
+        return None
+
+    key_pattern = re.compile(
+            r'^' + re.escape(head.group(1)) + r'"((?:[^"\\\n]|\\.)*)"\s*:\s*',
+            re.MULTILINE,
+    )
+    matches = list(key_pattern.finditer(text, head.start(1)))
+    index = {}
+
+    for i, m in enumerate(matches):
+        start = m.end()
+        end = matches[i+1].start() if i + 1 < len(matches) else tail.start()
+        value = text[start:end].rstrip()
+
+        if i + 1 < len(matches):
+            if not value.endswith(','):
+                return None
+            value = value[:-1].rstrip()
+
+        if not _is_nested(_strip_json_strings(value)):
+            return None
+
+        key = json.loads(f'"{m.group(1)}"')
+        index[key] = start, start + len(value)
+
+    if not index:
+        return None
+
+    decoder = json.JSONDecoder()
+
+    def load_value(key, span):
+        start, end = span
+
+        chunk = text[start:end]
+
+        if loads is not json.loads and not _has_long_digits(chunk):
+            try:
+                return loads(chunk)
+            except Exception:
+                pass
+
+        value, i = decoder.raw_decode(text, start)
+        return value if i == end else MISSING
+
+    return LazySuiteParams(index, load_value, lambda: _loads_json(text, loads))
+
+def _index_yml(text):
+    """
+    Index the top-level keys of a YAML mapping, or return None if the text 
+    uses features that make this impossible to do reliably.
+
+    Top-level keys are recognized as lines that begin (in the first column) 
+    with an identifier followed by a colon.  Files that use anchors, aliases, 
+    merge keys, directives, or multiple documents aren't indexed, because 
+    those features can create dependencies between the values of different 
+    keys.
+    """
+    import yaml
+
+    # Check for the relevant characters before using a regular expression, 
+    # because searching for characters is much faster.
+    if '&' in text or '*' in text or '<<' in text:
+        if re.search(r'[\s\[{,][&*][^\s,\[\]{}]|^[&*]|<<\s*:', text, re.MULTILINE):
+            return None
+
+    def parse_key(line):
+        m = re.match(r'([A-Za-z_][\w.\-]*)[ \t]*:(?=[ \t\r\n]|$)', line)
+        if not m:
+            return None
+
+        # Make sure that the key will be loaded as a string, e.g. not `null`.
+        tag = resolver.resolve(yaml.ScalarNode, m.group(1), (True, False))
+        return m.group(1) if tag == 'tag:yaml.org,2002:str' else None
+
+    def load_value(key, span):
+        start, end = span
+        value = _safe_load_yml(text[start:end])
+
+        if not isinstance(value, dict) or list(value) != [key]:
+            return MISSING
+
+        return value[key]
+
+    def is_safe(chunk):
+        chunk = _strip_yml_strings(chunk)
+        return not _has_yml_quote(chunk) and _is_nested(chunk)
+
+    resolver = yaml.resolver.Resolver()
+    # Lines beginning with "-" are items in a sequence belonging to the 
+    # preceding key.
+    index = _index_top_level_lines(
+            text, parse_key, is_safe,
+            skip=r'-(?:[ \t\r\n]|$)',
+    )
+
+    if index is None:
+        return None
+
+    return LazySuiteParams(index, load_value, lambda: _safe_load_yml(text))
+
+def _index_nt(text, path):
+    """
+    Index the top-level keys of a NestedText dictionary, or return None if the 
+    top-level data structure isn't a dictionary with simple keys.
+
+    NestedText is strictly line-based, so any line that begins (in the first 
+    column) with a key followed by a colon must be a top-level key.
+    """
+    import nestedtext as nt
+
+    def parse_key(line):
+        m = re.match(r'([A-Za-z_][\w.\-]*):(?=[ \r\n]|$)', line)
+        return m.group(1) if m else None
+
+    def is_safe(chunk):
+        return True
+
+    def load_value(key, span):
+        start, end = span
+        value = nt.loads(text[start:end], source=str(path))
+
+        if not isinstance(value, dict) or list(value) != [key]:
+            return MISSING
+
+        return value[key]
+
+    # NestedText doesn't allow duplicate keys.  Leave it to the parser to 
+    # report the error, so that it's the same whether or not the file is big 
+    # enough to be indexed.
+    index = _index_top_level_lines(text, parse_key, is_safe, unique=True)
+
+    if index is None:
+        return None
+
+    return LazySuiteParams(
+            index,
+            load_value,
+            lambda: nt.loads(text, source=str(path)),
+    )
+
+def _index_top_level_lines(text, parse_key, is_safe, skip=None, unique=False):
+    """
+    Find the lines that begin with top-level keys, for formats where nested 
+    values are always indented.  Lines matching the *skip* pattern are assumed 
+    to belong to the value of the preceding key, even though they aren't 
+    indented.  Any other unindented line that isn't a key means that the file 
+    can't be indexed.
+
+    Returns a dictionary mapping each key to the start and end offsets of the 
+    corresponding text.  The *is_safe* callback is given the text for each 
+    key, and should return False if that text doesn't end at the top level, 
+    e.g. because it contains an unterminated string or unclosed brackets.  In 
+    that case, what looks like the next key could actually be part of a 
+    multi-line string or collection, so None is returned.  Since the text 
+    before the first key is just blank lines and comments, this means that 
+    every key is confirmed to be at the top level, counting from the start of 
+    the file.
+
+    If a key appears more than once, the last value is used, which is what 
+    most parsers do.  If *unique* is true, None is returned instead.
+    """
+    line_pattern = r'^[^ \t\r\n#].*'
+    if skip:
+        line_pattern = f'^(?!{skip}){line_pattern[1:]}'
+
+    keys = []
+
+    for m in re.finditer(line_pattern, text, re.MULTILINE):
+        key = parse_key(m.group())
+        if key is None:
+            return None
+
+        keys.append((key, m.start()))
+
+    if not keys:
+        return None
+
+    # Only blank lines and comments can precede the first key.
+    if not re.fullmatch(r'(?:[ \t]*(?:#.*)?\r?\n)*', text[:keys[0][1]]):
+        return None
+
+    index = {}
+
+    for i, (key, start) in enumerate(keys):
+        if i + 1 < len(keys):
+            end = keys[i+1][1]
+            if not is_safe(text[start:end]):
+                return None
+        else:
+            end = len(text)
+
+        if unique and key in index:
+            return None
+
+        index[key] = start, end
+
+    return index
+
+def _strip_json_strings(text):
+    # JSON strings can't span multiple lines, so this works on any chunk of 
+    # text that begins at the start of a line.
+    return re.sub(r'"(?:[^"\\\n]|\\.)*"', '', text)
+
+def _strip_yml_strings(text):
+    # Remove comments and complete quoted strings, scanning from left to right 
+    # so that quotes in comments and comment characters in strings are 
+    # handled correctly.  Quotes only begin strings at the start of a value, 
+    # e.g. not in plain scalars like `don't`.
+    return re.sub(
+            r"(?:^|(?<=[ \t]))#[^\n]*"
+            r'|(?:^|(?<=[\s\[{,:]))"(?:[^"\\]|\\.)*"'
+            r"|(?:^|(?<=[\s\[{,:]))'(?:[^']|'')*'",
+            '',
+            text,
+            flags=re.MULTILINE,
+    )
+
+def _has_yml_quote(text):
+    # Any quote that begins a string after `_strip_yml_strings()` must begin 
+    # a string that isn't terminated.
+    return re.search(r"""(?:^|(?<=[\s\[{,:]))["']""", text, re.MULTILINE) is not None
+
+def _is_nested(text):
+    """
+    Return True if the brackets in the given text are balanced and properly 
+    nested.  Any brackets in strings should already have been removed.
+    """
+    brackets = re.sub(r'[^\[\]{}]+', '', text)
+
+    while brackets:
+        n = len(brackets)
+        brackets = brackets.replace('[]', '').replace('{}', '')
+        if len(brackets) == n:
+            return False
+
+    return True
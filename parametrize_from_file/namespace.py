@@ -1,9 +1,69 @@
+import re
+import sys
+import dis
+from .utils import MISSING
+from collections import namedtuple
 from collections.abc import Mapping, Iterable
-from functools import partial
-from unittest.mock import Mock
+from functools import partial, lru_cache
+from numbers import Number
+from enum import Enum
+from types import (
+        CodeType, ModuleType, FunctionType, BuiltinFunctionType
+)
 
 SENTINEL = object()
 
+_CONSTANTS = {
+        'True': True,
+        'False': False,
+        'None': None,
+}
+_FLOAT_PATTERN = re.compile(r'(?:[0-9]+\.[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?|[0-9]+[eE][-+]?[0-9]+')
+_IMMUTABLE_TYPES = {
+        int, float, complex, bool, str, bytes, type(None), type(Ellipsis),
+}
+
+# Objects that are conventionally treated as immutable, and can therefore be 
+# shared between test cases.
+_SHAREABLE_TYPES = (
+        Number, type, ModuleType, FunctionType, BuiltinFunctionType, Enum,
+)
+
+_Snippet = namedtuple('_Snippet', ['code', 'pure', 'isolated', 'value'])
+
+# The number of compiled snippets to keep.  Schemas tend to evaluate the same 
+# handful of snippets over and over (e.g. exception types), so this doesn't 
+# need to be very big.
+_COMPILE_CACHE_SIZE = 4096
+
+# Instructions and names that allow a snippet to modify its global variables.  
+# Snippets that don't contain any of these can be evaluated without first 
+# copying the namespace.
+_IMPURE_OPS = {
+        'STORE_NAME',
+        'DELETE_NAME',
+        'STORE_GLOBAL',
+        'DELETE_GLOBAL',
+}
+_IMPURE_NAMES = {
+        'globals',
+        'locals',
+        'vars',
+        'eval',
+        'exec',
+        'breakpoint',
+        '__globals__',
+        '_getframe',
+        'currentframe',
+        'f_globals',
+        'f_locals',
+        'f_back',
+        'tb_frame',
+        'gi_frame',
+        'cr_frame',
+        'ag_frame',
+}
+
 class Namespace(Mapping):
     """\
     Evaluate and/or execute snippets of python code, with powerful control over the 
@@ -230,8 +290,6 @@ class Namespace(Mapping):
             allow for this convenience, both of these types are treated 
             specially by this method and passed through unchanged.
         """
-        from .schema import ExpectSuccess, ExpectError
-
         if not src:
             return partial(self.eval, keys=keys, defer=defer)
         if defer:
@@ -239,17 +297,118 @@ class Namespace(Mapping):
             return f
 
         src = src[0] if len(src) == 1 else list(src)
-        recurse = partial(self.eval, keys=keys)
+        return self._eval(src, keys, {})
+
+    def eval_many(self, values, *, keys=False):
+        """
+        Evaluate each of the given values, but only evaluate each distinct 
+        expression once.
+
+        Arguments:
+            values (collections.abc.Iterable):
+                The values to evaluate.  Typically these are all the values of 
+                a single test parameter, across every test case.  Each value is 
+                evaluated as if by `eval`.
 
-        if type(src) is list:
-            return [recurse(x) for x in src]
+            keys (bool):
+                If true, evaluate dictionary keys.  See `eval`.
+
+        Returns:
+            list: The result of evaluating each value, in the same order as the 
+            given values.
+
+        This is faster than calling `eval` on each value separately when the 
+        same expressions appear many times, e.g. a parameter that specifies 
+        one of a handful of types for thousands of test cases.  Results are 
+        only reused if they can't be mutated (e.g. numbers, strings, classes, 
+        functions, and modules).  Any other kind of result is recalculated for 
+        each occurrence of the expression, so that no two test cases end up 
+        sharing the same mutable object.
+
+        Example:
+            >>> with_math = Namespace('import math')
+            >>> with_math.eval_many(['math.pi', 'math.e', 'math.pi'])
+            [3.141592653589793, 2.718281828459045, 3.141592653589793]
+        """
+        results = {}
+        shared = {}
+        out = []
+
+        for value in values:
+            if type(value) is not str:
+                out.append(self._eval(value, keys, shared))
+                continue
+
+            try:
+                out.append(results[value])
+                continue
+            except KeyError:
+                pass
+
+            result = self._eval_snippet(value, shared)
+            if _is_shareable(result):
+                results[value] = result
+
+            out.append(result)
+
+        return out
+
+    def _eval(self, src, keys, shared):
+        # Strings are checked first because they're by far the most common 
+        # input, and this method is called once for every value in a 
+        # potentially large data structure.
+        if type(src) is str:
+            return self._eval_snippet(src, shared)
+        elif type(src) is list:
+            return [self._eval(x, keys, shared) for x in src]
         elif type(src) is dict:
-            f = recurse if keys else lambda x: x
-            return {f(k): recurse(v) for k, v in src.items()}
-        elif isinstance(src, (Mock, ExpectSuccess, ExpectError)):
+            if keys:
+                return {
+                        self._eval(k, keys, shared): self._eval(v, keys, shared)
+                        for k, v in src.items()
+                }
+            else:
+                return {k: self._eval(v, keys, shared) for k, v in src.items()}
+
+        from .schema import ExpectSuccess, ExpectError
+
+        if _is_mock(src) or isinstance(src, (ExpectSuccess, ExpectError)):
             return src
         else:
-            return eval(src, self._dict.copy())
+            return self._eval_snippet(src, shared)
+
+    def _eval_snippet(self, src, shared):
+        value = _parse_literal(src)
+        if value is not MISSING:
+            return value
+
+        snippet = _compile(src, 'eval')
+
+        if snippet.value is not MISSING:
+            return snippet.value
+
+        # Snippets that don't refer to any names don't need any globals.
+        if snippet.isolated:
+            return eval(snippet.code, {'__builtins__': {}})
+
+        # Snippets that might modify their global variables need to be 
+        # evaluated in a copy of the namespace.  All other snippets evaluated 
+        # by the same call to `eval()` or `eval_many()` can share a single 
+        # copy, which is made when the first such snippet is evaluated.  This 
+        # copy is still necessary because `eval()` adds `__builtins__` to its 
+        # globals.  It can't be kept between calls, because the names in the 
+        # namespace can change (e.g. if a function in the namespace assigns to 
+        # a global variable), and because `_is_pure()` can't rule out every 
+        # way that a snippet might modify its globals.
+        if not snippet.pure:
+            return eval(snippet.code, self._dict.copy())
+
+        try:
+            eval_globals = shared['globals']
+        except KeyError:
+            eval_globals = shared['globals'] = self._dict.copy()
+
+        return eval(snippet.code, eval_globals)
 
     def exec(self, src=SENTINEL, get=SENTINEL, defer=False):
         """
@@ -334,11 +493,11 @@ class Namespace(Mapping):
         if defer:
             f = f.exec = partial(self.exec, src, get=get)
             return f
-        if isinstance(src, (Mock, ExpectSuccess, ExpectError)):
+        if _is_mock(src) or isinstance(src, (ExpectSuccess, ExpectError)):
             return src
 
         fork = self.fork()
-        exec(src, fork._dict)
+        exec(_compile(src, 'exec').code, fork._dict)
 
         if get is SENTINEL:
             return fork
@@ -396,12 +555,188 @@ def star(module):
             for k in keys
     }
 
+def _parse_literal(src):
+    """
+    Parse the simplest and most common kinds of literals (e.g. ``'1'``, 
+    ``'0.5'``, ``'True'``) without invoking the compiler, or return `MISSING` 
+    if the given snippet isn't such a literal.
+
+    Only inputs that are unambiguously literals are recognized.  Anything else 
+    (including other spellings of the same values, e.g. ``'1_000'``) is left 
+    for `_compile` to handle, so that the results and any error messages are 
+    exactly the same as for `eval`.
+    """
+    if type(src) is not str or not src:
+        return MISSING
+
+    try:
+        return _CONSTANTS[src]
+    except KeyError:
+        pass
+
+    if src.isascii():
+        # Integers with leading zeros (e.g. "01") are syntax errors.
+        if src.isdigit() and (src[0] != '0' or not src.strip('0')):
+            try:
+                return int(src)
+            except ValueError:
+                return MISSING
+
+        if _FLOAT_PATTERN.fullmatch(src):
+            return float(src)
+
+    # Strings without any escape sequences, embedded quotes, or unprintable 
+    # characters.
+    q = src[0]
+    if q in '\'"' and len(src) > 1 and src[-1] == q:
+        inner = src[1:-1]
+        if q not in inner and '\\' not in inner and inner.isprintable():
+            return inner
+
+    return MISSING
+
+def compile_cache_info():
+    """
+    Return statistics about the cache of compiled snippets.
+
+    Each distinct snippet evaluated or executed by any `Namespace` is only 
+    compiled once per process, and the most recently used 4096 snippets are 
+    kept.  The statistics are a named tuple with *hits*, *misses*, *maxsize*, 
+    and *currsize* fields, the same as for `functools.lru_cache`:
+
+    .. code-block:: python
+
+        import parametrize_from_file as pff
+
+        info = pff.compile_cache_info()
+        print(info.hits / (info.hits + info.misses))
+
+    A low hit rate means that most snippets are only evaluated once, so 
+    there's little to be gained from `Namespace.eval_many`.
+    """
+    return _compile_str.cache_info()
+
+def clear_compile_cache():
+    """
+    Discard every compiled snippet, and reset the statistics returned by 
+    `compile_cache_info`.
+    """
+    _compile_str.cache_clear()
+
+def _compile(src, mode):
+    """
+    Compile the given snippet, reusing the results from a previous call if 
+    possible.
+
+    Returns:
+        A `_Snippet` tuple with the following fields:
+
+        - *code*: The compiled code object.
+        - *pure*: True if the code is guaranteed to leave its global variables 
+          unmodified.
+        - *isolated*: True if the code doesn't refer to any names, and 
+          therefore doesn't depend on its global variables at all.
+        - *value*: If the code is isolated and evaluates to an immutable 
+          value, that value.  Otherwise `MISSING`.
+
+        The last three fields are only calculated in ``'eval'`` mode.  
+        Anything that isn't a string (e.g. a code object) is returned 
+        unchanged, to be handled by `eval` or `exec` as usual.
+    """
+    if type(src) is not str:
+        return _Snippet(src, False, False, MISSING)
+
+    # Mimic `eval`, which ignores leading spaces and tabs.  Do this before 
+    # looking up the cache, so that indented snippets share the same entry.
+    if mode == 'eval':
+        src = src.lstrip(' \t')
+
+    return _compile_str(src, mode)
+
+@lru_cache(maxsize=_COMPILE_CACHE_SIZE)
+def _compile_str(src, mode):
+    code = compile(src, '<string>', mode)
+
+    if mode != 'eval':
+        return _Snippet(code, False, False, MISSING)
+
+    pure = _is_pure(code)
+    isolated = _is_isolated(code)
+    value = MISSING
+
+    # Isolated code always evaluates to the same value (or raises the same 
+    # exception), so if that value can't be modified, it can be reused.
+    if isolated:
+        try:
+            result = eval(code, {'__builtins__': {}})
+        except Exception:
+            pass
+        else:
+            if _is_immutable(result):
+                value = result
+
+    return _Snippet(code, pure, isolated, value)
+
+def _is_pure(code):
+    """
+    Return True if the given code object can't modify its global variables.
+
+    This is a conservative check: it looks for any instruction that stores or 
+    deletes a global variable, and any reference to a name that could be used 
+    to get access to the globals dictionary itself.
+    """
+    if not _IMPURE_NAMES.isdisjoint(code.co_names):
+        return False
+
+    for instr in dis.get_instructions(code):
+        if instr.opname in _IMPURE_OPS:
+            return False
+
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            if not _is_pure(const):
+                return False
+
+        # Catch things like `getattr(f, '__globals__')`.
+        elif isinstance(const, str) and const in _IMPURE_NAMES:
+            return False
+
+    return True
+
+def _is_isolated(code):
+    if code.co_names:
+        return False
+
+    return all(
+            _is_isolated(const)
+            for const in code.co_consts
+            if isinstance(const, CodeType)
+    )
+
+def _is_immutable(value):
+    if type(value) in (tuple, frozenset):
+        return all(_is_immutable(x) for x in value)
+
+    return type(value) in _IMMUTABLE_TYPES
+
+def _is_shareable(value):
+    if _is_immutable(value):
+        return True
+
+    return isinstance(value, _SHAREABLE_TYPES)
+
+def _is_mock(value):
+    # Mocks can only exist if `unittest.mock` has already been imported, so 
+    # there's no need to import it (which is slow) just to check.
+    mock = sys.modules.get('unittest.mock')
+    return mock is not None and isinstance(value, mock.Mock)
+
 def _update_namespace(ns_dict, *args, **kwargs):
     for arg in args:
         if hasattr(arg, '__name__'):
             ns_dict[arg.__name__] = arg
         elif isinstance(arg, str):
-            exec(arg, ns_dict)
+            exec(_compile(arg, 'exec').code, ns_dict)
         else:
             ns_dict.update(arg)
 
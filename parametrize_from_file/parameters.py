@@ -1,24 +1,30 @@
-import pytest
+import os
+import sys
 import inspect
 import decopatch
+import weakref
 
 from .loaders import get_loaders
-from .utils import is_iterable
+from .cache import get_cache, get_disk_cache, get_dir_cache
+from .prefilter import get_prefilter
+from .shard import get_sharder, get_case_name, SHARD_MARK
+from .profile import get_profiler, timed, recording, time_schema, get_schema_name
+from .schema import _fuse_schema
+from .rows import CaseRow, compact_case
+from .utils import is_iterable, always_iterable, MISSING
 from .errors import ConfigError
 from pathlib import Path
-from functools import lru_cache
 from collections import namedtuple
+from contextlib import contextmanager
 from collections.abc import Mapping, Iterable
-from difflib import get_close_matches
-from more_itertools import (
-        always_iterable, zip_broadcast
-)
+from operator import itemgetter
+from itertools import compress
 from textwrap import indent
 
-try:
-    from more_itertools import UnequalIterablesError
-except ImportError:
-    UnequalIterablesError = ValueError
+# Note that pytest (like `more_itertools` and `difflib`) is imported only when 
+# it's actually needed, i.e. when a decorator is applied or parameters are 
+# loaded.  This keeps the package cheap to import, which matters for tools that 
+# import it many times over.
 
 # suite_params:
 #     All parameters associated with the test file in question.  
@@ -34,7 +40,11 @@ except ImportError:
 #     of keys and values that will be provided to the actual test 
 #     function.
 
-def _decorator_factory(api_func):
+_SPECIAL_KEYS = frozenset({'id', 'marks'})
+
+def _decorator_factory(api_func=None, *, shard=True):
+    if api_func is None:
+        return lambda f: _decorator_factory(f, shard=shard)
 
     @decopatch.decorator
     def decorator(
@@ -44,32 +54,41 @@ def _decorator_factory(api_func):
             loaders=None,
             preprocess=None,
             schema=None,
+            lazy=False,
             test_func=decopatch.DECORATED,
             **kwargs
         ):
 
         # The path is relative to the file the caller is defined in.
-        test_module = inspect.getmodule(test_func)
-        test_path = Path(test_module.__file__)
+        with timed('resolve module'):
+            test_path = _get_test_path(test_func)
 
         with ConfigError.add_info(
                 "test function: {test_func.__qualname__}()",
                 "test file: {test_path}",
                 test_func=test_func,
-                test_module=test_module,
                 test_path=test_path,
         ):
             loaders = _override_global_loaders(loaders)
-            path = _resolve_param_path(test_path, path, loaders)
+
+            with timed('resolve path'):
+                path = _resolve_param_path(test_path, path, loaders)
+
             key = key or test_func.__name__
-            param_names, param_values = load_parameters(
+            param_names, param_values = _load_parameters(
                     path=path,
                     key=key,
                     loaders=loaders,
                     preprocess=preprocess,
                     schema=schema,
+                    lazy=lazy,
+                    test_path=test_path,
+                    test_func=test_func,
+                    shard=shard and not _is_sharded(test_func),
             )
             wrapper = api_func(param_names, param_values, kwargs)(test_func)
+            if shard and get_sharder():
+                wrapper._pff_sharded = True
             wrapper.path = path
             wrapper.key = key
             wrapper.loaders = loaders
@@ -178,6 +197,25 @@ def parametrize(param_names, param_values, kwargs):
             `error_or`, or a third-party data validation library such as 
             voluptuous_ or schema_.
 
+        lazy (bool):
+            If true, don't apply the schema until each test case is actually 
+            run.  This can make collection much faster for tests with many 
+            test cases and expensive schemas, especially if only a few of those 
+            test cases will actually be run (e.g. because of ``-k`` or 
+            ``--lf``).  Any errors raised by the schema are reported by the 
+            test cases that cause them, rather than preventing the whole test 
+            module from being collected.
+
+            The parameter names still need to be known during collection, so 
+            they are predicted from the schema.  `cast`, `defaults`, `rename`, 
+            and `error_or` are all accounted for, but any other schema 
+            functions are assumed not to add or remove parameters, unless they 
+            have an ``output_keys`` attribute.  This attribute should be a 
+            function that takes the set of parameter names given to the schema 
+            function and returns the set of names it will return.  In addition, 
+            the ids and marks for each test case must be specified in the 
+            parameter file, not by the schema.
+
         kwargs:
             Any other keyword arguments are passed on directly to 
             `pytest.mark.parametrize ref`.
@@ -280,9 +318,12 @@ def parametrize(param_names, param_values, kwargs):
             def test_is_even(value, expected):
                 assert is_even(value) == expected
     """
+    import pytest
     return pytest.mark.parametrize(param_names, param_values, **kwargs)
 
-@_decorator_factory
+# The combinations of fixture parameters aren't known until the tests are 
+# collected, so these are sharded by the plugin instead (see `shard`).
+@_decorator_factory(shard=False)
 def fixture(param_names, param_values, kwargs):
     """
     Parametrize a fixture function with values read from a config file.
@@ -317,10 +358,13 @@ def fixture(param_names, param_values, kwargs):
     be anything in particular.  Any ids and/or marks associated with the 
     parameters will be correctly handled.
     """
+    import pytest
+
     Params = namedtuple("Params", param_names)
+    Params._pff_fixture = True
     params = [
             pytest.param(
-                Params(*x.values),
+                _make_fixture_param(Params, x.values),
                 id=x.id,
                 marks=x.marks,
             )
@@ -328,6 +372,19 @@ def fixture(param_names, param_values, kwargs):
     ]
     return pytest.fixture(params=params, **kwargs)
 
+def is_fixture_param(param):
+    """
+    Return true if the given parameter was loaded by :deco:`fixture`.
+    """
+    return isinstance(param, LazyFixtureParam) or \
+            getattr(param, '_pff_fixture', False)
+
+def _make_fixture_param(factory, values):
+    if any(isinstance(x, LazyParam) for x in values):
+        return LazyFixtureParam(factory, values)
+    else:
+        return factory(*values)
+
 def load_parameters(
         path,
         key,
@@ -335,6 +392,7 @@ def load_parameters(
         loaders=None,
         preprocess=None,
         schema=None,
+        lazy=False,
     ):
     """
     Load test parameters from a file.
@@ -358,6 +416,12 @@ def load_parameters(
         schema (collections.abc.Callable):
             See: :deco:`parametrize`
 
+        lazy (bool):
+            See: :deco:`parametrize`.  The returned parameters will be 
+            placeholders that are only replaced with their actual values by 
+            the :mod:`parametrize_from_file` pytest plugin, when the test using 
+            them is run.
+
     Returns:
         tuple:
             - A list of parameter names
@@ -370,24 +434,81 @@ def load_parameters(
     order to merge them with parameters derived from some other source and 
     apply them all to the same test function.
     """
-    test_params = []
+    return _load_parameters(
+            path,
+            key,
+            loaders=loaders,
+            preprocess=preprocess,
+            schema=schema,
+            lazy=lazy,
+    )
+
+def _load_parameters(
+        path,
+        key,
+        *,
+        loaders=None,
+        preprocess=None,
+        schema=None,
+        lazy=False,
+        test_path=None,
+        test_func=None,
+        shard=False,
+    ):
+    test_name = None
+    if get_profiler() and test_func:
+        test_name = _get_test_name(test_path, test_func)
+
+    with recording(path, key, test_name) as record:
+        param_names, param_values = _load_parameters_unprofiled(
+                path,
+                key,
+                loaders=loaders,
+                preprocess=preprocess,
+                schema=schema,
+                lazy=lazy,
+                test_path=test_path,
+                test_func=test_func,
+                shard=shard,
+        )
+        if record:
+            record.cases = len(param_values)
+
+        return param_names, param_values
+
+def _load_parameters_unprofiled(
+        path,
+        key,
+        *,
+        loaders=None,
+        preprocess=None,
+        schema=None,
+        lazy=False,
+        test_path=None,
+        test_func=None,
+        shard=False,
+    ):
+    from more_itertools import zip_broadcast
+
+    try:
+        from more_itertools import UnequalIterablesError
+    except ImportError:
+        UnequalIterablesError = ValueError
+
     loaders = _override_global_loaders(loaders)
+    groups = []
 
     try:
         for path_i, key_i in zip_broadcast(path, key, strict=True):
-            with ConfigError.add_info(
-                    "parameter file: {param_path}",
-                    param_path=path_i,
-            ):
-                p = _load_test_params(loaders, path_i, key_i)
-                context = Context(path_i, key_i)
-
-                with ConfigError.add_info(
-                        "top-level key: {key}",
-                        key=key_i,
-                ):
-                    p = _process_test_params(p, preprocess, context, schema)
-                    test_params += p
+            context = Context(path_i, key_i)
+
+            with _add_context_info(context):
+                with timed('load'):
+                    p = _load_test_params(loaders, path_i, key_i)
+                with timed('preprocess'):
+                    p = _preprocess_test_params(p, preprocess, context)
+
+            groups.append((context, p, None))
 
     except UnequalIterablesError:
         err = ConfigError(
@@ -399,8 +520,250 @@ def load_parameters(
         err.info += "keys: {keys!r}"
         raise err
 
-    return _init_parametrize_args(test_params)
+    selectors = []
+    prefilter = get_prefilter()
+    sharder = get_sharder()
+
+    if prefilter and test_func:
+        def select_prefilter(case_ids, stable_ids, marks):
+            predicate = prefilter.make_predicate(test_path, test_func, case_ids)
+            if predicate:
+                return [predicate(*x) for x in zip(case_ids, marks)]
+
+        selectors.append(select_prefilter)
+
+    shard_names = None
+
+    if sharder and shard and test_func:
+        def select_shard(case_ids, stable_ids, marks):
+            nonlocal shard_names
+            shard_names = [
+                    get_case_name(test_path, test_func, x, sharder.rootdir)
+                    for x in stable_ids
+            ]
+            return sharder.select_names(shard_names)
+
+        selectors.append(select_shard)
+
+    if selectors:
+        with timed('filter'):
+            groups, keep = _filter_test_params(
+                    groups,
+                    selectors,
+                    schema_sets_ids=bool(schema and not lazy),
+            )
+
+        if shard_names:
+            shard_names = list(compress(shard_names, keep))
+
+    process = _process_test_params_lazily if lazy else _process_test_params
+    test_params = []
+
+    for context, p, default_ids in groups:
+        with _add_context_info(context), timed('schema'):
+            p = process(p, None, context, schema)
+
+        if default_ids:
+            p = [
+                    x if 'id' in x else x.replace(id=default_id)
+                    for x, default_id in zip(p, default_ids)
+            ]
+
+        test_params += p
+
+    with timed('params'):
+        param_names, param_values = _init_parametrize_args(test_params)
+
+        if shard_names:
+            param_values = _add_shard_marks(param_values, shard_names)
+
+        return param_names, param_values
+
+
+@contextmanager
+def _add_context_info(context):
+    with ConfigError.add_info(
+            "parameter file: {param_path}",
+            "top-level key: {key}",
+            param_path=context.path,
+            key=context.key,
+    ):
+        yield
+
+def _filter_test_params(groups, selectors, *, schema_sets_ids):
+    """
+    Drop any test cases that won't be run, e.g. because they can't be selected 
+    by the command line, or because they belong to a different shard.
+
+    Arguments:
+        groups (list):
+            The test cases loaded from each file/key, along with the context 
+            they were loaded in.
+
+        selectors (list):
+            Functions that decide which test cases to keep.  Each is given 
+            three lists, each with one item per test case: the ids (or None, 
+            if the schema could change the id), the stable ids (which are 
+            never None, but might not be the same as the final ids), and the 
+            names of any marks.  Each should return a list of booleans 
+            indicating which test cases to keep, or None to keep all of them.
+
+        schema_sets_ids (bool):
+            Whether or not the schema could give ids to test cases that don't 
+            have them.
+
+    Returns:
+        A list of groups, with any test cases that won't be run removed, and a 
+        list of booleans indicating which test cases were kept.
+
+    The default ids (i.e. for test cases that don't specify an id) depend on 
+    the position of each test case among all the others, so they're worked out 
+    before anything is dropped.
+    """
+    groups = [(context, list(p)) for context, p, _ in groups]
+    case_ids = []
+    stable_ids = []
+    default_ids = []
+    marks = []
+
+    for context, p in groups:
+        for case_params in p:
+            default_id = str(len(default_ids) + 1)
+            default_ids.append(default_id)
+
+            if not isinstance(case_params, Mapping):
+                case_ids.append(None)
+                stable_ids.append(default_id)
+                marks.append([])
+                continue
+
+            if 'id' in case_params:
+                case_ids.append(str(case_params['id']))
+            elif schema_sets_ids:
+                case_ids.append(None)
+            else:
+                case_ids.append(default_id)
+
+            stable_ids.append(case_ids[-1] or default_id)
+            marks.append(_get_mark_names(case_params.get('marks', [])))
+
+    keep = [True] * len(default_ids)
+
+    for select in selectors:
+        selected = select(case_ids, stable_ids, marks)
+        if selected is not None:
+            keep = [a and b for a, b in zip(keep, selected)]
+
+    if all(keep):
+        return [(context, p, None) for context, p in groups], keep
+
+    filtered_groups = []
+    j = 0
 
+    for context, p in groups:
+        filtered_p = []
+        filtered_default_ids = []
+
+        for case_params in p:
+            if keep[j]:
+                filtered_p.append(case_params)
+                filtered_default_ids.append(default_ids[j])
+
+            j += 1
+
+        filtered_groups.append((context, filtered_p, filtered_default_ids))
+
+    return filtered_groups, keep
+
+def _add_shard_marks(param_values, shard_names):
+    """
+    Record the name that each test case was sharded by, so the plugin can 
+    tell which items were already sharded, and can record durations by the 
+    same names.
+    """
+    import pytest
+
+    return [
+            pytest.param(
+                *x.values,
+                id=x.id,
+                marks=[*x.marks, getattr(pytest.mark, SHARD_MARK)(name)],
+            )
+            for x, name in zip(param_values, shard_names)
+    ]
+
+def _is_sharded(test_func):
+    """
+    Return true if the test cases for the given test function (or class) were 
+    already sharded by another decorator.
+
+    Only one decorator per test can shard its test cases as they're loaded.  
+    Otherwise, each decorator would drop a different subset of its test cases, 
+    and the combinations between them would be lost.  For classes, any 
+    decorated methods count, too.
+    """
+    if getattr(test_func, '_pff_sharded', False):
+        return True
+
+    if inspect.isclass(test_func):
+        return any(
+                getattr(x, '_pff_sharded', False)
+                for x in vars(test_func).values()
+        )
+
+    return False
+
+def _get_mark_names(marks):
+    if isinstance(marks, str):
+        marks = marks.split(',')
+
+    try:
+        return [x if isinstance(x, str) else x.name for x in marks]
+    except Exception:
+        return []
+
+def _get_test_path(test_func):
+    """
+    Return the path to the file that defines the given test function (or 
+    class).
+
+    The module is looked up by name, which is what `inspect.getmodule` does 
+    first, but without any of its fallbacks.  The paths are remembered for 
+    each module, since most modules define many tests.  If the module can't be 
+    found (or doesn't have a file), the file that the function's code was 
+    compiled from is used instead.
+    """
+    module = sys.modules.get(getattr(test_func, '__module__', None))
+
+    try:
+        return _TEST_PATHS[module]
+    except (KeyError, TypeError):
+        pass
+
+    file = getattr(module, '__file__', None)
+    if file is not None:
+        test_path = Path(file)
+        try:
+            _TEST_PATHS[module] = test_path
+        except TypeError:
+            pass
+        return test_path
+
+    code = getattr(test_func, '__code__', None)
+    if code is not None:
+        return Path(code.co_filename)
+
+    err = ConfigError(test_func=test_func)
+    err.brief = "can't find the file that defines the test"
+    err.info += "test: {test_func!r}"
+    err.hints += "parameters are loaded relative to the file that defines the test, so tests must be defined in modules with files."
+    raise err
+
+_TEST_PATHS = weakref.WeakKeyDictionary()
+
+def _get_test_name(test_path, test_func):
+    qualname = test_func.__qualname__.replace('.', '::')
+    return f'{test_path.name}::{qualname}'
 
 def _override_global_loaders(loaders):
     if loaders is None:
@@ -419,9 +782,7 @@ def _resolve_param_path(test_path, rel_path, loaders):
             test_path.with_suffix(x)
             for x in loaders
     ]
-    param_paths = [
-            x for x in param_path_candidates if x.exists()
-    ]
+    param_paths = _find_existing_paths(test_path.parent, param_path_candidates)
 
     if len(param_paths) < 1:
         err = ConfigError(
@@ -449,6 +810,24 @@ def _resolve_param_path(test_path, rel_path, loaders):
 
     return param_paths[0]
 
+def _find_existing_paths(dir, paths):
+    # Every candidate is in the same directory, so listing that directory 
+    # once (and caching the listing, since most directories contain many test 
+    # modules) is much faster than checking each candidate individually.  If 
+    # no candidates are found, check again the slow way, in case the 
+    # filesystem is case-insensitive.
+    try:
+        names = get_dir_cache().listdir(dir)
+    except OSError:
+        names = frozenset()
+
+    found = [x for x in paths if x.name in names]
+
+    if not found:
+        found = [x for x in paths if x.exists()]
+
+    return found
+
 def _load_test_params(loaders, param_path, test_name):
     loader = _pick_loader_by_suffix(loaders, param_path)
     suite_params = _load_and_cache_suite_params(loader, param_path)
@@ -464,9 +843,10 @@ def _load_test_params(loaders, param_path, test_name):
         raise err
 
     try:
-        return suite_params[test_name]
+        test_params = suite_params[test_name]
 
     except KeyError:
+        from difflib import get_close_matches
         close_matches = get_close_matches(test_name, suite_params)
         err = ConfigError(
                 test_name=test_name,
@@ -479,6 +859,16 @@ def _load_test_params(loaders, param_path, test_name):
 
         raise err from None
 
+    # Loaders can return mappings that only parse each value when it's 
+    # accessed, so parsing errors can happen here.
+    except Exception as err:
+        raise _make_load_error(loader, err) from None
+
+    # Once every test in the file has its parameters, the cache doesn't need 
+    # to keep the rest of the file in memory.
+    get_cache().consume(loader, param_path, test_name)
+    return test_params
+
 def _pick_loader_by_suffix(loaders, param_path):
     try:
         return loaders[param_path.suffix]
@@ -496,30 +886,120 @@ def _pick_loader_by_suffix(loaders, param_path):
         err.blame += "the given extension is not recognized: {param_path.suffix}"
         raise err from None
 
-@lru_cache()
 def _load_and_cache_suite_params(loader, param_path):
-    if not param_path.exists():
+    try:
+        stat = os.stat(param_path)
+    except OSError:
         err = ConfigError(
                 param_path=param_path,
         )
         err.brief = "can't find parametrization file"
         err.blame += "'{param_path}' does not exist."
-        raise err
+        raise err from None
+
+    suite_cache = get_cache()
+    suite_params = suite_cache.get(loader, param_path, stat)
+    if suite_params is not MISSING:
+        return suite_params
+
+    disk_cache = get_disk_cache()
+    if disk_cache:
+        suite_params = disk_cache.get(loader, param_path, stat)
+        if suite_params is not MISSING:
+            suite_cache.put(loader, param_path, suite_params, stat)
+            return suite_params
 
     try:
-        return loader(param_path)
+        with timed('loader'):
+            suite_params = loader(param_path)
 
-    except Exception as err1:
-        err2 = ConfigError(
-                load_func=loader,
-                err=err1,
-        )
-        err2.brief = "failed to load parametrization file"
-        err2.info += "attempted to load file with: {load_func.__module__}.{load_func.__qualname__}()"
-        err2.blame += "{err}"
-        raise err2 from None
+    except Exception as err:
+        raise _make_load_error(loader, err) from None
+
+    suite_cache.put(loader, param_path, suite_params, stat)
+    if disk_cache:
+        disk_cache.put(loader, param_path, suite_params, stat)
+
+    return suite_params
+
+def _make_load_error(loader, err1):
+    err2 = ConfigError(
+            load_func=loader,
+            err=err1,
+    )
+    err2.brief = "failed to load parametrization file"
+    err2.info += "attempted to load file with: {load_func.__module__}.{load_func.__qualname__}()"
+    err2.blame += "{err}"
+    return err2
 
 def _process_test_params(test_params_in, preprocess, context, schema):
+    test_params_in = _preprocess_test_params(test_params_in, preprocess, context)
+
+    if schema and _is_vectorized(schema):
+        return _process_test_params_by_column(test_params_in, schema)
+
+    if schema:
+        schema = time_schema(_fuse_schema(schema))
+
+    # Compact each test case as soon as it's processed, so that only one test 
+    # case at a time is ever stored as a dictionary.
+    test_params_out = []
+    strings = {}
+
+    for case_params_in in test_params_in:
+        _check_case_params(case_params_in)
+        params, stash = _stash_id_marks(case_params_in)
+
+        if schema:
+            params = _eval_case_schema(schema, params, case_params_in)
+
+        case_params_out = _unstash_id_marks(params, stash)
+        test_params_out.append(compact_case(case_params_out, strings))
+
+    return test_params_out
+
+def _process_test_params_lazily(test_params_in, preprocess, context, schema):
+    """
+    Prepare placeholders for the given test cases, without applying the schema.
+
+    The schema is instead applied by `LazyCase` when the test that needs the 
+    parameters is actually run.  The names of the parameters are predicted 
+    from the *output_keys* attributes of the schema functions, so that the 
+    test cases can still be checked for consistency during collection.
+    """
+    test_params_in = _preprocess_test_params(test_params_in, preprocess, context)
+    fused_schema = _fuse_schema(schema) if schema else None
+    output_keys = {}
+    test_params_out = []
+    strings = {}
+
+    for case_params_in in test_params_in:
+        _check_case_params(case_params_in)
+        params, stash = _stash_id_marks(case_params_in)
+
+        input_keys = frozenset(params)
+        if input_keys not in output_keys:
+            output_keys[input_keys] = _predict_output_keys(schema, input_keys)
+
+        case = LazyCase(
+                params,
+                case_params_in,
+                fused_schema,
+                output_keys[input_keys],
+                context,
+        )
+        marks = _combine_marks({}, stash)
+        case_params_out = {
+                **{k: LazyParam(case, k) for k in case.keys},
+                **stash,
+                **marks,
+        }
+
+        test_params_out.append(compact_case(case_params_out, strings))
+
+    return test_params_out
+
+def _preprocess_test_params(test_params_in, preprocess, context):
     if preprocess:
         sig = inspect.signature(preprocess)
         if len(sig.parameters) > 1:
@@ -538,104 +1018,321 @@ def _process_test_params(test_params_in, preprocess, context, schema):
                 preprocess=preprocess,
         )
 
-    test_params_out = []
+    return test_params_in
 
-    def stash_id_marks(obj):
-        params = {}
-        stash = {}
+def _check_case_params(case_params_in):
+    if not isinstance(case_params_in, Mapping):
+        raise ConfigError(
+                "expected dict, got {params!r}",
+                params=case_params_in,
+        )
 
-        for key, value in obj.items():
-            if key in ('id', 'marks'):
-                stash[key] = value
-            else:
-                params[key] = value
+def _eval_case_schema(schema, params, case_params_in):
+    try:
+        params = _eval_schema(schema, params)
+    except Exception as err1:
+        err2 = ConfigError(
+                params=case_params_in,
+                err=err1,
+        )
+        err2.brief = "test case failed schema validation"
+        err2.info += lambda e: (
+                "test case:\n" +
+                _format_case_params(e.params)
+        )
+        err2.blame += '{err}'
+        raise err2 from err1
+
+    if not isinstance(params, dict):
+        raise ConfigError(
+                "expected schema to return dict, got {params!r}",
+                params=params,
+        )
 
-        return params, stash
+    return params
 
-    def combine_marks(params, stash):
-        marks = process_marks(params) + process_marks(stash)
-        return dict(marks=marks) if marks else {}
+def _predict_output_keys(schema, keys):
+    # Schema functions without an `output_keys` attribute are assumed not to 
+    # add or remove any parameters.  This assumption is checked when the 
+    # schema is actually applied.
+    keys = set(keys)
 
-    def process_marks(params):
-        try:
-            marks = params.pop('marks')
-        except KeyError:
-            return []
+    for schema_i in always_iterable(schema):
+        output_keys = getattr(schema_i, 'output_keys', None)
+        if output_keys:
+            keys = output_keys(keys)
 
-        if isinstance(marks, str):
-            marks = marks.split(',')
+    return keys
 
-        return [
-                getattr(pytest.mark, x) if isinstance(x, str) else x 
-                for x in marks
-        ]
+def _process_test_params_by_column(test_params_in, schema):
+    """
+    Apply the schema to every test case at once, one schema function at a 
+    time.
+
+    Errors from schema functions that are applied to one test case at a time 
+    refer to that test case, just like they do in `_process_test_params()`.  
+    Errors from schema functions that are applied to whole columns can't say 
+    which test case caused them, but the schema isn't applied again to find 
+    out, because that would repeat any side effects.
+    """
+    test_params_in = list(test_params_in)
+    stashes = []
+    params = []
 
     for case_params_in in test_params_in:
-        if not isinstance(case_params_in, Mapping):
-            raise ConfigError(
-                    "expected dict, got {params!r}",
-                    params=case_params_in,
-            )
+        _check_case_params(case_params_in)
+        params_i, stash_i = _stash_id_marks(case_params_in)
+        params.append(params_i)
+        stashes.append(stash_i)
 
-        params, stash = stash_id_marks(case_params_in)
+    params = _eval_schema_by_column(schema, params, test_params_in)
 
-        if schema:
-            try:
-                params = _eval_schema(schema, params)
-            except Exception as err1:
-                err2 = ConfigError(
-                        params=case_params_in,
-                        err=err1,
-                )
-                err2.brief = "test case failed schema validation"
-                err2.info += lambda e: (
-                        "test case:\n" +
-                        _format_case_params(e.params)
-                )
-                err2.blame += '{err}'
-                raise err2 from err1
+    strings = {}
+    return [
+            compact_case(_unstash_id_marks(params_i, stash_i), strings)
+            for params_i, stash_i in zip(params, stashes)
+    ]
 
-            if not isinstance(params, dict):
-                raise ConfigError(
-                        "expected schema to return dict, got {params!r}",
-                        params=params,
-                )
+def _stash_id_marks(obj):
+    params = {}
+    stash = {}
 
-        marks = combine_marks(params, stash)
-        case_params_out = {**params, **stash, **marks}
+    for key, value in obj.items():
+        if key in ('id', 'marks'):
+            stash[key] = value
+        else:
+            params[key] = value
 
-        test_params_out.append(case_params_out)
+    return params, stash
 
-    return test_params_out
+def _unstash_id_marks(params, stash):
+    # Note that the marks have to be combined before the parameters are 
+    # unpacked, because combining them removes any marks from *params*.  This 
+    # determines the order of the keys in the resulting test case.
+    marks = _combine_marks(params, stash)
+    return {**params, **stash, **marks}
+
+def _combine_marks(params, stash):
+    marks = _process_marks(params) + _process_marks(stash)
+    return dict(marks=marks) if marks else {}
+
+def _process_marks(params):
+    try:
+        marks = params.pop('marks')
+    except KeyError:
+        return []
+
+    if isinstance(marks, str):
+        marks = marks.split(',')
+
+    import pytest
+
+    return [
+            getattr(pytest.mark, x) if isinstance(x, str) else x 
+            for x in marks
+    ]
 
 def _eval_schema(schema, test_params):
     for schema_i in always_iterable(schema):
         test_params = schema_i(test_params)
     return test_params
 
+def _eval_schema_by_column(schema, test_params, test_params_in):
+    """
+    Apply each schema function to every test case, before moving on to the 
+    next schema function.
+
+    Schema functions with a *columns* attribute are given all the values of 
+    each parameter at once, which allows them to avoid repeating work.  The 
+    values are provided as a dictionary mapping each parameter name to a list 
+    with one value per test case, and `MISSING` for any test cases that lack 
+    that parameter.  The columns returned by these functions can be any kind 
+    of sequence, e.g. NumPy arrays, but must have one value per test case.
+
+    The *test_params_in* argument should be the test cases as they appear in 
+    the parameter file, for use in error messages.
+    """
+    columns = None
+    n = len(test_params)
+
+    for schema_i in always_iterable(schema):
+        schema_columns = getattr(schema_i, 'columns', None)
+
+        # If none of the test cases have any parameters, there are no columns 
+        # to count the test cases from.
+        if columns is None and not any(test_params):
+            schema_columns = None
+
+        if schema_columns:
+            if columns is None:
+                columns = _rows_to_columns(test_params)
+            columns = _eval_column_schema(schema_i, columns, n)
+
+        else:
+            if columns is not None:
+                test_params = _columns_to_rows(columns, n)
+                columns = None
+
+            test_params = [
+                    _eval_case_schema(schema_i, x, x_in)
+                    for x, x_in in zip(test_params, test_params_in)
+            ]
+
+    if columns is not None:
+        test_params = _columns_to_rows(columns, n)
+
+    return test_params
+
+def _eval_column_schema(schema, columns, n):
+    try:
+        columns = schema.columns(columns)
+
+        for key, column in columns.items():
+            if len(column) != n:
+                raise ValueError(f"expected {n} values for {key!r}, got {len(column)}")
+
+    except Exception as err1:
+        err2 = ConfigError(
+                schema=schema,
+                num_cases=n,
+                err=err1,
+        )
+        err2.brief = "test cases failed schema validation"
+        err2.info += lambda e: f"schema function applied to all {e.num_cases} test cases at once: {get_schema_name(e.schema)}"
+        err2.hints += "to find the test case that caused the error, use schema functions that process one test case at a time, e.g. `Namespace.eval` instead of `Namespace.eval_many`"
+        err2.blame += '{err}'
+        raise err2 from err1
+
+    return columns
+
+def _rows_to_columns(rows):
+    columns = {}
+
+    for i, row in enumerate(rows):
+        for key, value in row.items():
+            if key not in columns:
+                columns[key] = [MISSING] * len(rows)
+            columns[key][i] = value
+
+    return columns
+
+def _columns_to_rows(columns, n):
+    rows = [{} for _ in range(n)]
+
+    for key, column in columns.items():
+        for row, value in zip(rows, column):
+            if value is not MISSING:
+                row[key] = value
+
+    return rows
+
+def _is_vectorized(schema):
+    return any(
+            getattr(schema_i, 'vectorized', False)
+            for schema_i in always_iterable(schema)
+    )
+
 def _init_parametrize_args(test_params):
     # Convert the keys into a list to better define their order.  It's 
     # important that the values are arranged in the same order as the keys, 
     # otherwise they might not be matched correctly.  The sorting is just to 
     # make testing easier.
-    keys = sorted(_check_test_params_keys(test_params))
-    values = [
-            pytest.param(
-                *(x[k] for k in keys),
-                id=x.get('id', str(i)),
-                marks=x.get('marks', ()),
-            )
-            for i, x in enumerate(test_params, 1)
-    ]
+    #
+    # The keys of the first test case are assumed to be the keys of every test 
+    # case, and each test case is checked against them before any values are 
+    # extracted.  This only requires comparing key views, which is much faster 
+    # than building a set of keys for each test case.  If any test case 
+    # doesn't match, `_check_test_params_keys()` is used to work out exactly 
+    # which parameters are missing from which test case.
+    import pytest
+
+    if not test_params:
+        return [], []
+
+    if all(isinstance(x, CaseRow) for x in test_params):
+        return _init_parametrize_args_from_rows(test_params)
+
+    first_keys = test_params[0].keys()
+    key_set = first_keys - _SPECIAL_KEYS
+    keys = sorted(key_set)
+    num_keys = len(keys)
+    get_values = _make_values_getter(keys)
+    values = []
+
+    with timed('check keys'):
+        for x in test_params:
+            x_keys = x.keys()
+
+            if x_keys != first_keys:
+                num_special = ('id' in x) + ('marks' in x)
+                if len(x_keys) - num_special != num_keys or not x_keys >= key_set:
+                    _check_test_params_keys(test_params)
+
+    for i, x in enumerate(test_params, 1):
+        values.append(
+                pytest.param(
+                    *get_values(x),
+                    id=x['id'] if 'id' in x else str(i),
+                    marks=x.get('marks', ()),
+                )
+        )
+
     return keys, values
 
+def _init_parametrize_args_from_rows(test_params):
+    # Test cases with the same layout have the same keys in the same order, so 
+    # the keys only need to be checked (and the values getter only needs to be 
+    # created) once for each distinct layout.  Most of the time, there will 
+    # only be one or two layouts, e.g. test cases with and without ids.
+    import pytest
+
+    first_keys = test_params[0].layout.index.keys()
+    key_set = first_keys - _SPECIAL_KEYS
+    keys = sorted(key_set)
+    getters = {}
+    values = []
+
+    for i, x in enumerate(test_params, 1):
+        try:
+            get_values, i_id, i_marks = getters[x.layout]
+
+        except KeyError:
+            index = x.layout.index
+
+            with timed('check keys'):
+                if index.keys() - _SPECIAL_KEYS != key_set:
+                    _check_test_params_keys(test_params)
+
+            get_values = _make_values_getter([index[k] for k in keys])
+            i_id = index.get('id')
+            i_marks = index.get('marks')
+            getters[x.layout] = get_values, i_id, i_marks
+
+        data = x.data
+        values.append(
+                pytest.param(
+                    *get_values(data),
+                    id=str(i) if i_id is None else data[i_id],
+                    marks=() if i_marks is None else data[i_marks],
+                )
+        )
+
+    return keys, values
+
+def _make_values_getter(keys):
+    # `itemgetter()` only returns a tuple if there are multiple keys.
+    if len(keys) == 0:
+        return lambda x: ()
+    if len(keys) == 1:
+        return lambda x: (x[keys[0]],)
+    return itemgetter(*keys)
+
 def _check_test_params_keys(test_params):
     # We don't need to check if the keys match the arguments to the test 
     # function, because pytest will do that for us.  We just need to check that 
     # the keys are consistent with each other, and to raise a good error if 
     # they aren't.
-    special_keys = {'id', 'marks'}
-    test_param_keys = set.union(set(), *(set(x) for x in test_params)) - special_keys
+    test_param_keys = set.union(set(), *(set(x) for x in test_params)) - _SPECIAL_KEYS
 
     for case_params in test_params:
         missing = test_param_keys - set(case_params)
@@ -670,6 +1367,98 @@ def _format_case_params(case_params):
     except Exception:
         return repr(case_params)
 
+class LazyCase:
+    """
+    A single test case, for which the schema will be applied only when the 
+    parameters are first needed.
+    """
+
+    def __init__(self, params, case_params_in, schema, keys, context):
+        self.params = params
+        self.case_params_in = case_params_in
+        self.schema = schema
+        self.keys = keys
+        self.context = context
+        self._params_out = MISSING
+
+    def eval(self):
+        if self._params_out is MISSING:
+            with _add_context_info(self.context):
+                self._params_out = self._eval()
+
+        return self._params_out
+
+    def _eval(self):
+        params = self.params.copy()
+
+        if self.schema:
+            params = _eval_case_schema(self.schema, params, self.case_params_in)
+
+        if set(params) != self.keys:
+            err = ConfigError(
+                    params=self.case_params_in,
+                    expected=self.keys,
+                    actual=set(params),
+            )
+            err.brief = "schema returned unexpected parameters"
+            err.info += lambda e: (
+                    "test case:\n" +
+                    _format_case_params(e.params)
+            )
+            err.info += lambda e: (
+                    "expected parameters: " + ', '.join(sorted(map(str, e.expected)))
+            )
+            err.blame += lambda e: (
+                    "actual parameters: " + ', '.join(sorted(map(str, e.actual)))
+            )
+            err.hints += "when `lazy=True`, the parameter names must be known before the schema is applied"
+            err.hints += "give any custom schema functions that add or remove parameters an `output_keys` attribute, or don't use `lazy=True`"
+            raise err
+
+        return params
+
+class LazyParam:
+    """
+    A placeholder for the value of a single parameter, which will be replaced 
+    with the actual value just before the test is run.
+    """
+
+    def __init__(self, case, key):
+        self.case = case
+        self.key = key
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} {self.key!r}>'
+
+    def resolve(self):
+        return self.case.eval()[self.key]
+
+class LazyFixtureParam:
+    """
+    A placeholder for the parameters of a fixture, which will be replaced 
+    with the actual parameters just before the fixture is invoked.
+    """
+
+    def __init__(self, factory, values):
+        self.factory = factory
+        self.values = values
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}>'
+
+    def resolve(self):
+        return self.factory(*(resolve_lazy_param(x) for x in self.values))
+
+def resolve_lazy_param(value):
+    """
+    Return the actual value of the given parameter, applying the schema if 
+    necessary.  Values that aren't lazy placeholders are returned unchanged.
+    """
+    if isinstance(value, (LazyParam, LazyFixtureParam)):
+        return value.resolve()
+    else:
+        return value
+
 class Context:
 
     def __init__(self, path, key):
@@ -0,0 +1,589 @@
+"""
+Pytest hooks for configuring how parameters are loaded.
+
+This plugin is registered automatically (via the ``pytest11`` entry point) 
+whenever :mod:`parametrize_from_file` is installed.  None of the options it 
+provides change any behavior unless they are explicitly enabled.
+"""
+
+import os
+import pytest
+import shutil
+import tempfile
+from pathlib import Path
+from . import cache, loaders, parameters, prefetch, prefilter, profile, shard
+from .errors import ConfigError
+
+_PREV_DISK_CACHE = pytest.StashKey()
+_PREV_JSON_BACKEND = pytest.StashKey()
+_PREV_PREFILTER = pytest.StashKey()
+_PREV_SHARDER = pytest.StashKey()
+_PREV_RETENTION = pytest.StashKey()
+_PREV_PROFILER = pytest.StashKey()
+_PROFILER = pytest.StashKey()
+_XDIST_SHARE = pytest.StashKey()
+_XDIST_TMP_DIR = pytest.StashKey()
+
+def pytest_addoption(parser):
+    group = parser.getgroup('parametrize_from_file')
+    group.addoption(
+            '--pff-cache',
+            action='store_true',
+            default=None,
+            help="Cache loaded parameters on disk, so that files that haven't changed don't need to be parsed again in future sessions.",
+    )
+    group.addoption(
+            '--pff-cache-dir',
+            metavar='DIR',
+            help="The directory where loaded parameters will be cached.  Implies `--pff-cache`.  Default: a subdirectory of the pytest cache directory.",
+    )
+    group.addoption(
+            '--pff-bundle',
+            metavar='DIR',
+            help="Read loaded parameters from a bundle created by `python -m parametrize_from_file compile`.  Files that are missing from the bundle, or that have changed since it was created, are loaded as usual.  Takes precedence over `--pff-cache`.",
+    )
+    group.addoption(
+            '--pff-json-backend',
+            metavar='NAME',
+            help="The library to use when parsing JSON files: `orjson`, `simdjson`, `ujson`, `json`, or `auto`.  Default: `auto`, which picks the fastest library that is installed.",
+    )
+    group.addoption(
+            '--pff-prefetch',
+            choices=['threads', 'processes'],
+            help="Load parameter files in parallel before collecting any tests, using either a thread pool or a process pool.  Only the default parameter files for each test module (i.e. those with the same name as the module) are prefetched.",
+    )
+    group.addoption(
+            '--pff-prefetch-workers',
+            metavar='N',
+            type=int,
+            help="The maximum number of threads or processes to use when prefetching parameter files.  See `--pff-prefetch`.",
+    )
+    group.addoption(
+            '--pff-retention',
+            choices=['collection', 'consumed', 'keep'],
+            help="When to release loaded parameters from memory: `collection` releases every file once collection is finished; `consumed` releases each file as soon as every top-level key in it has been used, which lowers peak memory use but means that any file whose keys are used again will be loaded again; `keep` never releases anything, which is useful if the same tests will be collected again in the same process.  Default: `keep`.",
+    )
+    group.addoption(
+            '--pff-xdist-share',
+            action='store_true',
+            default=None,
+            help="When running tests with pytest-xdist, load each parameter file once in the controller process, and have the workers read the loaded parameters from a shared on-disk cache.",
+    )
+    group.addoption(
+            '--pff-prefilter',
+            action='store_true',
+            default=None,
+            help="Skip test cases that can't be selected by the node ids, `-k` expression, or `--deselect` options given on the command line, before applying any schemas.  Skipped test cases are not reported as deselected.",
+    )
+    group.addoption(
+            '--pff-shard-index',
+            metavar='N',
+            type=int,
+            help="Only collect the test cases that belong to the given shard, counting from 0.  Must be used with `--pff-shard-count`.  Default: the `PFF_SHARD_INDEX` environment variable, if set.",
+    )
+    group.addoption(
+            '--pff-shard-count',
+            metavar='N',
+            type=int,
+            help="The number of shards to split the test cases between.  Default: the `PFF_SHARD_COUNT` environment variable, if set.",
+    )
+    group.addoption(
+            '--pff-shard-durations',
+            metavar='FILE',
+            help="Balance the shards using the test durations recorded in the given file (see `--pff-record-durations`).  Default: the `PFF_SHARD_DURATIONS` environment variable, if set.",
+    )
+    group.addoption(
+            '--pff-record-durations',
+            metavar='FILE',
+            help="Record the duration of each test in the given file, for use with `--pff-shard-durations`.  Durations already in the file are kept, unless the same test was run again.",
+    )
+    group.addoption(
+            '--pff-profile',
+            action='store_true',
+            default=None,
+            help="Record how much time is spent loading each set of parameters, broken down by phase (e.g. loading, preprocessing, applying the schema) and by schema function, and print a summary once collection is finished.  When using pytest-xdist, the workers don't print the summary; use `--pff-profile-json` instead.",
+    )
+    group.addoption(
+            '--pff-profile-json',
+            metavar='FILE',
+            help="Write the profiling results to the given file, in JSON format.  Enables profiling, but doesn't print the summary unless `--pff-profile` is also given.  When using pytest-xdist, each worker writes a separate file, with the worker id added before the file extension.",
+    )
+    group.addoption(
+            '--pff-profile-memory',
+            action='store_true',
+            default=None,
+            help="Also record the peak amount of memory allocated while loading each set of parameters.  Implies `--pff-profile`.  This uses `tracemalloc`, which makes collection significantly slower, so the times recorded with this option are less accurate.  Requires python≥3.9.",
+    )
+    parser.addini(
+            'pff_cache',
+            type='bool',
+            default=False,
+            help="Cache loaded parameters on disk.  See `--pff-cache`.",
+    )
+    parser.addini(
+            'pff_cache_dir',
+            help="The directory where loaded parameters will be cached, relative to the root directory.  See `--pff-cache-dir`.",
+    )
+    parser.addini(
+            'pff_bundle',
+            help="Read loaded parameters from the given bundle, relative to the root directory.  See `--pff-bundle`.",
+    )
+    parser.addini(
+            'pff_json_backend',
+            default='auto',
+            help="The library to use when parsing JSON files.  See `--pff-json-backend`.",
+    )
+    parser.addini(
+            'pff_prefetch',
+            help="Load parameter files in parallel before collecting any tests, using either `threads` or `processes`.  See `--pff-prefetch`.",
+    )
+    parser.addini(
+            'pff_prefilter',
+            type='bool',
+            default=False,
+            help="Skip test cases that can't be selected by the command line.  See `--pff-prefilter`.",
+    )
+    parser.addini(
+            'pff_profile',
+            type='bool',
+            default=False,
+            help="Print a summary of how much time is spent loading parameters.  See `--pff-profile`.",
+    )
+    parser.addini(
+            'pff_retention',
+            help="When to release loaded parameters from memory.  See `--pff-retention`.",
+    )
+    parser.addini(
+            'pff_xdist_share',
+            type='bool',
+            default=False,
+            help="Share loaded parameters between pytest-xdist workers.  See `--pff-xdist-share`.",
+    )
+
+def pytest_configure(config):
+    config.stash[_PREV_DISK_CACHE] = cache.get_disk_cache()
+    config.stash[_PREV_JSON_BACKEND] = loaders.get_json_backend()
+    config.stash[_PREV_PREFILTER] = prefilter.get_prefilter()
+    config.stash[_PREV_SHARDER] = shard.get_sharder()
+    config.stash[_PREV_RETENTION] = cache.get_cache().retention
+    config.stash[_PREV_PROFILER] = profile.get_profiler()
+
+    cache.get_cache().retention = _get_retention(config)
+
+    if _get_profile(config) or config.getoption('pff_profile_json'):
+        config.stash[_PROFILER] = profile.enable_profiling(
+                memory=bool(config.getoption('pff_profile_memory')),
+        )
+
+    json_backend = \
+            config.getoption('pff_json_backend') or \
+            config.getini('pff_json_backend')
+
+    try:
+        loaders.set_json_backend(json_backend)
+    except ConfigError as err:
+        raise pytest.UsageError(str(err)) from None
+
+    bundle_dir = _get_bundle_dir(config)
+    cache_dir = _get_disk_cache_dir(config)
+
+    if bundle_dir:
+        cache.enable_disk_cache(bundle_dir, root=config.rootpath, readonly=True)
+    elif cache_dir:
+        cache.enable_disk_cache(cache_dir, root=config.rootpath)
+
+    # If this is an xdist worker, read parameters from the cache populated by 
+    # the controller.
+    workerinput = getattr(config, 'workerinput', {})
+    if 'pff_cache_dir' in workerinput:
+        cache.enable_disk_cache(
+                workerinput['pff_cache_dir'],
+                root=config.rootpath,
+                readonly=workerinput['pff_cache_readonly'],
+        )
+
+    if _get_prefilter(config):
+        prefilter.enable_prefilter(
+                args=config.args,
+                keyword=config.getoption('keyword'),
+                deselect=config.getoption('deselect') or [],
+                invocation_dir=config.invocation_params.dir,
+                rootdir=config.rootpath,
+        )
+
+    config.addinivalue_line(
+            'markers',
+            f"{shard.SHARD_MARK}(name): the name that a test case loaded by "
+            "parametrize_from_file was sharded by.  Added automatically.",
+    )
+
+    shard_args = _get_shard_args(config)
+    durations_path = config.getoption('pff_record_durations')
+
+    # When recording durations without sharding, use a single shard.  This 
+    # keeps every test case, but names them the same way that they'll be 
+    # named when they are sharded.
+    if durations_path and not shard_args:
+        shard_args = 0, 1, None
+
+    if shard_args:
+        index, count, durations = shard_args
+        try:
+            shard.enable_sharding(
+                    index,
+                    count,
+                    durations=durations,
+                    rootdir=config.rootpath,
+            )
+        except ValueError as err:
+            raise pytest.UsageError(f"pff_shard: {err}") from None
+
+    # Durations are only recorded by the controller when using xdist, since 
+    # the controller receives the reports from all the workers.
+    if durations_path and not hasattr(config, 'workerinput'):
+        config.pluginmanager.register(
+                DurationRecorder(durations_path),
+                'parametrize_from_file_durations',
+        )
+
+    if _is_xdist_controller(config) and _get_xdist_share(config):
+        _share_with_xdist_workers(config)
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    disk_cache = cache.get_disk_cache()
+    if node.config.stash.get(_XDIST_SHARE, False) and disk_cache:
+        node.workerinput['pff_cache_dir'] = str(disk_cache.cache_dir)
+        node.workerinput['pff_cache_readonly'] = disk_cache.readonly
+
+def pytest_collection(session):
+    executor = _get_prefetch_executor(session.config)
+    if executor:
+        _prefetch(session.config, executor)
+
+def pytest_collection_modifyitems(session, config, items):
+    # Test cases loaded by `parametrize` are sharded as they're loaded, but 
+    # the parameters of fixtures can only be sharded once it's known which 
+    # tests use them, i.e. now.  Shard these items by node id.
+    sharder = shard.get_sharder()
+    if not sharder:
+        return
+
+    fixture_items = [
+            x for x in items
+            if not x.get_closest_marker(shard.SHARD_MARK)
+            and _has_fixture_params(x)
+    ]
+    if not fixture_items:
+        return
+
+    selected = sharder.select_names([x.nodeid for x in fixture_items])
+    deselected = {
+            id(x) for x, keep in zip(fixture_items, selected)
+            if not keep
+    }
+    if not deselected:
+        return
+
+    config.hook.pytest_deselected(
+            items=[x for x in items if id(x) in deselected],
+    )
+    items[:] = [x for x in items if id(x) not in deselected]
+
+def pytest_collection_finish(session):
+    # Every decorator has loaded its parameters by now.  Anything that loads 
+    # parameters while the tests are running (e.g. `load_parameters`) will 
+    # have to read the file again, which is why this is opt-in.
+    if cache.get_cache().retention == 'collection':
+        cache.get_cache().release()
+
+    profiler = session.config.stash.get(_PROFILER, None)
+    if profiler:
+        _report_profile(session.config, profiler)
+
+    _report_bundle_misses(session.config)
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_fixture_setup(fixturedef, request):
+    # Apply the schema for test cases loaded with `lazy=True`.  Depending on 
+    # the version of pytest, parameters given directly to test functions are 
+    # either handled here (via pseudo-fixtures) or in `pytest_pyfunc_call`.
+    param = getattr(request, 'param', None)
+    if param is not None:
+        request.param = parameters.resolve_lazy_param(param)
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    funcargs = pyfuncitem.funcargs
+    for key, value in funcargs.items():
+        funcargs[key] = parameters.resolve_lazy_param(value)
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    # Attach the name that each test case was sharded by to its report, so 
+    # that `DurationRecorder` can use it.  The reports are sent from xdist 
+    # workers to the controller along with any extra attributes.
+    outcome = yield
+
+    if item.config.getoption('pff_record_durations'):
+        mark = item.get_closest_marker(shard.SHARD_MARK)
+        if mark:
+            outcome.get_result().pff_shard_name = mark.args[0]
+
+def pytest_report_header(config):
+    yml = loaders.get_yml_backend()
+    json = loaders.get_json_backend()
+    return f"parametrize_from_file: yaml={yml}, json={json}"
+
+def pytest_unconfigure(config):
+    # Restore whatever settings were active before this session started, 
+    # which matters when pytest is being run in-process (e.g. by `pytester`).
+    prev_disk_cache = config.stash.get(_PREV_DISK_CACHE, None)
+    prev_json_backend = config.stash.get(_PREV_JSON_BACKEND, None)
+
+    if prev_disk_cache:
+        cache.enable_disk_cache(
+                prev_disk_cache.cache_dir,
+                root=prev_disk_cache.root,
+                readonly=prev_disk_cache.readonly,
+        )
+    else:
+        cache.disable_disk_cache()
+
+    if prev_json_backend:
+        loaders.set_json_backend(prev_json_backend)
+
+    prev_prefilter = config.stash.get(_PREV_PREFILTER, None)
+    if prev_prefilter:
+        prefilter.enable_prefilter(
+                args=prev_prefilter.args,
+                keyword=prev_prefilter.keyword,
+                deselect=prev_prefilter.deselect,
+                invocation_dir=prev_prefilter.invocation_dir,
+                rootdir=prev_prefilter.rootdir,
+        )
+    else:
+        prefilter.disable_prefilter()
+
+    prev_sharder = config.stash.get(_PREV_SHARDER, None)
+    if prev_sharder:
+        shard.enable_sharding(
+                prev_sharder.index,
+                prev_sharder.count,
+                durations=prev_sharder.durations,
+                rootdir=prev_sharder.rootdir,
+        )
+    else:
+        shard.disable_sharding()
+
+    prev_retention = config.stash.get(_PREV_RETENTION, None)
+    if prev_retention:
+        cache.get_cache().retention = prev_retention
+
+    prev_profiler = config.stash.get(_PREV_PROFILER, None)
+    if prev_profiler:
+        profile.enable_profiling(memory=prev_profiler.memory)
+    else:
+        profile.disable_profiling()
+
+    tmp_dir = config.stash.get(_XDIST_TMP_DIR, None)
+    if tmp_dir:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+def _get_bundle_dir(config):
+    cli_dir = config.getoption('pff_bundle')
+    ini_dir = config.getini('pff_bundle')
+
+    if cli_dir:
+        bundle_dir = Path(cli_dir).resolve()
+    elif ini_dir:
+        bundle_dir = config.rootpath / ini_dir
+    else:
+        return None
+
+    if not bundle_dir.is_dir():
+        raise pytest.UsageError(f"pff_bundle: directory not found: {bundle_dir}")
+
+    return bundle_dir
+
+def _get_disk_cache_dir(config):
+    cli_dir = config.getoption('pff_cache_dir')
+    if cli_dir:
+        return Path(cli_dir).resolve()
+
+    ini_dir = config.getini('pff_cache_dir')
+    enabled = config.getoption('pff_cache') or config.getini('pff_cache')
+
+    if ini_dir:
+        return config.rootpath / ini_dir
+    if not enabled:
+        return None
+    if getattr(config, 'cache', None) is None:
+        return config.rootpath / '.pytest_cache' / 'd' / 'parametrize_from_file'
+
+    return config.cache.mkdir('parametrize_from_file')
+
+def _get_prefetch_executor(config):
+    executor = \
+            config.getoption('pff_prefetch') or \
+            config.getini('pff_prefetch')
+
+    if executor and executor not in ('threads', 'processes'):
+        raise pytest.UsageError(f"pff_prefetch: expected 'threads' or 'processes', not {executor!r}")
+
+    return executor
+
+def _get_retention(config):
+    retention = \
+            config.getoption('pff_retention') or \
+            config.getini('pff_retention') or \
+            'keep'
+
+    if retention not in ('collection', 'consumed', 'keep'):
+        raise pytest.UsageError(f"pff_retention: expected 'collection', 'consumed', or 'keep', not {retention!r}")
+
+    return retention
+
+def _get_profile(config):
+    return \
+            config.getoption('pff_profile') or \
+            config.getoption('pff_profile_memory') or \
+            config.getini('pff_profile')
+
+def _get_profile_json_path(config):
+    path = config.getoption('pff_profile_json')
+    if not path:
+        return None
+
+    path = Path(path).resolve()
+
+    # Each xdist worker collects the tests separately, so each needs to write 
+    # its own results.
+    workerinput = getattr(config, 'workerinput', {})
+    if 'workerid' in workerinput:
+        path = path.with_name(f'{path.stem}.{workerinput["workerid"]}{path.suffix}')
+
+    return path
+
+def _report_profile(config, profiler):
+    if _get_profile(config):
+        reporter = config.pluginmanager.get_plugin('terminalreporter')
+        if reporter:
+            reporter.write_sep('-', "parametrize_from_file profile")
+            for line in profiler.format_report(relative_to=config.rootpath):
+                reporter.write_line(line)
+
+    json_path = _get_profile_json_path(config)
+    if json_path:
+        profiler.save_json(json_path, relative_to=config.rootpath)
+
+def _report_bundle_misses(config):
+    # Parameter files missing from the bundle are silently parsed as usual, 
+    # so the only symptom is that collection is slower than expected.  Explain 
+    # why, if asked.
+    if not _get_bundle_dir(config):
+        return
+    if not (_get_profile(config) or config.getoption('verbose') > 0):
+        return
+
+    bundle = cache.get_disk_cache()
+    reporter = config.pluginmanager.get_plugin('terminalreporter')
+
+    if bundle and bundle.misses and reporter:
+        reporter.write_sep('-', "parametrize_from_file bundle misses")
+        for path, reason in sorted(bundle.misses.items()):
+            reporter.write_line(f"{path}: {reason}")
+
+def _prefetch(config, executor):
+    param_paths = prefetch.find_param_paths(
+            [arg.split('::')[0] for arg in config.args],
+            python_files=config.getini('python_files'),
+            norecursedirs=config.getini('norecursedirs'),
+    )
+    prefetch.prefetch(
+            param_paths,
+            executor=executor,
+            max_workers=config.getoption('pff_prefetch_workers'),
+    )
+
+def _is_xdist_controller(config):
+    if hasattr(config, 'workerinput'):
+        return False
+
+    return getattr(config.option, 'dist', 'no') != 'no'
+
+def _get_xdist_share(config):
+    return config.getoption('pff_xdist_share') or config.getini('pff_xdist_share')
+
+def _get_prefilter(config):
+    return config.getoption('pff_prefilter') or config.getini('pff_prefilter')
+
+def _get_shard_args(config):
+    index = _get_option_or_env(config, 'pff_shard_index', 'PFF_SHARD_INDEX')
+    count = _get_option_or_env(config, 'pff_shard_count', 'PFF_SHARD_COUNT')
+    durations_path = _get_option_or_env(config, 'pff_shard_durations', 'PFF_SHARD_DURATIONS')
+
+    if index is None and count is None:
+        return None
+    if index is None or count is None:
+        raise pytest.UsageError("pff_shard: must specify both the shard index and the shard count")
+
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise pytest.UsageError(f"pff_shard: expected integers, got index={index!r}, count={count!r}") from None
+
+    durations = shard.load_durations(durations_path) if durations_path else None
+    return index, count, durations
+
+def _has_fixture_params(item):
+    callspec = getattr(item, 'callspec', None)
+    if not callspec:
+        return False
+
+    return any(
+            parameters.is_fixture_param(x)
+            for x in callspec.params.values()
+    )
+
+def _get_option_or_env(config, option, env_var):
+    value = config.getoption(option)
+    if value is None:
+        value = os.environ.get(env_var) or None
+    return value
+
+def _share_with_xdist_workers(config):
+    # The controller doesn't collect any tests itself, so it would otherwise 
+    # never load any parameters.  Instead, load every parameter file that the 
+    # workers will need into a disk cache, and tell the workers where to find 
+    # it (see `pytest_configure_node`).  If the user already has a persistent 
+    # disk cache, use that.  Otherwise, make a temporary one.
+    if not cache.get_disk_cache():
+        tmp_dir = Path(tempfile.mkdtemp(prefix='pff-xdist-'))
+        config.stash[_XDIST_TMP_DIR] = tmp_dir
+        cache.enable_disk_cache(tmp_dir, root=config.rootpath)
+
+    config.stash[_XDIST_SHARE] = True
+    _prefetch(config, _get_prefetch_executor(config) or 'threads')
+
+class DurationRecorder:
+    """
+    Record how long each test takes, including setup and teardown, so that 
+    the durations can be used to balance shards in future sessions.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.durations = {}
+
+    def pytest_runtest_logreport(self, report):
+        # Use the name that the test case was sharded by, if it has one.  This 
+        # is different from the node id if the test is parametrized more than 
+        # once.  Otherwise, use the node id, which is what fixture parameters 
+        # are sharded by.
+        name = getattr(report, 'pff_shard_name', None) or report.nodeid
+        self.durations[name] = self.durations.get(name, 0) + report.duration
+
+    def pytest_sessionfinish(self, session):
+        if self.durations:
+            shard.save_durations(self.path, self.durations)
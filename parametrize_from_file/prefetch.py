@@ -0,0 +1,179 @@
+"""
+Load parameter files in parallel, before the test modules that use them are 
+imported.
+
+Normally, each parameter file is loaded when the decorator that refers to it 
+is evaluated, i.e. while the corresponding test module is being imported. 
+Since pytest imports test modules one at a time, this means that parameter 
+files are also loaded one at a time.  The functions in this module instead 
+find the parameter files that will (probably) be needed ahead of time, and 
+load them all in parallel.  The results are stored in the same caches that 
+the decorators use, so the decorators themselves don't need to do anything 
+different.
+"""
+
+import os
+from .cache import get_cache, get_disk_cache
+from .loaders import get_loaders
+from .utils import MISSING
+from fnmatch import fnmatch
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+def find_param_paths(
+        paths,
+        *,
+        python_files=('test_*.py',),
+        norecursedirs=(),
+        loaders=None,
+):
+    """
+    Find the default parameter files for the test modules in the given paths.
+
+    Arguments:
+        paths (list):
+            The files and directories to search for test modules.
+
+        python_files (list):
+            Glob patterns matching the names of test modules.
+
+        norecursedirs (list):
+            Glob patterns matching the names of directories that shouldn't be 
+            searched.
+
+        loaders (dict):
+            The loaders to consider, keyed by file suffix.  By default, the 
+            globally registered loaders are used.
+
+    Returns:
+        A dictionary mapping each parameter file to the loader that should be 
+        used to load it.  Test modules with zero or multiple candidate 
+        parameter files are skipped, since in both cases the decorator would 
+        fail to pick a file.
+    """
+    if loaders is None:
+        loaders = get_loaders()
+
+    param_paths = {}
+
+    def add_test_module(path):
+        candidates = [
+                (path.with_suffix(suffix), loader)
+                for suffix, loader in loaders.items()
+        ]
+        candidates = [
+                (p, loader)
+                for p, loader in candidates
+                if p.is_file()
+        ]
+        if len(candidates) == 1:
+            param_path, loader = candidates[0]
+            param_paths[param_path] = loader
+
+    def is_test_module(name):
+        return any(fnmatch(name, pattern) for pattern in python_files)
+
+    def is_excluded_dir(name):
+        return any(fnmatch(name, pattern) for pattern in norecursedirs)
+
+    for path in paths:
+        path = Path(os.path.abspath(path))
+
+        if path.is_file():
+            if path.suffix == '.py':
+                add_test_module(path)
+            continue
+
+        for dir, subdirs, files in os.walk(path):
+            subdirs[:] = sorted(x for x in subdirs if not is_excluded_dir(x))
+
+            for name in sorted(files):
+                if is_test_module(name):
+                    add_test_module(Path(dir) / name)
+
+    return param_paths
+
+def prefetch(param_paths, *, executor='threads', max_workers=None):
+    """
+    Load the given parameter files in parallel, and cache the results.
+
+    Arguments:
+        param_paths (dict):
+            A dictionary mapping each parameter file to the loader that 
+            should be used to load it, e.g. as returned by 
+            `find_param_paths`.
+
+        executor (str):
+            Either ``'threads'`` or ``'processes'``.  Threads have very little 
+            overhead, but only help if the loaders release the GIL (e.g. 
+            because they spend much of their time reading files).  Processes 
+            have more overhead, since the loaded parameters need to be pickled, 
+            but allow any loader to run in parallel.  Note that only loaders 
+            defined at the top-level of a module can be used with processes, 
+            and that `LazySuiteParams` objects are fully parsed before being 
+            sent back from the worker processes.
+
+        max_workers (int):
+            The maximum number of threads or processes to use.  By default, 
+            this is chosen by :mod:`concurrent.futures`.
+
+    Returns:
+        The number of files that were loaded.
+
+    Any errors encountered while loading files are ignored.  The files in 
+    question will simply be loaded again by the decorators that need them, and 
+    the errors will be reported then.
+    """
+    suite_cache = get_cache()
+    disk_cache = get_disk_cache()
+    pending = {}
+
+    # Don't bother starting any workers for files that are already cached.
+    for param_path, loader in param_paths.items():
+        try:
+            stat = os.stat(param_path)
+        except OSError:
+            continue
+
+        if suite_cache.get(loader, param_path, stat) is not MISSING:
+            continue
+
+        if disk_cache:
+            suite_params = disk_cache.get(loader, param_path, stat)
+            if suite_params is not MISSING:
+                suite_cache.put(loader, param_path, suite_params, stat)
+                continue
+
+        pending[param_path] = loader
+
+    if not pending:
+        return 0
+
+    executors = {
+            'threads': ThreadPoolExecutor,
+            'processes': ProcessPoolExecutor,
+    }
+    num_loaded = 0
+
+    with executors[executor](max_workers=max_workers) as pool:
+        futures = {
+                pool.submit(_load, loader, param_path): (loader, param_path)
+                for param_path, loader in pending.items()
+        }
+        for future, (loader, param_path) in futures.items():
+            try:
+                stat, suite_params = future.result()
+            except Exception:
+                continue
+
+            suite_cache.put(loader, param_path, suite_params, stat)
+            if disk_cache:
+                disk_cache.put(loader, param_path, suite_params, stat)
+
+            num_loaded += 1
+
+    return num_loaded
+
+def _load(loader, param_path):
+    stat = os.stat(param_path)
+    return stat, loader(param_path)
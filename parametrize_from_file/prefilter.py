@@ -0,0 +1,279 @@
+"""
+Skip test cases that can't possibly be selected by the command line.
+
+Normally, pytest only decides which tests to run after every test has been 
+collected.  That means that the schema must be applied to every test case, 
+even if only one will actually be run (e.g. ``pytest test_foo.py::test_bar[x]`` 
+or ``pytest -k x``).  The functions in this module allow the decorators to 
+compare the ids of the test cases against the node ids, ``-k`` expression, and 
+``--deselect`` options given on the command line, and to skip any test cases 
+that pytest would deselect anyways.
+
+The test cases are filtered before they're given to the schema, but after 
+they've been preprocessed (because the preprocess function can add and remove 
+test cases, and change their ids).  Any test case that might be selected is 
+kept, so this is always safe as long as the ids of the test cases loaded by a 
+decorator are the only thing that distinguishes them.
+
+Note that pytest matches ``-k`` identifiers against many things that aren't 
+known when the decorator is applied, e.g. the names of parent directories, 
+marks applied to the module or class, and extra keywords added by plugins.  
+Any identifier that doesn't match something known about the test case could 
+therefore still match something else, so the ``-k`` expression can only be 
+used to skip test cases that it rules out by name, e.g. ``-k 'not slow'``.
+"""
+
+import os
+from pathlib import Path
+
+_PREFILTER = None
+
+def enable_prefilter(*, args=(), keyword=None, deselect=(), invocation_dir='.', rootdir='.'):
+    """
+    Skip test cases that can't be selected by the given command-line options.
+
+    Arguments:
+        args (list):
+            The files, directories, and node ids given on the command line. 
+            Relative paths are interpreted relative to *invocation_dir*.
+
+        keyword (str):
+            The ``-k`` expression.
+
+        deselect (list):
+            The node id prefixes given by ``--deselect``.  Relative paths are 
+            interpreted relative to *rootdir*.
+    """
+    global _PREFILTER
+    _PREFILTER = Prefilter(
+            args=args,
+            keyword=keyword,
+            deselect=deselect,
+            invocation_dir=invocation_dir,
+            rootdir=rootdir,
+    )
+    return _PREFILTER
+
+def disable_prefilter():
+    """
+    Stop skipping test cases based on the command-line options.
+    """
+    global _PREFILTER
+    _PREFILTER = None
+
+def get_prefilter():
+    """
+    Return the active `Prefilter`, or None if test cases aren't being filtered.
+    """
+    return _PREFILTER
+
+class Prefilter:
+
+    def __init__(self, *, args=(), keyword=None, deselect=(), invocation_dir='.', rootdir='.'):
+        self.args = args
+        self.keyword = keyword
+        self.deselect = deselect
+        self.invocation_dir = invocation_dir
+        self.rootdir = rootdir
+
+        self._node_ids = [_parse_node_id(x, invocation_dir) for x in args]
+        self._deselect = [_parse_node_id(x, rootdir) for x in deselect]
+        self._keyword = _compile_keyword(keyword)
+
+    def make_predicate(self, test_path, test_func, case_ids):
+        """
+        Return a function that decides whether a test case could be selected, 
+        or None if every test case could be.
+
+        Arguments:
+            test_path (pathlib.Path):
+                The file containing the test.
+
+            test_func:
+                The decorated test function (or class).
+
+            case_ids (list):
+                The ids of every test case loaded for the test, in order. 
+                Test cases that don't have an id can be represented by None, 
+                in which case they will always be kept.
+
+        Returns:
+            A function with the signature ``(case_id, marks) -> bool``.
+        """
+        test_path = Path(os.path.abspath(test_path))
+        qualname = test_func.__qualname__.split('.')
+        is_class = isinstance(test_func, type)
+
+        predicates = []
+
+        brackets = self._find_selected_brackets(test_path, qualname, is_class)
+        if brackets is not None:
+            def is_selected(case_id, marks):
+                return any(case_id in x for x in brackets)
+
+            predicates.append(is_selected)
+
+        deselected = self._find_deselected_ids(test_path, qualname, is_class, case_ids)
+        if deselected:
+            def is_not_deselected(case_id, marks):
+                return case_id not in deselected
+
+            predicates.append(is_not_deselected)
+
+        if self._keyword and not is_class:
+            known_names = [test_path.name, *qualname]
+
+            def matches_keyword(case_id, marks):
+                names = [*known_names, case_id, *marks]
+                return _may_match(self._keyword, names)
+
+            predicates.append(matches_keyword)
+
+        if not predicates:
+            return None
+
+        def predicate(case_id, marks):
+            if case_id is None or _is_escaped_by_pytest(case_id):
+                return True
+            return all(f(case_id, marks) for f in predicates)
+
+        return predicate
+
+    def _find_selected_brackets(self, test_path, qualname, is_class):
+        # Return the ids given in square brackets by any node ids that refer 
+        # to this test, or None if the test might be selected without any 
+        # such restriction.
+        brackets = []
+
+        for path, names, bracket in self._node_ids:
+            if not _is_same_or_parent(path, test_path):
+                continue
+
+            match = _match_names(names, qualname, is_class)
+            if match is None:
+                continue
+            if not match or bracket is None:
+                return None
+
+            brackets.append(bracket)
+
+        # If none of the arguments refer to this test, it must have been 
+        # collected for some other reason (e.g. `--pyargs`), so don't 
+        # second-guess it.
+        return brackets or None
+
+    def _find_deselected_ids(self, test_path, qualname, is_class, case_ids):
+        deselected = set()
+
+        for path, names, bracket in self._deselect:
+            if path != test_path or bracket is None:
+                continue
+            if not _match_names(names, qualname, is_class):
+                continue
+
+            # Pytest adds suffixes to ids that aren't unique, so only unique 
+            # ids can be matched exactly.
+            if case_ids.count(bracket) == 1:
+                deselected.add(bracket)
+
+        return deselected
+
+def _is_escaped_by_pytest(case_id):
+    """
+    Return true if pytest would change the given id before matching it 
+    against the command line.
+
+    Pytest escapes any non-ASCII or non-printable characters in ids (e.g. 
+    ``é`` becomes ``\\xe9``), along with backslashes, and matches node ids and 
+    ``-k`` expressions against the escaped ids.  Rather than depend on exactly 
+    how this is done, test cases with such ids are always kept.
+    """
+    return not (case_id.isascii() and case_id.isprintable()) or '\\' in case_id
+
+def _parse_node_id(node_id, base_dir):
+    path, *names = node_id.split('::')
+    bracket = None
+
+    if names and names[-1].endswith(']') and '[' in names[-1]:
+        name, bracket = names[-1][:-1].split('[', 1)
+        names[-1] = name
+
+    path = Path(os.path.abspath(Path(base_dir) / path))
+    return path, names, bracket
+
+def _is_same_or_parent(path, test_path):
+    return path == test_path or path in test_path.parents
+
+def _match_names(names, qualname, is_class):
+    """
+    Compare the names from a node id to the qualified name of a decorated 
+    test function or class.
+
+    Returns:
+        - None if the node id refers to a different test.
+        - False if the node id refers to something that contains the test, so 
+          it doesn't restrict which test cases can be selected.
+        - True if the node id refers to the test itself.
+    """
+    n = len(names)
+
+    if n < len(qualname):
+        return False if names == qualname[:n] else None
+
+    if names == qualname:
+        return not is_class
+
+    if is_class and n == len(qualname) + 1 and names[:-1] == qualname:
+        return True
+
+    return None
+
+def _compile_keyword(keyword):
+    if not keyword:
+        return None
+
+    # This is a private pytest API, so be careful not to depend on it.
+    try:
+        from _pytest.mark.expression import Expression
+        return Expression.compile(keyword)
+    except Exception:
+        return None
+
+def _may_match(expr, names, max_unknowns=8):
+    """
+    Return True unless the given ``-k`` expression definitely doesn't match 
+    the test case with the given names.
+
+    Identifiers that match any of the names are true.  Any other identifiers 
+    could match something this function doesn't know about (e.g. the name of 
+    a parent directory, or a mark applied to the module), so every possible 
+    value is tried for each of them.  If there are more than *max_unknowns* 
+    such identifiers, the test case is simply assumed to match.
+    """
+    names = [x.lower() for x in names]
+
+    class Unknown(Exception):
+        pass
+
+    def evaluate(assumptions):
+        def matcher(ident, **kwargs):
+            ident = ident.lower()
+            if any(ident in x for x in names):
+                return True
+            if ident in assumptions:
+                return assumptions[ident]
+            raise Unknown(ident)
+
+        try:
+            return expr.evaluate(matcher)
+        except Unknown as err:
+            if len(assumptions) >= max_unknowns:
+                return True
+
+            ident, = err.args
+            return (
+                    evaluate({**assumptions, ident: True}) or
+                    evaluate({**assumptions, ident: False})
+            )
+
+    return evaluate({})
@@ -0,0 +1,465 @@
+"""
+Measure how much time the decorators spend on each step of loading 
+parameters.
+
+Profiling is disabled by default, in which case the only overhead is a check 
+for whether or not it's enabled.  When enabled, the time spent in each of the 
+following phases is recorded:
+
+- ``'resolve module'``: Finding the file that defines the test function.
+- ``'resolve path'``: Finding the parameter file.
+- ``'load'``: Getting the parameters for the test from the cache, or 
+  otherwise reading the parameter file.
+- ``'loader'``: Parsing the parameter file, i.e. the loader itself.
+- ``'preprocess'``: Calling the *preprocess* function.
+- ``'filter'``: Dropping test cases that won't be run.
+- ``'schema'``: Applying the schema to each test case.
+- ``'check keys'``: Checking that every test case has the same parameters.
+- ``'params'``: Creating the `pytest.param` objects.
+
+The times for each phase exclude any time spent in nested phases (e.g. the 
+time for ``'load'`` doesn't include the time for ``'loader'``), so the times 
+for every phase add up to the total.  The phases from ``'load'`` onwards are 
+also recorded separately for each time parameters are loaded (i.e. for each 
+decorator), along with the time spent in each schema function, the number of 
+test cases, and optionally the peak memory usage.
+"""
+
+from time import perf_counter
+from contextlib import contextmanager, nullcontext
+from collections import namedtuple
+from .utils import always_iterable
+
+_PROFILER = None
+
+PhaseStats = namedtuple('PhaseStats', ['seconds', 'calls'])
+
+def enable_profiling(*, memory=False):
+    """
+    Start recording how much time is spent in each phase.
+
+    Arguments:
+        memory (bool):
+            If true, also record the peak amount of memory allocated while 
+            loading each set of parameters.  This uses `tracemalloc`, which 
+            makes everything else significantly slower.
+    """
+    global _PROFILER
+    disable_profiling()
+    _PROFILER = Profiler(memory=memory)
+    return _PROFILER
+
+def disable_profiling():
+    """
+    Stop recording how much time is spent in each phase.
+    """
+    global _PROFILER
+    if _PROFILER is not None:
+        _PROFILER.close()
+    _PROFILER = None
+
+def get_profiler():
+    """
+    Return the active `Profiler`, or None if profiling is disabled.
+    """
+    return _PROFILER
+
+def timed(phase):
+    """
+    Return a context manager that records the time spent in the given phase, 
+    or does nothing if profiling is disabled.
+    """
+    if _PROFILER is None:
+        return nullcontext()
+    return _PROFILER.timed(phase)
+
+def recording(path, key, test=None):
+    """
+    Return a context manager that attributes any phases that happen within it 
+    to a new `ProfileRecord`, or does nothing if profiling is disabled.
+
+    The context manager returns the new record, or None.
+    """
+    if _PROFILER is None:
+        return nullcontext()
+    return _PROFILER.recording(path, key, test)
+
+def time_schema(schema):
+    """
+    Wrap each function in the given schema, such that the time spent in each 
+    will be recorded.  If profiling is disabled, the schema is returned 
+    unchanged.
+    """
+    if _PROFILER is None:
+        return schema
+    return [_PROFILER.time_schema_func(f) for f in always_iterable(schema)]
+
+def get_schema_name(f):
+    """
+    Return a short name for the given schema function, e.g. ``'cast'`` for 
+    the functions created by `cast`.
+    """
+    kinds = getattr(f, '_fused_kinds', None)
+    if kinds:
+        return '+'.join(kinds)
+
+    name = getattr(f, '__qualname__', None) or type(f).__qualname__
+    suffix = '.<locals>.schema'
+    return name[:-len(suffix)] if name.endswith(suffix) else name
+
+class ProfileRecord:
+    """
+    The time spent loading a single set of parameters, e.g. for one decorator.
+
+    Attributes:
+        path:
+            The parameter file(s) that were loaded.
+
+        key:
+            The top-level key(s) that were loaded.
+
+        test (str):
+            The qualified name of the decorated test, or None if the 
+            parameters were loaded by `load_parameters`.
+
+        cases (int):
+            The number of test cases that were ultimately created.
+
+        seconds (float):
+            The total time spent loading the parameters.
+
+        phases (dict):
+            The time spent in each phase, in seconds.
+
+        schema (dict):
+            The time spent in each schema function, in seconds.  Schema 
+            functions that were combined into one (see `_fuse_schema`) are 
+            named after each of the original functions, e.g. 
+            ``'rename+cast'``.
+
+        peak_bytes (int):
+            The most memory that was allocated at any one time while loading 
+            the parameters, or None if memory usage wasn't recorded.
+    """
+
+    def __init__(self, path, key, test=None):
+        self.path = path
+        self.key = key
+        self.test = test
+        self.cases = 0
+        self.seconds = 0
+        self.phases = {}
+        self.schema = {}
+        self.peak_bytes = None
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} path={self.path!r} key={self.key!r} seconds={self.seconds:.6f}>'
+
+class Profiler:
+
+    def __init__(self, *, memory=False):
+        self.memory = memory
+        self.records = []
+        self._seconds = {}
+        self._calls = {}
+        self._schema = {}
+        self._stack = []
+        self._record = None
+        self._started_tracemalloc = False
+
+        if memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} phases={len(self._seconds)} records={len(self.records)}>'
+
+    def close(self):
+        """
+        Stop tracing memory allocations, if this profiler started doing so.
+        """
+        if self._started_tracemalloc:
+            import tracemalloc
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextmanager
+    def timed(self, phase):
+        """
+        Record the time spent in the body of the ``with`` block, excluding any 
+        time spent in nested phases.
+        """
+        frame = [0]
+        self._stack.append(frame)
+        start = perf_counter()
+
+        try:
+            yield
+
+        finally:
+            elapsed = perf_counter() - start
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][0] += elapsed
+
+            self.record(phase, elapsed - frame[0])
+
+    @contextmanager
+    def recording(self, path, key, test=None):
+        """
+        Attribute any phases that happen in the body of the ``with`` block to 
+        a new `ProfileRecord`.
+        """
+        record = ProfileRecord(path, key, test)
+        prev_record, self._record = self._record, record
+
+        # Peak memory usage can only be measured for each record if the peak 
+        # can be reset, which requires python≥3.9.
+        measure_memory = False
+
+        if self.memory:
+            import tracemalloc
+            measure_memory = (
+                    tracemalloc.is_tracing() and
+                    hasattr(tracemalloc, 'reset_peak')
+            )
+
+        if measure_memory:
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+
+        start = perf_counter()
+
+        try:
+            yield record
+
+        finally:
+            record.seconds = perf_counter() - start
+
+            if measure_memory:
+                _, peak = tracemalloc.get_traced_memory()
+                record.peak_bytes = peak - baseline
+
+            self._record = prev_record
+            self.records.append(record)
+
+    def record(self, phase, seconds):
+        """
+        Add the given amount of time to the given phase.
+        """
+        self._seconds[phase] = self._seconds.get(phase, 0) + seconds
+        self._calls[phase] = self._calls.get(phase, 0) + 1
+
+        if self._record:
+            phases = self._record.phases
+            phases[phase] = phases.get(phase, 0) + seconds
+
+    def time_schema_func(self, f):
+        """
+        Wrap the given schema function, such that the time spent in it will be 
+        recorded.
+        """
+        name = get_schema_name(f)
+
+        def timed_schema(params):
+            start = perf_counter()
+            try:
+                return f(params)
+            finally:
+                self.record_schema(name, perf_counter() - start)
+
+        return timed_schema
+
+    def record_schema(self, name, seconds):
+        """
+        Add the given amount of time to the given schema function.
+        """
+        self._schema[name] = self._schema.get(name, 0) + seconds
+
+        if self._record:
+            schema = self._record.schema
+            schema[name] = schema.get(name, 0) + seconds
+
+    def stats(self):
+        """
+        Return a dictionary mapping each phase to a `PhaseStats` tuple, in the 
+        order that the phases were first recorded.
+        """
+        return {
+                k: PhaseStats(self._seconds[k], self._calls[k])
+                for k in self._seconds
+        }
+
+    def schema_stats(self):
+        """
+        Return a dictionary mapping the name of each schema function to the 
+        total time spent in it, in seconds.
+        """
+        return dict(self._schema)
+
+    def format_report(self, *, relative_to=None, limit=20):
+        """
+        Return a human-readable summary of the profiling results, as a list of 
+        lines.
+
+        Arguments:
+            relative_to (pathlib.Path):
+                Show the paths to parameter files relative to this directory.
+
+            limit (int):
+                The maximum number of records to show.  The records that took 
+                the longest are shown first.
+        """
+        lines = []
+        phases = [
+                'load', 'loader', 'preprocess', 'filter', 'schema',
+                'check keys', 'params',
+        ]
+
+        total = sum(self._seconds.values())
+        lines.append(f"parameters loaded: {len(self.records)}, total time: {_format_ms(total)}")
+        lines.append('')
+
+        # Time spent in each phase:
+        rows = [['phase', 'calls', 'time']]
+        rows += [
+                [k, str(v.calls), _format_ms(v.seconds)]
+                for k, v in self.stats().items()
+        ]
+        lines += _format_table(rows, num_labels=1)
+        lines.append('')
+
+        # Time spent loading each set of parameters:
+        records = sorted(self.records, key=lambda x: x.seconds, reverse=True)
+        show_memory = any(x.peak_bytes is not None for x in records)
+
+        header = ['file', 'key', 'cases', *phases, 'total']
+        if show_memory:
+            header.append('peak')
+
+        rows = [header]
+
+        for record in records[:limit]:
+            row = [
+                    _format_paths(record.path, relative_to),
+                    _format_keys(record.key),
+                    str(record.cases),
+                    *(_format_ms(record.phases.get(k, 0)) for k in phases),
+                    _format_ms(record.seconds),
+            ]
+            if show_memory:
+                row.append(_format_bytes(record.peak_bytes))
+
+            rows.append(row)
+
+        lines += _format_table(rows, num_labels=2)
+
+        if len(records) > limit:
+            lines.append(f"({len(records) - limit} more not shown)")
+
+        # Time spent in each schema function:
+        if self._schema:
+            lines.append('')
+            rows = [['schema function', 'time']]
+            rows += [
+                    [k, _format_ms(v)]
+                    for k, v in sorted(
+                        self._schema.items(),
+                        key=lambda x: x[1],
+                        reverse=True,
+                    )
+            ]
+            lines += _format_table(rows, num_labels=1)
+
+        return lines
+
+    def to_json(self, *, relative_to=None):
+        """
+        Return the profiling results as a JSON-serializable dictionary.
+
+        All times are in seconds.  See `format_report` for a description of 
+        the arguments.
+        """
+        return {
+                'phases': {
+                    k: {'seconds': v.seconds, 'calls': v.calls}
+                    for k, v in self.stats().items()
+                },
+                'schema': self.schema_stats(),
+                'records': [
+                    {
+                        'path': [
+                            _relative_path(p, relative_to)
+                            for p in always_iterable(x.path)
+                        ],
+                        'key': list(always_iterable(x.key)),
+                        'test': x.test,
+                        'cases': x.cases,
+                        'seconds': x.seconds,
+                        'phases': x.phases,
+                        'schema': x.schema,
+                        'peak_bytes': x.peak_bytes,
+                    }
+                    for x in self.records
+                ],
+        }
+
+    def save_json(self, path, *, relative_to=None):
+        """
+        Write the profiling results to the given path, in JSON format.
+        """
+        import json
+
+        with open(path, 'w') as f:
+            json.dump(self.to_json(relative_to=relative_to), f, indent=2)
+
+def _format_table(rows, num_labels):
+    # The first *num_labels* columns are left-aligned, and the rest (which are 
+    # all numbers) are right-aligned.
+    widths = [max(len(x) for x in col) for col in zip(*rows)]
+    lines = []
+
+    for i, row in enumerate(rows):
+        cells = [
+                cell.ljust(width) if j < num_labels else cell.rjust(width)
+                for j, (cell, width) in enumerate(zip(row, widths))
+        ]
+        lines.append('  '.join(cells).rstrip())
+
+        if i == 0:
+            lines.append('  '.join('-' * w for w in widths))
+
+    return lines
+
+def _format_ms(seconds):
+    return f'{1000 * seconds:.1f}ms'
+
+def _format_bytes(nbytes):
+    if nbytes is None:
+        return '-'
+    return f'{nbytes / 2**20:.1f}MB'
+
+def _format_paths(path, relative_to):
+    return ', '.join(
+            _relative_path(p, relative_to)
+            for p in always_iterable(path)
+    )
+
+def _format_keys(key):
+    return ', '.join(str(k) for k in always_iterable(key))
+
+def _relative_path(path, relative_to):
+    path = str(path)
+
+    if relative_to:
+        from os.path import relpath
+        try:
+            rel_path = relpath(path, relative_to)
+        except ValueError:
+            return path
+        if not rel_path.startswith('..'):
+            return rel_path
+
+    return path
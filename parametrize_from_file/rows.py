@@ -0,0 +1,132 @@
+"""
+A compact representation for test cases that have already been processed, 
+i.e. that are just waiting to be given to pytest.
+
+Parameter files often contain thousands of test cases, each with the same 
+handful of parameters.  Storing each test case as a dictionary means storing 
+a separate hash table for each one.  A `CaseRow` instead stores just a tuple 
+of values, along with a `Layout` that is shared by every test case with the 
+same parameter names (in the same order).  Strings that appear many times in 
+the same set of test cases are also stored only once.
+"""
+
+import sys
+from collections.abc import Mapping
+
+# Layouts are only shared to save memory, so nothing goes wrong if the same 
+# names end up with more than one layout.  This makes it safe to forget every 
+# layout when there are too many, which keeps long-running processes (that 
+# might see any number of different parameter names) from leaking memory.
+_LAYOUTS = {}
+_MAX_LAYOUTS = 1024
+
+def compact_cases(test_params):
+    """
+    Convert each of the given test cases into a `CaseRow`.
+
+    Arguments:
+        test_params (list):
+            A list of dictionaries, one for each test case.
+
+    Returns:
+        A list of `CaseRow` objects, in the same order.
+    """
+    strings = {}
+    return [compact_case(x, strings) for x in test_params]
+
+def compact_case(case_params, strings=None):
+    """
+    Convert the given test case into a `CaseRow`.
+
+    Arguments:
+        case_params (dict):
+            The parameters for a single test case.
+
+        strings (dict):
+            A table of strings that have already been seen, used to avoid 
+            storing multiple copies of the same string.  This table should be 
+            shared between related test cases.
+    """
+    if strings is None:
+        strings = {}
+
+    values = tuple(
+            strings.setdefault(x, x) if type(x) is str else x
+            for x in case_params.values()
+    )
+    return CaseRow(get_layout(tuple(case_params)), values)
+
+def get_layout(keys):
+    """
+    Return the `Layout` for the given parameter names, creating it if 
+    necessary.  The same object is always returned for the same names.
+    """
+    try:
+        return _LAYOUTS[keys]
+    except KeyError:
+        pass
+
+    if len(_LAYOUTS) >= _MAX_LAYOUTS:
+        clear_layouts()
+
+    keys = tuple(sys.intern(x) if type(x) is str else x for x in keys)
+    layout = _LAYOUTS[keys] = Layout(keys)
+    return layout
+
+def clear_layouts():
+    """
+    Forget every `Layout` created so far.
+
+    Existing `CaseRow` objects are unaffected, but new rows won't share 
+    layouts with them.
+    """
+    _LAYOUTS.clear()
+
+class Layout:
+    """
+    The names of the parameters in a `CaseRow`, and their positions.
+    """
+    __slots__ = ('keys', 'index')
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.index = {k: i for i, k in enumerate(keys)}
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.keys!r})'
+
+class CaseRow(Mapping):
+    """
+    A read-only mapping from parameter names to values, with the names stored 
+    in a shared `Layout` and the values stored in a tuple.
+    """
+    __slots__ = ('layout', 'data')
+
+    def __init__(self, layout, data):
+        self.layout = layout
+        self.data = data
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({dict(self)!r})'
+
+    def __getitem__(self, key):
+        return self.data[self.layout.index[key]]
+
+    def __contains__(self, key):
+        return key in self.layout.index
+
+    def __iter__(self):
+        return iter(self.layout.keys)
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key, default=None):
+        i = self.layout.index.get(key)
+        return default if i is None else self.data[i]
+
+    def replace(self, **kwargs):
+        """
+        Return a copy of this row with the given parameters added or changed.
+        """
+        return compact_case({**self, **kwargs})
@@ -1,8 +1,8 @@
 import re
 from .errors import ConfigError
-from unittest.mock import MagicMock
-from more_itertools import always_iterable
+from .utils import MISSING, always_iterable
 from contextlib import nullcontext
+from functools import wraps
 
 def cast(**funcs):
     """
@@ -18,7 +18,12 @@ def cast(**funcs):
             becoming the input to the next.
 
     Any keys that are missing will be silently ignored; this makes it easier to 
-    provide default values with `defaults`.  Note that if you use `defaults` 
+    provide default values with `defaults`.
+
+    Functions that evaluate many values at once, namely `Namespace.eval_many`, 
+    are given the value of the parameter for every test case in a single call.  
+    This can be much faster than evaluating each test case separately, e.g. if 
+    the same expressions are repeated many times.  Note that if you use `defaults` 
     before `cast`, then the default values will be transformed as if they had 
     been read from the parameter file.  In contrast, if you use `cast` before 
     `defaults`, then the default values will be used directly.
@@ -43,10 +48,27 @@ def cast(**funcs):
         for key, func in funcs.items():
             if key in params:
                 for f in always_iterable(func):
-                    params[key] = f(params[key])
+                    if _is_vectorized(f):
+                        params[key] = _get_column_func(f)([params[key]])[0]
+                    else:
+                        params[key] = f(params[key])
 
         return params
 
+    def schema_columns(columns):
+        for key, func in funcs.items():
+            if key in columns:
+                for f in always_iterable(func):
+                    columns[key] = _apply_to_column(f, columns[key])
+
+        return columns
+
+    # Only process whole columns at once if asked to, because doing so changes 
+    # the order in which the schema functions are called.
+    schema.columns = schema_columns
+    schema.vectorized = any(_is_vectorized(f) for f in _iter_funcs(funcs))
+    schema._fusable = 'cast', funcs
+
     return schema
 
 def defaults(**defaults):
@@ -68,7 +90,27 @@ def defaults(**defaults):
         >>> f({'b': 1})
         {'a': 0, 'b': 1}
     """
-    return lambda params: {**defaults, **params}
+    def schema(params):
+        return {**defaults, **params}
+
+    def schema_columns(columns):
+        n = _count_rows(columns)
+
+        for key, default in defaults.items():
+            if key not in columns:
+                columns[key] = [default] * n
+            else:
+                columns[key] = [
+                        default if x is MISSING else x
+                        for x in columns[key]
+                ]
+
+        return columns
+
+    schema.columns = schema_columns
+    schema.output_keys = lambda keys: keys | set(defaults)
+    schema._fusable = 'defaults', defaults
+    return schema
 
 def rename(names=None, /, **kwarg_names):
     """
@@ -97,10 +139,87 @@ def rename(names=None, /, **kwarg_names):
             **(names or {}),
             **kwarg_names,
     }
-    return lambda params: {
-            names.get(k, k): v
-            for k, v in params.items()
-    }
+    def schema(params):
+        return {
+                names.get(k, k): v
+                for k, v in params.items()
+        }
+
+    def schema_columns(columns):
+        new_names = [names.get(k, k) for k in columns]
+
+        # If two parameters would end up with the same name, which one wins 
+        # depends on the order of the keys in each test case.  Fall back to 
+        # renaming each test case individually to get this right.
+        if len(set(new_names)) != len(new_names):
+            from .parameters import _rows_to_columns, _columns_to_rows
+            rows = _columns_to_rows(columns, _count_rows(columns))
+            return _rows_to_columns([schema(x) for x in rows])
+
+        return dict(zip(new_names, columns.values()))
+
+    schema.columns = schema_columns
+    schema.output_keys = lambda keys: {names.get(k, k) for k in keys}
+    schema._fusable = 'rename', names
+    return schema
+
+def vectorized(f):
+    """
+    Mark the given function as one that processes every test case at once.
+
+    Arguments:
+        f (callable):
+            A function that expects to be given whole columns of parameters, 
+            rather than individual test cases.  When used as a schema 
+            function, *f* will be given a dictionary mapping each parameter 
+            name to a sequence with one value for each test case, and must 
+            return a dictionary of the same form.  When used with `cast`, *f* 
+            will be given a list of all the values of a single parameter, and 
+            must return a sequence of the same length.  In either case, the 
+            returned sequences can be lists, NumPy arrays, or any other 
+            sequence type.
+
+    Returns:
+        A schema function that can still be applied to a single test case, 
+        like any other schema function.
+
+    When all of the test cases for a test are being loaded, any schema that 
+    includes a vectorized function (either directly or via `cast`) is applied 
+    one whole column at a time.  `cast`, `defaults`, and `rename` all have 
+    column-oriented implementations, so they don't interrupt this process.  
+    Other schema functions (e.g. `error_or`) are applied to each test case 
+    separately, as usual.  For tests with many test cases, this can avoid a 
+    lot of per-test-case overhead.
+
+    Test cases that lack a parameter are represented by 
+    ``parametrize_from_file.MISSING`` in that parameter's column.  Vectorized 
+    functions should generally leave these values alone.  Note that if a 
+    vectorized function raises an exception, the resulting error message 
+    can't say which test case caused it.
+
+    Example:
+
+        >>> @vectorized
+        ... def double(columns):
+        ...     return {k: [2 * x for x in v] for k, v in columns.items()}
+        >>> double.columns({'a': [1, 2, 3]})
+        {'a': [2, 4, 6]}
+        >>> double({'a': 1})
+        {'a': 2}
+    """
+
+    @wraps(f)
+    def schema(params):
+        columns = f({k: [v] for k, v in params.items()})
+        return {
+                k: column[0]
+                for k, column in columns.items()
+                if column[0] is not MISSING
+        }
+
+    schema.columns = f
+    schema.vectorized = True
+    return schema
 
 def error(exc_spec, *, globals=None):
     """\
@@ -213,7 +332,7 @@ def error(exc_spec, *, globals=None):
 
     return err
 
-def error_or(*expected, globals=None, param='error', mock_factory=MagicMock):
+def error_or(*expected, globals=None, param='error', mock_factory=None):
     """
     Return a schema function that will expect to be given either an error or 
     the specified set of expected values.
@@ -234,7 +353,8 @@ def error_or(*expected, globals=None, param='error', mock_factory=MagicMock):
 
         mock_factory (Callable):
             A no-argument callable that can be used to create mock expected 
-            values when an exception is expected.
+            values when an exception is expected.  The default is 
+            |MagicMock|.
 
     The purpose of this schema is to make it easier to test functions that can 
     raise exceptions.  Towards this end, this schema understands two sets of 
@@ -303,6 +423,10 @@ def error_or(*expected, globals=None, param='error', mock_factory=MagicMock):
 
     error_key = param
 
+    if mock_factory is None:
+        from unittest.mock import MagicMock
+        mock_factory = MagicMock
+
     def schema(params):
         if error_key not in params:
             params[error_key] = ExpectSuccess()
@@ -328,6 +452,7 @@ def error_or(*expected, globals=None, param='error', mock_factory=MagicMock):
 
         return params
 
+    schema.output_keys = lambda keys: keys | {error_key, *expected}
     return schema
 
 class ExpectSuccess(nullcontext):
@@ -418,3 +543,149 @@ class ExpectError:
 
         return True
 
+def _fuse_schema(schema):
+    """
+    Combine adjacent `cast`, `defaults`, and `rename` schema functions into 
+    single functions that each make just one pass over a test case.
+
+    The combined functions are generated and compiled on the fly, so that they 
+    can avoid creating intermediate dictionaries and looking up the functions 
+    for each parameter every time they're called.  The results are identical 
+    to applying the original schema functions one after another.  Any other 
+    schema functions are left as they are.
+    """
+    fused = []
+    ops = []
+
+    def flush():
+        if ops:
+            fused.append(_compile_fused_schema(ops))
+            ops.clear()
+
+    for schema_i in always_iterable(schema):
+        op = getattr(schema_i, '_fusable', None)
+
+        if op is None:
+            flush()
+            fused.append(schema_i)
+            continue
+
+        # Each fused function can only rename, then add defaults, then cast 
+        # (in that order).  This is by far the most common order, and it's 
+        # easy to reproduce the exact behavior of the separate functions.
+        if ops and not _can_fuse(ops[-1], op):
+            flush()
+
+        ops.append(op)
+
+    flush()
+    return fused
+
+def _can_fuse(prev_op, next_op):
+    order = {'rename': 0, 'defaults': 1, 'cast': 2}
+    prev_kind, next_kind = prev_op[0], next_op[0]
+
+    if next_kind == 'rename':
+        return False
+
+    return order[prev_kind] <= order[next_kind]
+
+def _compile_fused_schema(ops):
+    names = None
+    defaults = {}
+    casts = []
+
+    for kind, arg in ops:
+        if kind == 'rename':
+            names = arg
+        if kind == 'defaults':
+            defaults = {**arg, **defaults}
+        if kind == 'cast':
+            casts.append(arg)
+
+    env = {'_names': names, '_defaults': defaults}
+    lines = ['def fused_schema(params):']
+
+    if names is not None and defaults:
+        lines += [
+                '    p = _defaults.copy()',
+                '    for k, v in params.items():',
+                '        p[_names.get(k, k)] = v',
+        ]
+    elif names is not None:
+        lines += ['    p = {_names.get(k, k): v for k, v in params.items()}']
+    elif defaults:
+        lines += ['    p = {**_defaults, **params}']
+    else:
+        lines += ['    p = params']
+
+    for funcs in casts:
+        for key, func in funcs.items():
+            expr = f'p[{key!r}]'
+
+            for f in always_iterable(func):
+                name = f'_f{len(env)}'
+                env[name] = _get_row_func(f)
+                expr = f'{name}({expr})'
+
+            lines += [
+                    f'    if {key!r} in p:',
+                    f'        p[{key!r}] = {expr}',
+            ]
+
+    lines += ['    return p']
+
+    exec('\n'.join(lines), env)
+
+    # Remember what went into the function, so that it can be identified when 
+    # profiling.
+    fused_schema = env['fused_schema']
+    fused_schema._fused_kinds = [kind for kind, _ in ops]
+    return fused_schema
+
+def _is_vectorized(f):
+    return _get_column_func(f) is not None
+
+def _get_column_func(f):
+    from .namespace import Namespace
+
+    if getattr(f, '__func__', None) is Namespace.eval_many:
+        return f
+    if getattr(f, 'vectorized', False):
+        return f.columns
+
+    return None
+
+def _get_row_func(f):
+    if not _is_vectorized(f):
+        return f
+
+    g = _get_column_func(f)
+    return lambda x: g([x])[0]
+
+def _count_rows(columns):
+    # If there are no columns, there's no way to tell how many test cases 
+    # there are.  The caller will fall back to processing one row at a time.
+    for column in columns.values():
+        return len(column)
+    raise ValueError("can't count rows without any columns")
+
+def _iter_funcs(funcs):
+    for func in funcs.values():
+        yield from always_iterable(func)
+
+def _apply_to_column(f, column):
+    i_present = [i for i, x in enumerate(column) if x is not MISSING]
+    values = [column[i] for i in i_present]
+
+    if _is_vectorized(f):
+        values = _get_column_func(f)(values)
+    else:
+        values = [f(x) for x in values]
+
+    column = list(column)
+    for i, value in zip(i_present, values):
+        column[i] = value
+
+    return column
+
@@ -0,0 +1,187 @@
+"""
+Split the test cases between multiple machines, as they're loaded.
+
+Each machine is given the same shard count and a different shard index, and 
+each machine keeps only the test cases that belong to its own shard.  Because 
+this happens while the parameters are being loaded, the test cases that belong 
+to other shards are never given to the schema, and never become pytest items.
+
+By default, test cases are assigned to shards by hashing their names, so each 
+machine can make the same assignments without communicating.  If the duration 
+of each test case has been recorded, the recorded test cases are instead 
+assigned greedily, longest first, to whichever shard has the least total work 
+so far.  This assignment is worked out up front from the whole list of 
+recorded durations, so it doesn't depend on which tests are collected, or in 
+what order.  Test cases without a recorded duration are still assigned by 
+hashing their names.
+
+Only one set of parameters can be sharded this way for each test.  If a test 
+is decorated more than once, only the first (i.e. innermost) decorator shards 
+its test cases, and each test case it keeps is given a ``pff_shard`` mark that 
+records its name.  The items that get their parameters from `fixture` are 
+instead sharded after collection, by node id, since the combinations of 
+fixture parameters aren't known until then.
+"""
+
+import json
+import zlib
+from pathlib import Path
+
+_SHARDER = None
+
+# The name of the mark given to each test case that was sharded as it was 
+# loaded.  The mark's only argument is the name of the test case.
+SHARD_MARK = 'pff_shard'
+
+def enable_sharding(index, count, *, durations=None, rootdir=None):
+    """
+    Keep only the test cases that belong to the given shard.
+
+    Arguments:
+        index (int):
+            Which shard to keep, counting from 0.
+
+        count (int):
+            The total number of shards.
+
+        durations (dict):
+            The duration (in seconds) of each test case, keyed by name (see 
+            `get_case_name`).  If given, the test cases with recorded 
+            durations are assigned to shards such that each shard should take 
+            about the same amount of time.  Test cases without a recorded 
+            duration are assigned by hashing their names.
+
+        rootdir (pathlib.Path):
+            The directory that the names of the test cases are relative to.  
+            This should be the pytest root directory.
+    """
+    global _SHARDER
+    _SHARDER = Sharder(index, count, durations=durations, rootdir=rootdir)
+    return _SHARDER
+
+def disable_sharding():
+    """
+    Stop splitting test cases between shards.
+    """
+    global _SHARDER
+    _SHARDER = None
+
+def get_sharder():
+    """
+    Return the active `Sharder`, or None if test cases aren't being sharded.
+    """
+    return _SHARDER
+
+class Sharder:
+
+    def __init__(self, index, count, *, durations=None, rootdir=None):
+        if count < 1:
+            raise ValueError(f"shard count must be positive, not {count}")
+        if not 0 <= index < count:
+            raise ValueError(f"shard index must be between 0 and {count - 1}, not {index}")
+
+        self.index = index
+        self.count = count
+        self.durations = durations or {}
+        self.rootdir = rootdir
+        self._assignments = _assign_shards(self.durations, count)
+
+    def select(self, test_path, test_func, case_ids):
+        """
+        Decide which of the given test cases belong to this shard.
+
+        Arguments:
+            test_path (pathlib.Path):
+                The file containing the test.
+
+            test_func:
+                The decorated test function (or class).
+
+            case_ids (list):
+                The ids of every test case loaded for the test, in order.
+
+        Returns:
+            A list of booleans, one for each test case.
+        """
+        return self.select_names([
+                get_case_name(test_path, test_func, x, self.rootdir)
+                for x in case_ids
+        ])
+
+    def select_names(self, names):
+        """
+        Decide which of the given names (see `get_case_name`) belong to this 
+        shard.
+
+        Any name can be used, not just the names of test cases loaded by 
+        :mod:`parametrize_from_file`.  In particular, node ids are used for 
+        the tests that get their parameters from fixtures.
+        """
+        return [self._get_shard(x) == self.index for x in names]
+
+    def _get_shard(self, name):
+        try:
+            return self._assignments[name]
+        except KeyError:
+            return _hash(name) % self.count
+
+def get_case_name(test_path, test_func, case_id, rootdir=None):
+    """
+    Return a name that identifies the given test case, and that doesn't depend 
+    on where the project is checked out.
+
+    This is the same as the pytest node id for the test case, i.e. the path to 
+    the test file is relative to *rootdir*.  If *rootdir* isn't given, or the 
+    test file isn't inside it, the path is used as given.  Durations are 
+    recorded using the same names.
+    """
+    if rootdir:
+        try:
+            test_path = Path(test_path).relative_to(rootdir)
+        except ValueError:
+            pass
+
+    qualname = test_func.__qualname__.replace('.', '::')
+    return f'{Path(test_path).as_posix()}::{qualname}[{case_id}]'
+
+def load_durations(path):
+    """
+    Load the durations recorded by `save_durations`, or return an empty 
+    dictionary if the file doesn't exist.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_durations(path, durations):
+    """
+    Record the given durations, merging them with any durations that were 
+    previously recorded in the same file.
+    """
+    durations = {**load_durations(path), **durations}
+
+    with open(path, 'w') as f:
+        json.dump(durations, f, indent=2, sort_keys=True)
+
+def _assign_shards(durations, count):
+    # Assign the longest test cases first, which gives better balance.  Break 
+    # ties by hash and then by name, so that the order doesn't depend on 
+    # anything that could vary between machines (e.g. the order of the keys 
+    # in the durations file).
+    names = sorted(durations, key=lambda x: (-durations[x], _hash(x), x))
+    loads = [0] * count
+    assignments = {}
+
+    for name in names:
+        shard = min(range(count), key=lambda j: loads[j])
+        loads[shard] += durations[name]
+        assignments[name] = shard
+
+    return assignments
+
+def _hash(name):
+    # The built-in `hash()` is randomized for each process, so it can't be 
+    # used to make the same decisions on different machines.
+    return zlib.crc32(name.encode('utf8'))
@@ -1,5 +1,9 @@
+import gc
+from contextlib import contextmanager
 from collections.abc import Iterable
 
+MISSING = object()
+
 def is_iterable(obj, not_iterable=(str, bytes)):
     if not isinstance(obj, Iterable):
         return False
@@ -7,4 +11,38 @@ def is_iterable(obj, not_iterable=(str, bytes)):
         return False
     return True
 
+def always_iterable(obj):
+    """
+    Same as `more_itertools.always_iterable`, which is called while the 
+    package is being imported, but is slow to import itself.
+    """
+    if obj is None:
+        return iter(())
+    if isinstance(obj, (str, bytes)):
+        return iter((obj,))
+
+    try:
+        return iter(obj)
+    except TypeError:
+        return iter((obj,))
+
+@contextmanager
+def gc_paused():
+    """
+    Disable the cyclic garbage collector within the context.
+
+    Parsers create lots of container objects without creating any reference 
+    cycles, so the collections triggered by all those allocations are pure 
+    overhead.  For large files, this overhead can exceed the time spent 
+    actually parsing.
+    """
+    if not gc.isenabled():
+        yield
+        return
+
+    gc.disable()
+    try:
+        yield
+    finally:
+        gc.enable()
 
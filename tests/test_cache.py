@@ -0,0 +1,499 @@
+import os
+import sys
+import pytest
+import parametrize_from_file.cache as pffc
+from unittest.mock import Mock
+
+pytest_plugins = ['pytester']
+
+def load_upper(path):
+    return {'text': path.read_text().upper()}
+
+def load_nested(path):
+    def upper(x):
+        return x.upper()
+    return {'text': upper(path.read_text()), 'keys': {'a', 'b', 'c'}}
+
+def test_disk_cache(tmp_path):
+    cache = pffc.DiskCache(tmp_path / 'cache')
+    p = tmp_path / 'params.txt'
+    p.write_text('a')
+    stat = os.stat(p)
+
+    assert cache.get(load_upper, p, stat) is pffc.MISSING
+
+    cache.put(load_upper, p, {'text': 'A'}, stat)
+    assert cache.get(load_upper, p, stat) == {'text': 'A'}
+
+    # Different loaders get different entries:
+    assert cache.get(test_disk_cache, p, stat) is pffc.MISSING
+
+def test_disk_cache_touch(tmp_path):
+    cache = pffc.DiskCache(tmp_path / 'cache')
+    p = tmp_path / 'params.txt'
+    p.write_text('a')
+    stat_1 = os.stat(p)
+    cache.put(load_upper, p, {'text': 'A'}, stat_1)
+
+    # Same contents, different modification time:
+    os.utime(p, ns=(stat_1.st_atime_ns, stat_1.st_mtime_ns + 10**9))
+    stat_2 = os.stat(p)
+    assert cache.get(load_upper, p, stat_2) == {'text': 'A'}
+
+    # Different contents, same size:
+    p.write_text('b')
+    stat_3 = os.stat(p)
+    assert cache.get(load_upper, p, stat_3) is pffc.MISSING
+
+def test_disk_cache_root(tmp_path):
+    p1 = tmp_path / 'a' / 'params.txt'
+    p2 = tmp_path / 'b' / 'params.txt'
+
+    for p in [p1, p2]:
+        p.parent.mkdir()
+        p.write_text('a')
+
+    cache_1 = pffc.DiskCache(tmp_path / 'cache', root=p1.parent)
+    cache_1.put(load_upper, p1, {'text': 'A'}, os.stat(p1))
+
+    cache_2 = pffc.DiskCache(tmp_path / 'cache', root=p2.parent)
+    assert cache_2.get(load_upper, p2, os.stat(p2)) == {'text': 'A'}
+
+def test_disk_cache_readonly(tmp_path):
+    cache = pffc.DiskCache(tmp_path / 'cache', readonly=True)
+    p = tmp_path / 'params.txt'
+    p.write_text('a')
+    stat = os.stat(p)
+
+    cache.put(load_upper, p, {'text': 'A'}, stat)
+    assert cache.get(load_upper, p, stat) is pffc.MISSING
+    assert not (tmp_path / 'cache').exists()
+
+@pytest.mark.parametrize(
+        'loader', [
+            lambda p: None,
+            Mock(),
+        ],
+)
+def test_disk_cache_unstable_loader(loader, tmp_path):
+    cache = pffc.DiskCache(tmp_path / 'cache')
+    p = tmp_path / 'params.txt'
+    p.write_text('a')
+    stat = os.stat(p)
+
+    cache.put(loader, p, {'text': 'A'}, stat)
+    assert cache.get(loader, p, stat) is pffc.MISSING
+
+def test_disk_cache_loader_version(tmp_path, monkeypatch):
+    import types
+    import parametrize_from_file as pff
+    from parametrize_from_file.loaders import _LazyLoader
+
+    cache = pffc.DiskCache(tmp_path / 'cache')
+    p = tmp_path / 'params.txt'
+    p.write_text('a')
+    stat = os.stat(p)
+
+    def get(loader):
+        pffc._get_loader_version.cache_clear()
+        return cache.get(loader, p, stat)
+
+    # Different code, same name:
+    def load_lower(path):
+        return {'text': path.read_text().lower()}
+
+    load_lower.__qualname__ = load_upper.__qualname__
+    cache.put(load_upper, p, {'text': 'A'}, stat)
+    assert get(load_upper) == {'text': 'A'}
+    assert get(load_lower) is pffc.MISSING
+
+    # Different version of this package:
+    monkeypatch.setattr(pff, '__version__', '0.0.0')
+    assert get(load_upper) is pffc.MISSING
+    monkeypatch.undo()
+    assert get(load_upper) == {'text': 'A'}
+
+    # Different version of the library:
+    lib = types.ModuleType('pff_fake_lib')
+    lib.__version__ = '1.0'
+    monkeypatch.setitem(sys.modules, 'pff_fake_lib', lib)
+    loader = _LazyLoader(load_upper, 'pff_fake_lib.load')
+
+    cache.put(loader, p, {'text': 'A'}, stat)
+    assert get(loader) == {'text': 'A'}
+
+    lib.__version__ = '2.0'
+    assert get(loader) is pffc.MISSING
+
+    cache.put(loader, p, {'text': 'A'}, stat)
+    assert get(loader) == {'text': 'A'}
+
+def test_disk_cache_loader_version_relocated(tmp_path):
+    # The same loader should have the same version if it's installed 
+    # somewhere else, e.g. when a bundle is made on a different machine.
+    import types
+
+    def relocate(code):
+        return code.replace(
+                co_filename='/somewhere/else.py',
+                co_firstlineno=code.co_firstlineno + 100,
+                co_consts=tuple(
+                    relocate(x) if isinstance(x, types.CodeType) else x
+                    for x in code.co_consts
+                ),
+        )
+
+    load_relocated = types.FunctionType(
+            relocate(load_nested.__code__),
+            load_nested.__globals__,
+    )
+    load_relocated.__qualname__ = load_nested.__qualname__
+
+    cache = pffc.DiskCache(tmp_path / 'cache')
+    p = tmp_path / 'params.txt'
+    p.write_text('a')
+    stat = os.stat(p)
+
+    cache.put(load_nested, p, {'text': 'A'}, stat)
+    pffc._get_loader_version.cache_clear()
+    assert cache.get(load_relocated, p, stat) == {'text': 'A'}
+
+def test_disk_cache_unpicklable(tmp_path):
+    cache = pffc.DiskCache(tmp_path / 'cache')
+    p = tmp_path / 'params.txt'
+    p.write_text('a')
+    stat = os.stat(p)
+
+    cache.put(load_upper, p, {'text': lambda: 'A'}, stat)
+    assert cache.get(load_upper, p, stat) is pffc.MISSING
+    assert list((tmp_path / 'cache').iterdir()) == []
+
+def test_disk_cache_corrupt(tmp_path):
+    cache = pffc.DiskCache(tmp_path / 'cache')
+    p = tmp_path / 'params.txt'
+    p.write_text('a')
+    stat = os.stat(p)
+
+    cache.put(load_upper, p, {'text': 'A'}, stat)
+    for entry in (tmp_path / 'cache').iterdir():
+        entry.write_bytes(b'corrupt')
+
+    assert cache.get(load_upper, p, stat) is pffc.MISSING
+
+def test_pff_cache(testdir):
+    testdir.makeconftest("""\
+            import parametrize_from_file as pff
+
+            def load_logged(path):
+                with open('load_log', 'a') as f:
+                    f.write(path.name + '\\n')
+                return {'test_eq': [{'a': 'x', 'b': 'x'}]}
+
+            pff.add_loader('.xyz', load_logged)
+    """)
+    testdir.makefile('.xyz', test_file='')
+    testdir.makefile('.py', test_file="""\
+            import parametrize_from_file
+
+            @parametrize_from_file
+            def test_eq(a, b):
+                assert a == b
+    """)
+    log = testdir.tmpdir / 'load_log'
+
+    result = testdir.runpytest_subprocess('--pff-cache')
+    result.assert_outcomes(passed=1)
+    assert log.read_text('utf8') == 'test_file.xyz\n'
+
+    result = testdir.runpytest_subprocess('--pff-cache')
+    result.assert_outcomes(passed=1)
+    assert log.read_text('utf8') == 'test_file.xyz\n'
+
+    # Without the cache, the file is always loaded.
+    result = testdir.runpytest_subprocess()
+    result.assert_outcomes(passed=1)
+    assert log.read_text('utf8') == 'test_file.xyz\n' * 2
+
+def test_pff_cache_dir(testdir):
+    testdir.makefile('.nt', test_file="""\
+            test_eq:
+              -
+                a: x
+                b: x
+    """)
+    testdir.makefile('.py', test_file="""\
+            import parametrize_from_file
+
+            @parametrize_from_file
+            def test_eq(a, b):
+                assert a == b
+    """)
+    cache_dir = testdir.tmpdir / 'pff_cache'
+
+    result = testdir.runpytest('--pff-cache-dir', str(cache_dir))
+    result.assert_outcomes(passed=1)
+    assert len(cache_dir.listdir()) == 1
+
+    assert pffc.get_disk_cache() is None
+
+@pytest.mark.parametrize(
+        'args, ini, expected', [
+            ([], None, 2),
+            (['--pff-retention', 'collection'], None, 0),
+            (['--pff-retention', 'consumed'], None, 1),
+            (['--pff-retention', 'keep'], None, 2),
+            ([], 'collection', 0),
+            (['--pff-retention', 'consumed'], 'collection', 1),
+        ]
+)
+def test_pff_retention(testdir, args, ini, expected):
+    testdir.makefile('.json', a='{"test_a": [{"x": 1}]}')
+    testdir.makefile('.json', b='{"test_b": [{"x": 1}], "unused": []}')
+    testdir.makefile('.py', test_file=f"""\
+            import parametrize_from_file as pff
+
+            @pff('a.json')
+            def test_a(x):
+                pass
+
+            @pff('b.json')
+            def test_b(x):
+                pass
+
+            def test_entries():
+                assert pff.get_cache().stats().entries == {expected}
+    """)
+    if ini:
+        testdir.makeini(f"""\
+                [pytest]
+                pff_retention = {ini}
+        """)
+
+    result = testdir.runpytest_subprocess(*args)
+    result.assert_outcomes(passed=3)
+
+def test_pff_retention_err(testdir):
+    testdir.makeini("""\
+            [pytest]
+            pff_retention = forever
+    """)
+    result = testdir.runpytest()
+    result.stderr.fnmatch_lines(["*pff_retention: expected 'collection', 'consumed', or 'keep', not 'forever'*"])
+
+def test_suite_cache(tmp_path):
+    cache = pffc.SuiteCache()
+    p = tmp_path / 'params.txt'
+    p.write_text('a')
+    stat = os.stat(p)
+
+    assert cache.get(load_upper, p, stat) is pffc.MISSING
+    cache.put(load_upper, p, {'text': 'A'}, stat)
+    assert cache.get(load_upper, p, stat) == {'text': 'A'}
+
+    stats = cache.stats()
+    assert stats.hits == 1
+    assert stats.misses == 1
+    assert stats.entries == 1
+    assert stats.nbytes == 1
+
+    p.write_text('bb')
+    assert cache.get(load_upper, p, os.stat(p)) is pffc.MISSING
+
+    stats = cache.stats()
+    assert stats.hits == 1
+    assert stats.misses == 2
+    assert stats.invalidations == 1
+    assert stats.entries == 0
+    assert stats.nbytes == 0
+
+def test_suite_cache_evict_entries(tmp_path):
+    cache = pffc.SuiteCache(max_entries=2)
+    ps = [tmp_path / f'params_{i}.txt' for i in range(3)]
+
+    for i, p in enumerate(ps):
+        p.write_text('a')
+        cache.put(load_upper, p, i, os.stat(p))
+
+    assert cache.get(load_upper, ps[0], os.stat(ps[0])) is pffc.MISSING
+    assert cache.get(load_upper, ps[1], os.stat(ps[1])) == 1
+    assert cache.get(load_upper, ps[2], os.stat(ps[2])) == 2
+    assert cache.stats().evictions == 1
+
+    # Shrinking the cache evicts the least recently used entries.
+    cache.get(load_upper, ps[1], os.stat(ps[1]))
+    cache.resize(max_entries=1)
+
+    assert cache.get(load_upper, ps[1], os.stat(ps[1])) == 1
+    assert cache.get(load_upper, ps[2], os.stat(ps[2])) is pffc.MISSING
+    assert cache.stats().evictions == 2
+
+def test_suite_cache_evict_bytes(tmp_path):
+    cache = pffc.SuiteCache(max_bytes=5)
+    p1 = tmp_path / 'params_1.txt'
+    p2 = tmp_path / 'params_2.txt'
+
+    p1.write_text('aaa')
+    p2.write_text('bbb')
+
+    cache.put(load_upper, p1, 1, os.stat(p1))
+    assert cache.stats().nbytes == 3
+
+    cache.put(load_upper, p2, 2, os.stat(p2))
+    assert cache.stats().nbytes == 3
+    assert cache.get(load_upper, p1, os.stat(p1)) is pffc.MISSING
+    assert cache.get(load_upper, p2, os.stat(p2)) == 2
+
+def test_suite_cache_consume(tmp_path):
+    cache = pffc.SuiteCache(retention='consumed')
+    p = tmp_path / 'params.txt'
+    p.write_text('a')
+    stat = os.stat(p)
+
+    cache.put(load_upper, p, {'test_a': 1, 'test_b': 2}, stat)
+
+    cache.consume(load_upper, p, 'test_a')
+    cache.consume(load_upper, p, 'test_a')
+    assert cache.get(load_upper, p, stat) == {'test_a': 1, 'test_b': 2}
+    assert cache.stats().releases == 0
+
+    cache.consume(load_upper, p, 'test_b')
+    assert cache.get(load_upper, p, stat) is pffc.MISSING
+    assert cache.stats().releases == 1
+
+    # Keys consumed before an entry is replaced don't count towards the new 
+    # entry.
+    cache.put(load_upper, p, {'test_a': 1, 'test_b': 2}, stat)
+    cache.consume(load_upper, p, 'test_a')
+    cache.put(load_upper, p, {'test_a': 1, 'test_b': 2}, stat)
+    cache.consume(load_upper, p, 'test_b')
+    assert cache.get(load_upper, p, stat) == {'test_a': 1, 'test_b': 2}
+
+    # Consuming keys from files that aren't cached does nothing.
+    cache.consume(load_upper, tmp_path / 'other.txt', 'test_a')
+
+@pytest.mark.parametrize('kwargs', [{}, {'retention': 'keep'}])
+def test_suite_cache_consume_keep(tmp_path, kwargs):
+    cache = pffc.SuiteCache(**kwargs)
+    p = tmp_path / 'params.txt'
+    p.write_text('a')
+    stat = os.stat(p)
+
+    cache.put(load_upper, p, {'test_a': 1}, stat)
+    cache.consume(load_upper, p, 'test_a')
+    cache.release()
+
+    assert cache.get(load_upper, p, stat) == {'test_a': 1}
+    assert cache.stats().releases == 0
+
+def test_suite_cache_consume_collection(tmp_path):
+    cache = pffc.SuiteCache(retention='collection')
+    p = tmp_path / 'params.txt'
+    p.write_text('a')
+    stat = os.stat(p)
+
+    cache.put(load_upper, p, {'test_a': 1}, stat)
+    cache.consume(load_upper, p, 'test_a')
+
+    assert cache.get(load_upper, p, stat) == {'test_a': 1}
+    assert cache.stats().releases == 0
+
+    cache.release()
+
+    assert cache.get(load_upper, p, stat) is pffc.MISSING
+    assert cache.stats().releases == 1
+
+def test_suite_cache_release(tmp_path):
+    cache = pffc.SuiteCache(retention='collection')
+    ps = [tmp_path / f'params_{i}.txt' for i in range(2)]
+
+    for i, p in enumerate(ps):
+        p.write_text('a')
+        cache.put(load_upper, p, i, os.stat(p))
+
+    cache.get(load_upper, ps[0], os.stat(ps[0]))
+    cache.release()
+
+    assert cache.get(load_upper, ps[0], os.stat(ps[0])) is pffc.MISSING
+    assert cache.get(load_upper, ps[1], os.stat(ps[1])) is pffc.MISSING
+
+    stats = cache.stats()
+    assert stats.hits == 1
+    assert stats.releases == 2
+    assert stats.entries == 0
+    assert stats.nbytes == 0
+
+def test_suite_cache_clear(tmp_path):
+    cache = pffc.SuiteCache()
+    p = tmp_path / 'params.txt'
+    p.write_text('a')
+    stat = os.stat(p)
+
+    cache.put(load_upper, p, {'text': 'A'}, stat)
+    cache.get(load_upper, p, stat)
+    cache.clear()
+
+    assert cache.get(load_upper, p, stat) is pffc.MISSING
+    assert cache.stats() == pffc.CacheStats(
+            hits=0,
+            misses=1,
+            invalidations=0,
+            evictions=0,
+            releases=0,
+            entries=0,
+            nbytes=0,
+            max_entries=None,
+            max_bytes=None,
+    )
+
+def test_dir_cache(tmp_path, monkeypatch):
+    calls = []
+    list_existing_names = pffc._list_existing_names
+
+    def list_logged(dir):
+        calls.append(dir)
+        return list_existing_names(dir)
+
+    monkeypatch.setattr(pffc, '_list_existing_names', list_logged)
+
+    cache = pffc.DirCache()
+    cache.racy_ns = -10**12
+
+    (tmp_path / 'a.txt').write_text('')
+    (tmp_path / 'b').mkdir()
+    (tmp_path / 'c.txt').symlink_to(tmp_path / 'a.txt')
+    (tmp_path / 'd.txt').symlink_to(tmp_path / 'missing.txt')
+
+    assert cache.listdir(tmp_path) == {'a.txt', 'b', 'c.txt'}
+    assert cache.listdir(tmp_path) == {'a.txt', 'b', 'c.txt'}
+    assert len(calls) == 1
+
+    # Adding a file changes the modification time of the directory.
+    (tmp_path / 'e.txt').write_text('')
+    assert cache.listdir(tmp_path) == {'a.txt', 'b', 'c.txt', 'e.txt'}
+    assert len(calls) == 2
+
+    cache.clear()
+    assert cache.listdir(tmp_path) == {'a.txt', 'b', 'c.txt', 'e.txt'}
+    assert len(calls) == 3
+
+    with pytest.raises(OSError):
+        cache.listdir(tmp_path / 'missing')
+
+def test_dir_cache_racy(tmp_path, monkeypatch):
+    calls = []
+    list_existing_names = pffc._list_existing_names
+
+    def list_logged(dir):
+        calls.append(dir)
+        return list_existing_names(dir)
+
+    monkeypatch.setattr(pffc, '_list_existing_names', list_logged)
+
+    # The directory was just modified, so its listing can't be trusted to 
+    # stay up-to-date.
+    cache = pffc.DirCache()
+    (tmp_path / 'a.txt').write_text('')
+
+    assert cache.listdir(tmp_path) == {'a.txt'}
+    assert cache.listdir(tmp_path) == {'a.txt'}
+    assert len(calls) == 2
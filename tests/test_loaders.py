@@ -0,0 +1,305 @@
+import json
+import yaml
+import pickle
+import pytest
+import parametrize_from_file as pff
+import parametrize_from_file.loaders as pffl
+import parametrize_from_file.parameters as pffp
+
+pytest_plugins = ['pytester']
+
+@pytest.fixture
+def lazy(monkeypatch):
+    monkeypatch.setattr(pffl, '_LAZY_MIN_BYTES', 0)
+
+@pytest.mark.parametrize(
+        'suffix, content, expected', [(
+            '.json',
+            json.dumps({'a': [{'x': 1}], 'b': {'y': [2, 'z']}}, indent=2),
+            {'a': [{'x': 1}], 'b': {'y': [2, 'z']}},
+        ), (
+            '.json',
+            '{\n    "a": 1,\n    "b": 2,\n    "a": 3\n}',
+            {'a': 3, 'b': 2},
+        ), (
+            '.yml',
+            'a:\n- x: 1\n# comment\nb:\n  y: [2, 3]\n',
+            {'a': [{'x': 1}], 'b': {'y': [2, 3]}},
+        ), (
+            '.yml',
+            'a: 1\nb: |\n  x\n  y\nc: 3\n',
+            {'a': 1, 'b': 'x\ny\n', 'c': 3},
+        ), (
+            # Quotes, brackets, and comment characters in strings.
+            '.json',
+            json.dumps({'a': '}', 'b': ['"[', {'c': 'x'}]}, indent=2),
+            {'a': '}', 'b': ['"[', {'c': 'x'}]},
+        ), (
+            '.yml',
+            'a: "x # [\n  y"  # it\'s\nb: don\'t\nc: [\'a\'\'b\', "]"]\n',
+            {'a': 'x # [ y', 'b': "don't", 'c': ["a'b", ']']},
+        ), (
+            '.nt',
+            'a:\n  -\n    x: 1\n# comment\nb:\n  y: 2\n',
+            {'a': [{'x': '1'}], 'b': {'y': '2'}},
+        ),
+])
+def test_lazy_suite_params(lazy, suffix, content, expected, tmp_path):
+    p = tmp_path / f'params{suffix}'
+    p.write_text(content)
+
+    suite_params = pffl.get_loaders()[suffix](p)
+    assert isinstance(suite_params, pffl.LazySuiteParams)
+    assert suite_params == expected
+    assert list(suite_params) == list(expected)
+
+    suite_params = pickle.loads(pickle.dumps(suite_params))
+    assert type(suite_params) is dict
+    assert suite_params == expected
+
+@pytest.mark.parametrize(
+        'suffix, content, expected', [(
+            # Minified JSON can't be indexed.
+            '.json',
+            json.dumps({'a': 1, 'b': 2}),
+            {'a': 1, 'b': 2},
+        ), (
+            # Values that depend on each other can't be indexed.
+            '.yml',
+            'a: &x 1\nb: *x\n',
+            {'a': 1, 'b': 1},
+        ), (
+            '.yml',
+            '---\na: 1\n',
+            {'a': 1},
+        ), (
+            '.yml',
+            'null: 1\n',
+            {None: 1},
+        ), (
+            # What looks like a key is really part of a nested object.
+            '.json',
+            '{\n  "a": {"s": "}",\n  "test_c": 1,\n  "b": {"w": "{"}}\n}',
+            {'a': {'s': '}', 'test_c': 1, 'b': {'w': '{'}}},
+        ), (
+            # What looks like a key is really part of a multi-line string.
+            '.yml',
+            'a: 1\nb: "one\ntest_c: two\ntest_d: three"\ne: 2\n',
+            {'a': 1, 'b': 'one test_c: two test_d: three', 'e': 2},
+        ), (
+            '.yml',
+            'a: "x\nb: y"\n',
+            {'a': 'x b: y'},
+        ), (
+            '.yml',
+            "a: 'x\nb: y'\n",
+            {'a': 'x b: y'},
+        ), (
+            '.yml',
+            'a: [1,\nb: 2]\n',
+            {'a': [1, {'b': 2}]},
+        ), (
+            '.nt',
+            'a: 1\n: b\n  > 2\n',
+            {'a': '1', 'b': '2'},
+        ),
+])
+def test_lazy_suite_params_not_indexed(lazy, suffix, content, expected, tmp_path):
+    p = tmp_path / f'params{suffix}'
+    p.write_text(content)
+
+    suite_params = pffl.get_loaders()[suffix](p)
+    assert not isinstance(suite_params, pffl.LazySuiteParams)
+    assert suite_params == expected
+
+    for key in ['test_c', 'test_d']:
+        with pytest.raises(KeyError):
+            suite_params[key]
+
+@pytest.mark.parametrize(
+        'suffix, content, message', [(
+            '.json',
+            '{\n  "a": 1,\n  "b": [1 2]\n}',
+            'line 3 column 11',
+        ), (
+            '.yml',
+            'a: 1\nb: [\n',
+            'line 3',
+        ), (
+            '.nt',
+            'a: 1\nb:\n  - x\n  y: z\n',
+            '4',
+        ),
+])
+def test_lazy_suite_params_err(lazy, suffix, content, message, tmp_path):
+    p = tmp_path / f'params{suffix}'
+    p.write_text(content)
+
+    # Only the requested value is parsed, so syntax errors elsewhere in the
+    # file don't matter.
+    assert pffp._load_test_params(pffl.get_loaders(), p, 'a') in (1, '1')
+
+    with pytest.raises(pff.ConfigError) as err:
+        pffp._load_test_params(pffl.get_loaders(), p, 'b')
+
+    assert err.match("failed to load parametrization file")
+    assert err.match(message)
+
+@pytest.mark.parametrize('is_lazy', [False, True])
+def test_lazy_suite_params_nt_duplicate_keys(monkeypatch, is_lazy, tmp_path):
+    import nestedtext as nt
+
+    # Whether or not the file is big enough to be indexed, duplicate keys 
+    # should be reported the same way.
+    if is_lazy:
+        monkeypatch.setattr(pffl, '_LAZY_MIN_BYTES', 0)
+
+    p = tmp_path / 'params.nt'
+    p.write_text('a: 1\nb: 2\na: 3\n')
+
+    with pytest.raises(nt.NestedTextError) as expected:
+        nt.load(p)
+
+    with pytest.raises(nt.NestedTextError) as err:
+        pffl.get_loaders()['.nt'](p)
+
+    assert str(err.value) == str(expected.value)
+
+def test_lazy_suite_params_min_bytes(tmp_path):
+    p = tmp_path / 'params.nt'
+    p.write_text('a: 1\n')
+
+    suite_params = pffl.get_loaders()['.nt'](p)
+    assert type(suite_params) is dict
+
+@pytest.mark.parametrize(
+        'suffix, name, content, expected', [
+            ('.yml', 'yaml.safe_load', 'a: 1', {'a': 1}),
+            ('.toml', 'toml.decoder.load', 'a = 1', {'a': 1}),
+            ('.nt', 'nestedtext.nestedtext.load', 'a: 1', {'a': '1'}),
+        ]
+)
+def test_lazy_loader(suffix, name, content, expected, tmp_path):
+    p = tmp_path / f'params{suffix}'
+    p.write_text(content)
+
+    loader = pffl.get_loaders()[suffix]
+    assert f'{loader.__module__}.{loader.__qualname__}' == name
+
+    # The loaders are pickled by value, since their names don't refer to 
+    # them.  This is necessary for prefetching with processes.
+    loader = pickle.loads(pickle.dumps(loader))
+    assert loader(p) == expected
+
+@pytest.mark.parametrize('c_loader', [True, False])
+def test_yml_backend(c_loader, monkeypatch, tmp_path):
+    if not c_loader:
+        monkeypatch.setattr(pffl, '_get_yml_c_loader', lambda: None)
+    elif not pffl._get_yml_c_loader():
+        pytest.skip("PyYAML not built with libyaml")
+
+    assert pffl.get_yml_backend() == ('libyaml' if c_loader else 'python')
+
+    p = tmp_path / 'params.yml'
+    p.write_text('a: 1\nb: [x, y]\n')
+    assert pffl.get_loaders()['.yml'](p) == {'a': 1, 'b': ['x', 'y']}
+
+    # The error messages don't depend on the backend.
+    p.write_text('a:\n  b: 1\n c: 2\n')
+    with pytest.raises(yaml.YAMLError, match="expected <block end>, but found '<block mapping start>'"):
+        pffl.get_loaders()['.yml'](p)
+
+@pytest.mark.parametrize('c_loader', [True, False])
+def test_yml_backend_lenient(c_loader, monkeypatch, tmp_path):
+    # libyaml accepts some input that the spec (and the pure-python parser) 
+    # doesn't.  Its result is used as is, rather than being double-checked by 
+    # the pure-python parser.
+    if not c_loader:
+        monkeypatch.setattr(pffl, '_get_yml_c_loader', lambda: None)
+    elif not pffl._get_yml_c_loader():
+        pytest.skip("PyYAML not built with libyaml")
+
+    p = tmp_path / 'params.yml'
+    p.write_text('a:\t1\n')
+
+    if c_loader:
+        assert pffl.get_loaders()['.yml'](p) == {'a': 1}
+    else:
+        with pytest.raises(yaml.YAMLError, match="found character '\\\\t' that cannot start any token"):
+            pffl.get_loaders()['.yml'](p)
+
+def test_yml_backend_header(testdir):
+    testdir.makepyfile(test_file="""\
+            def test_pass():
+                pass
+    """)
+    result = testdir.runpytest()
+    result.stdout.fnmatch_lines([
+        f"parametrize_from_file: yaml={pffl.get_yml_backend()}, json={pffl.get_json_backend()}",
+    ])
+
+@pytest.mark.parametrize('backend', ['json', *pffl._JSON_BACKENDS])
+@pytest.mark.parametrize(
+        'content, expected', [
+            ('{"a": [1, 2.5, "x", null, true]}', {'a': [1, 2.5, 'x', None, True]}),
+            ('{"a": 1, "a": 2}', {'a': 2}),
+            # Not supported by all backends:
+            ('{"a": 123456789012345678901234567890}', {'a': 123456789012345678901234567890}),
+            ('{"a": Infinity}', {'a': float('inf')}),
+            ('\ufeff{"a": 1}', {'a': 1}),
+        ],
+)
+def test_json_backend(backend, content, expected, tmp_path):
+    if backend != 'json':
+        pytest.importorskip(backend)
+
+    p = tmp_path / 'params.json'
+    p.write_text(content)
+
+    load_json = pff.json_loader(backend)
+    assert load_json(p) == expected
+
+@pytest.mark.parametrize('backend', ['json', *pffl._JSON_BACKENDS])
+def test_json_backend_err(backend, tmp_path):
+    if backend != 'json':
+        pytest.importorskip(backend)
+
+    p = tmp_path / 'params.json'
+    p.write_text('{"a": 1,\n "b": [1 2]}')
+
+    # The error message shouldn't depend on the backend.
+    with pytest.raises(pff.ConfigError) as err:
+        pffp._load_test_params({'.json': pff.json_loader(backend)}, p, 'a')
+
+    assert err.match(r"json\.load\(\)")
+    assert err.match(r"line 2 column 10")
+
+def test_json_backend_unknown():
+    with pytest.raises(pff.ConfigError, match="unknown JSON backend: 'xyz'"):
+        pff.json_loader('xyz')
+
+@pytest.mark.parametrize('backend', ['json', *pffl._JSON_BACKENDS])
+def test_pff_json_backend(backend, testdir):
+    if backend != 'json':
+        pytest.importorskip(backend)
+
+    testdir.makefile('.json', test_file="""\
+            {"test_eq": [{"a": 1, "b": 1}]}
+    """)
+    testdir.makefile('.py', test_file="""\
+            import parametrize_from_file
+            import parametrize_from_file.loaders as pffl
+
+            @parametrize_from_file
+            def test_eq(a, b):
+                assert a == b
+                assert pffl.get_json_backend() == %r
+    """ % backend)
+
+    prev_backend = pffl.get_json_backend()
+
+    result = testdir.runpytest('--pff-json-backend', backend)
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines([f"parametrize_from_file: *json={backend}"])
+
+    assert pffl.get_json_backend() == prev_backend
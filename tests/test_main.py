@@ -0,0 +1,99 @@
+import os
+import sys
+import pytest
+import parametrize_from_file.__main__ as pffm
+
+pytest_plugins = ['pytester']
+
+def test_compile(tmp_path, capsys):
+    (tmp_path / 'test_a.py').write_text('')
+    (tmp_path / 'test_a.json').write_text('{"test_a": [{"x": 1}]}')
+    (tmp_path / 'b.nt').write_text('test_b:\n  -\n    x: 2\n')
+    (tmp_path / 'c.yml').write_text('test_c: [')
+
+    pffm.main([
+        'compile',
+        '-o', str(tmp_path / 'bundle'),
+        '-r', str(tmp_path),
+        str(tmp_path),
+        str(tmp_path / 'b.nt'),
+    ])
+    assert len(list((tmp_path / 'bundle').iterdir())) == 2
+
+    with pytest.raises(SystemExit):
+        pffm.main([
+            'compile',
+            '-o', str(tmp_path / 'bundle'),
+            str(tmp_path / 'c.yml'),
+        ])
+
+    out, err = capsys.readouterr()
+    assert "compiled 2 parameter file(s)" in out
+    assert "c.yml" in err
+    assert "failed to compile 1 parameter file(s)" in err
+
+@pytest.mark.parametrize('jobs', ['1', '2'])
+def test_pff_bundle(jobs, testdir):
+    testdir.makeconftest("""\
+            import parametrize_from_file as pff
+
+            def load_logged(path):
+                with open('load_log', 'a') as f:
+                    f.write(path.name + '\\n')
+                return {'test_eq': [{'a': 'x', 'b': 'x'}]}
+
+            pff.add_loader('.xyz', load_logged)
+    """)
+    testdir.makefile('.xyz', test_file='')
+    testdir.makefile('.py', test_file="""\
+            import parametrize_from_file
+
+            @parametrize_from_file
+            def test_eq(a, b):
+                assert a == b
+    """)
+    log = testdir.tmpdir / 'load_log'
+
+    result = testdir.run(
+            sys.executable, '-m', 'parametrize_from_file', 'compile',
+            '-o', 'bundle',
+            '-i', 'conftest.py',
+            '-j', jobs,
+    )
+    assert result.ret == 0
+    assert log.read_text('utf8') == 'test_file.xyz\n'
+
+    bundle = testdir.tmpdir / 'bundle'
+    entry_bytes = {x: x.read_binary() for x in bundle.listdir()}
+
+    # Make it look like the bundle is being used in a fresh checkout.
+    p = testdir.tmpdir / 'test_file.xyz'
+    stat = os.stat(p)
+    os.utime(p, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    result = testdir.runpytest_subprocess('--pff-bundle', 'bundle')
+    result.assert_outcomes(passed=1)
+    assert log.read_text('utf8') == 'test_file.xyz\n'
+
+    # The bundle is never modified.
+    assert {x: x.read_binary() for x in bundle.listdir()} == entry_bytes
+
+    # Changed files are loaded again.
+    p.write_text('changed', 'utf8')
+
+    result = testdir.runpytest_subprocess('--pff-bundle', 'bundle')
+    result.assert_outcomes(passed=1)
+    assert log.read_text('utf8') == 'test_file.xyz\n' * 2
+    assert "bundle misses" not in result.stdout.str()
+
+    # Misses are reported when asked for.
+    result = testdir.runpytest_subprocess('--pff-bundle', 'bundle', '-v')
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines([
+        "*parametrize_from_file bundle misses*",
+        "test_file.xyz: file changed",
+    ])
+
+def test_pff_bundle_not_found(testdir):
+    result = testdir.runpytest('--pff-bundle', 'bundle')
+    result.stderr.fnmatch_lines(["*pff_bundle: directory not found:*"])
@@ -1,6 +1,8 @@
 import pytest, sys, os
 from unittest.mock import Mock, MagicMock
-from parametrize_from_file import Namespace, star, error
+from parametrize_from_file import Namespace, star, error, compile_cache_info, clear_compile_cache
+from parametrize_from_file.namespace import _compile, _parse_literal, _is_shareable
+from parametrize_from_file.utils import MISSING
 from operator import itemgetter
 
 class Named1:
@@ -281,6 +283,168 @@ def test_eval_immutable():
     ns.eval('a + 1')
     assert ns == {'a': 1}
 
+@pytest.mark.parametrize(
+        'src', [
+            '(a := 2)',
+            '[(a := 2) for x in [1]]',
+            'globals().update(a=2)',
+            'vars().update(a=2)',
+            'locals().update(a=2)',
+            'exec("a = 2")',
+            'eval("globals()").update(a=2)',
+            '(lambda: None).__globals__.update(a=2)',
+            'getattr(lambda: None, "__globals__").update(a=2)',
+            '__import__("sys")._getframe().f_globals.update(a=2)',
+        ],
+)
+def test_eval_immutable_impure(src):
+    assert not _compile(src, 'eval').pure
+
+    ns = Namespace(a=1)
+    ns.eval(src)
+    assert ns == {'a': 1}
+    assert ns.eval('a') == 1
+
+def test_eval_sees_changes():
+    ns = Namespace('counter = 0\ndef inc():\n global counter\n counter += 1\n return counter')
+
+    assert ns.eval('inc()') == 1
+    assert ns['counter'] == 1
+    assert ns.eval('counter') == 1
+    assert ns.eval_many(['inc()']) == [2]
+    assert ns.eval_many(['counter']) == [2]
+
+def test_eval_isolated_calls():
+    # This snippet modifies its globals without any of the constructs that 
+    # `_is_pure()` looks for.
+    src = "getattr((lambda: 0), ''.join(['__glo', 'bals__'])).update(a=2)"
+    assert _compile(src, 'eval').pure
+
+    ns = Namespace(a=1)
+    ns.eval(src)
+    assert ns == {'a': 1}
+    assert ns.eval('a') == 1
+
+    ns.eval_many([src])
+    assert ns.eval_many(['a']) == [1]
+
+@pytest.mark.parametrize(
+        'src, expected', [
+            ('a + 1', True),
+            ('[x + a for x in range(3)]', True),
+            ('lambda x: x + a', True),
+            ('f"{a}"', True),
+            ('(a := 2)', False),
+        ],
+)
+def test_eval_pure(src, expected):
+    assert _compile(src, 'eval').pure == expected
+
+@pytest.mark.parametrize(
+        'src', [
+            '0', '00', '01', '1', '123', '1_000', '0x10', '٣', '²',
+            '1.', '.5', '1.5', '1e5', '1.5e-3', '1E+3', '1.e5', '1_0.5', '.', 'e5',
+            'True', 'False', 'None', ' True', 'True ', 'true',
+            "''", '""', "'a'", '"a"', "'a\\nb'", '"\'"', "'\"'", "'''a'''",
+            "'a' 'b'", "'a'+'b'", "b'a'", "f'a'", "'a\tb'", "'", '"',
+            '-1', '+1', '1+2j', '(1, 2)', '(1, [2])', '[1, 2]', '{1: 2}', '{1}',
+            '...', '1/0', '(1,) * 2',
+        ],
+)
+def test_eval_literal(src):
+    ns = Namespace()
+
+    try:
+        expected = eval(src, {})
+    except Exception as err:
+        with pytest.raises(type(err)):
+            ns.eval(src)
+    else:
+        assert ns.eval(src) == expected
+        assert type(ns.eval(src)) is type(expected)
+
+    value = _parse_literal(src)
+    if value is not MISSING:
+        assert value == expected
+
+def test_eval_literal_mutable():
+    ns = Namespace()
+    x = ns.eval('[1, 2]')
+    x.append(3)
+    assert ns.eval('[1, 2]') == [1, 2]
+
+def test_eval_literal_many():
+    # NestedText files contain only strings, so it's common for schemas to 
+    # evaluate large numbers of simple literals.  These are handled without 
+    # calling `eval()`, but the results should be the same.  See 
+    # `benchmarks/bench_namespace.py` for the timing comparison.
+    import random
+
+    rng = random.Random(0)
+    literals = [
+            rng.choice([
+                lambda: str(rng.randint(0, 10**6)),
+                lambda: str(rng.random()),
+                lambda: rng.choice(['True', 'False', 'None']),
+                lambda: repr(str(rng.random())),
+                lambda: str([rng.randint(0, 9) for _ in range(3)]),
+            ])()
+            for _ in range(1000)
+    ]
+    ns = Namespace({f'x{i}': i for i in range(1000)})
+    expected = [eval(x, ns._dict.copy()) for x in literals]
+
+    assert ns.eval(literals) == expected
+    assert ns.eval_many(literals) == expected
+
+def test_eval_many():
+    import math
+    ns = Namespace(math=math)
+
+    values = ['math.pi', '[1]', 'math.pi', '[1]', ['math.e']]
+    results = ns.eval_many(values)
+
+    assert results == [math.pi, [1], math.pi, [1], [math.e]]
+
+    # Mutable results aren't shared between test cases.
+    assert results[1] is not results[3]
+
+@pytest.mark.parametrize(
+        'value, shareable', [
+            (1, True),
+            ('a', True),
+            ((1, 'a'), True),
+            ((1, []), False),
+            ([], False),
+            (len, True),
+            (int, True),
+            (os, True),
+        ],
+)
+def test_eval_many_shareable(value, shareable):
+    assert _is_shareable(value) == shareable
+
+def test_eval_compile_cache():
+    clear_compile_cache()
+
+    ns1 = Namespace(a=1)
+    ns2 = Namespace(a=2)
+
+    assert ns1.eval('a + 1') == 2
+    assert ns2.eval('a + 1') == 3
+    assert ns1.eval(' \ta + 1') == 2
+    assert ns1.exec('b = a + 1', get='b') == 2
+
+    # Leading whitespace is ignored when evaluating, so the indented 
+    # expression is the same as the others.
+    info = compile_cache_info()
+    assert info.hits == 2
+    assert info.misses == 2
+    assert info.currsize == 2
+
+    clear_compile_cache()
+    assert compile_cache_info().currsize == 0
+
 @pytest.mark.parametrize(
         'obj', [
             Mock(),
@@ -311,6 +475,9 @@ def test_eval_mock(obj):
             ({}, ['[][1]'], {}, IndexError),
             ({}, ['{}["x"]'], {}, KeyError),
 
+            # Syntax errors:
+            ({}, ['a +'], {}, SyntaxError),
+
             # Not list/dict/str:
             ({'a': 1}, [1], {}, TypeError),
             ({'a': 1}, [('a + 1', 'a + 2')], {}, TypeError),
@@ -1,6 +1,9 @@
+import sys
 import pytest
+import subprocess
 import parametrize_from_file as pff
 import parametrize_from_file.parameters as pffp
+from parametrize_from_file.rows import compact_cases
 from unittest.mock import Mock
 from pathlib import Path
 
@@ -292,7 +295,7 @@ def test_cache_suite_params(tmp_path):
     p1.touch()
     p2.touch()
 
-    pffp._load_and_cache_suite_params.cache_clear()
+    pff.get_cache().clear()
 
     assert m1.call_count == 0
     assert m2.call_count == 0
@@ -333,6 +336,18 @@ def test_cache_suite_params(tmp_path):
     assert m1.call_count == 2
     assert m2.call_count == 2
 
+
+    # Editing a file invalidates the cached parameters.
+    p1.write_text('edited')
+
+    pffp._load_and_cache_suite_params(m1, p1)
+    assert m1.call_count == 3
+    assert m2.call_count == 2
+
+    pffp._load_and_cache_suite_params(m1, p1)
+    assert m1.call_count == 3
+    assert m2.call_count == 2
+
 @pytest.mark.parametrize(
         'test_params, preprocess, context, schema, expected', [(
             # preprocess:
@@ -473,6 +488,169 @@ def test_process_test_params(test_params, preprocess, context, schema, expected)
     actual = pffp._process_test_params(test_params, preprocess, context, schema)
     assert actual == expected
 
+def test_process_test_params_by_column():
+    ns = pff.Namespace(x=1)
+    schema = [
+            pff.defaults(b='x'),
+            pff.cast(a=ns.eval_many, b=ns.eval_many),
+            lambda p: {**p, 'c': p['a'] + p['b']},
+    ]
+    test_params = [
+            {'a': 'x + 1', 'id': 'x'},
+            {'a': 'x + 2', 'b': '0', 'marks': 'skip'},
+    ]
+    expected = [
+            {'a': 2, 'b': 1, 'c': 3, 'id': 'x'},
+            {'a': 3, 'b': 0, 'c': 3, 'marks': [pytest.mark.skip]},
+    ]
+    assert pffp._process_test_params(test_params, None, None, schema) == expected
+    assert pffp._process_test_params_by_column(test_params, schema) == expected
+
+    # The input shouldn't be modified.
+    assert test_params[0] == {'a': 'x + 1', 'id': 'x'}
+
+@pytest.mark.parametrize(
+        'schema, messages', [(
+            pff.cast(a=pff.Namespace(x=1).eval_many),
+            [
+                "test cases failed schema validation",
+                "schema function applied to all 2 test cases at once: cast",
+                "name 'y' is not defined",
+            ],
+        ), (
+            pff.vectorized(lambda cols: {'a': cols['a'][:1]}),
+            [
+                "test cases failed schema validation",
+                "expected 2 values for 'a', got 1",
+            ],
+        ), (
+            [
+                pff.cast(a=pff.vectorized(lambda xs: [x.upper() for x in xs])),
+                lambda p: {**p, 'b': {'X': 1}[p['a']]},
+            ],
+            [
+                "test case failed schema validation",
+                "'a': 'y'",
+                "✖ 'Y'",
+            ],
+        )],
+)
+def test_process_test_params_by_column_err(schema, messages):
+    test_params = [{'a': 'x'}, {'a': 'y'}]
+
+    with pytest.raises(pff.ConfigError) as err:
+        pffp._process_test_params(test_params, None, None, schema)
+
+    for message in messages:
+        assert err.match(message)
+
+def test_process_test_params_by_column_key_order():
+    # Test cases processed by column should be indistinguishable from those 
+    # processed by row, including the order of their keys.  (The keys can 
+    # still end up in a different order if different test cases specify 
+    # their parameters in different orders, but that doesn't matter to 
+    # pytest.)
+    def add_marks(params):
+        return {'marks': 'slow', **params, 'c': 0}
+
+    schemas = [
+            [pff.cast(a=pff.vectorized(lambda xs: [[x] for x in xs])), add_marks],
+            [pff.cast(a=list), add_marks],
+    ]
+    test_params = [
+            {'id': 'x', 'a': 'a', 'marks': 'skip', 'b': 1},
+            {'a': 'b', 'b': 2},
+    ]
+    expected = [
+            {'a': ['a'], 'b': 1, 'c': 0, 'id': 'x', 'marks': [pytest.mark.slow, pytest.mark.skip]},
+            {'a': ['b'], 'b': 2, 'c': 0, 'marks': [pytest.mark.slow]},
+    ]
+
+    by_column, by_row = [
+            pffp._process_test_params(test_params, None, None, schema)
+            for schema in schemas
+    ]
+
+    assert by_column == by_row == expected
+    assert [list(x) for x in by_column] == [list(x) for x in by_row]
+    assert [list(x) for x in by_row] == [list(x) for x in expected]
+
+def test_process_test_params_by_column_err_once():
+    # The schema isn't applied a second time after an error, because that 
+    # would repeat any side effects.
+    calls = []
+
+    @pff.vectorized
+    def log(columns):
+        calls.append(list(columns['a']))
+        return columns
+
+    def fail(params):
+        raise ValueError('fail')
+
+    with pytest.raises(pff.ConfigError, match='fail'):
+        pffp._process_test_params([{'a': 1}, {'a': 2}], None, None, [log, fail])
+
+    assert calls == [[1, 2]]
+
+def test_process_test_params_by_column_no_params():
+    # If none of the test cases have any parameters, there are no columns to 
+    # count the test cases from, so they have to be processed one at a time.
+    schema = [pff.defaults(a=1), pff.cast(a=pff.vectorized(lambda xs: [2 * x for x in xs]))]
+    test_params = [{}, {'id': 'x'}]
+    expected = [{'a': 2}, {'a': 2, 'id': 'x'}]
+
+    assert pffp._process_test_params(test_params, None, None, schema) == expected
+
+def test_predict_output_keys():
+    schema = [
+            pff.rename(x='a'),
+            pff.defaults(b=0),
+            pff.cast(a=int),
+            pff.error_or('c'),
+            lambda p: p,
+    ]
+    assert pffp._predict_output_keys(schema, {'x', 'y'}) == \
+            {'a', 'b', 'c', 'y', 'error'}
+
+def test_process_test_params_vectorized():
+    np = pytest.importorskip('numpy')
+
+    @pff.vectorized
+    def total(columns):
+        return {**columns, 'c': np.asarray(columns['a']) + columns['b']}
+
+    schema = [
+            pff.rename(x='a'),
+            pff.defaults(b=0),
+            total,
+    ]
+    test_params = [
+            {'x': 1, 'id': 'x'},
+            {'x': 2, 'b': 3},
+    ]
+    expected = [
+            {'a': 1, 'b': 0, 'c': 1, 'id': 'x'},
+            {'a': 2, 'b': 3, 'c': 5},
+    ]
+    assert pffp._process_test_params(test_params, None, None, schema) == expected
+    assert pffp._process_test_params_by_column(test_params, schema) == expected
+
+def test_process_test_params_not_vectorized():
+    # Schemas without any vectorized functions are applied to one test case 
+    # at a time, even if some of the functions could process whole columns.
+    calls = []
+
+    def log(params):
+        calls.append(params['a'])
+        return params
+
+    schema = [log, pff.defaults(b=0), log]
+    test_params = [{'a': 1}, {'a': 2}]
+
+    pffp._process_test_params(test_params, None, None, schema)
+    assert calls == [1, 1, 2, 2]
+
 @pytest.mark.parametrize(
         'test_params, preprocess, context, schema, messages', [(
             # preprocess
@@ -564,6 +742,37 @@ def test_check_test_param_keys_err(test_params):
     with pytest.raises(pff.ConfigError, match=message):
         pffp._check_test_params_keys(test_params)
 
+@pytest.mark.parametrize(
+        'test_params', [
+            [{'a': 1}, {'b': 2}],
+            [{'a': 1, 'b': 2}, {'a': 3}],
+            [{'a': 1}, {'a': 3, 'b': 4}],
+            [{'a': 1, 'id': 'x'}, {'a': 3, 'b': 4}],
+            [{'a': 1}, {'a': 2, 'id': 'x', 'marks': [pytest.mark.skip]}, {'a': 3, 'b': 4}],
+])
+@pytest.mark.parametrize('compact', [False, True])
+def test_init_parametrize_arguments_err(test_params, compact):
+    if compact:
+        test_params = compact_cases(test_params)
+
+    message = "every test case must specify the same parameters"
+    with pytest.raises(pff.ConfigError, match=message):
+        pffp._init_parametrize_args(test_params)
+
+def test_get_test_path():
+    def test_f():
+        pass
+
+    assert pffp._get_test_path(test_f) == Path(__file__)
+    assert pffp._get_test_path(test_f) == Path(__file__)
+
+    # If the module can't be found, use the file the code was compiled from.
+    test_f.__module__ = 'not_a_module'
+    assert pffp._get_test_path(test_f) == Path(__file__)
+
+    with pytest.raises(pff.ConfigError, match="can't find the file that defines the test"):
+        pffp._get_test_path(object())
+
 @pytest.mark.parametrize(
         'case_params, expected', [(
             {'a': 'b'},
@@ -596,9 +805,44 @@ def test_format_case_params(case_params, expected):
             [{'a': 1, 'marks': [pytest.mark.skip]}],
             ['a'],
             [pytest.param(1, id='1', marks=[pytest.mark.skip])],
+        ), (
+            [{'b': 1, 'a': 2}, {'a': 3, 'b': 4, 'id': 'x'}, {'a': 5, 'b': 6}],
+            ['a', 'b'],
+            [
+                pytest.param(2, 1, id='1'),
+                pytest.param(3, 4, id='x'),
+                pytest.param(5, 6, id='3'),
+            ],
+        ), (
+            [],
+            [],
+            [],
         ),
 ])
-def test_init_parametrize_arguments(test_params, keys, values):
+@pytest.mark.parametrize('compact', [False, True])
+def test_init_parametrize_arguments(test_params, keys, values, compact):
+    if compact:
+        test_params = compact_cases(test_params)
+
+    assert pffp._init_parametrize_args(test_params) == (keys, values)
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_init_parametrize_arguments_many(compact):
+    # The keys are given in the opposite order that the values are returned 
+    # in, to make sure each value is matched with the right key.  See 
+    # `benchmarks/bench_parametrize.py` for the timing comparison.
+    keys = [f'x{j:02}' for j in range(15)]
+    test_params = [
+            {k: i * j for j, k in reversed(list(enumerate(keys)))}
+            for i in range(1000)
+    ]
+    if compact:
+        test_params = compact_cases(test_params)
+
+    values = [
+            pytest.param(*(i * j for j in range(15)), id=str(i + 1))
+            for i in range(1000)
+    ]
     assert pffp._init_parametrize_args(test_params) == (keys, values)
 
 def test_parametrize(testdir):
@@ -829,6 +1073,80 @@ def test_parametrize_schema(testdir):
     result = testdir.runpytest()
     result.assert_outcomes(passed=2)
 
+def test_parametrize_lazy(testdir):
+    testdir.makefile('.nt', test_file="""\
+            test_numbers:
+              -
+                id: ok
+                x: 1
+              -
+                id: err
+                x: a
+              -
+                id: skip
+                x: b
+                marks: skip
+    """)
+    testdir.makefile('.py', test_file="""\
+            import parametrize_from_file as pff
+
+            @pff.parametrize(
+                schema=[
+                    pff.rename(x='a'),
+                    pff.defaults(b='2'),
+                    pff.cast(a=int, b=float),
+                ],
+                lazy=True,
+            )
+            def test_numbers(a, b):
+                assert a == 1; assert isinstance(a, int)
+                assert b == 2; assert isinstance(b, float)
+    """)
+    result = testdir.runpytest('-v')
+    result.assert_outcomes(passed=1, errors=1, skipped=1)
+    result.stdout.fnmatch_lines([
+        '*test_numbers?ok? PASSED*',
+        '*test_numbers?err? ERROR*',
+        '*test case failed schema validation*',
+        "*invalid literal for int() with base 10: 'a'*",
+    ])
+
+    # Test cases that aren't run don't need to pass the schema.
+    result = testdir.runpytest('-k', 'ok')
+    result.assert_outcomes(passed=1)
+
+def test_parametrize_lazy_unexpected_keys(testdir):
+    testdir.makefile('.nt', test_file="""\
+            test_keys:
+              -
+                a: 1
+    """)
+    testdir.makefile('.py', test_file="""\
+            import parametrize_from_file as pff
+
+            def add_b(params):
+                return {**params, 'b': 2}
+
+            @pff.parametrize(schema=add_b, lazy=True)
+            def test_keys(a):
+                pass
+
+            add_b_with_keys = lambda params: {**params, 'b': 2}
+            add_b_with_keys.output_keys = lambda keys: keys | {'b'}
+
+            @pff.parametrize(key='test_keys', schema=add_b_with_keys, lazy=True)
+            def test_output_keys(a, b):
+                assert a == '1'
+                assert b == 2
+    """)
+    result = testdir.runpytest()
+    result.assert_outcomes(passed=1, errors=1)
+    result.stdout.fnmatch_lines([
+        '*schema returned unexpected parameters*',
+        '*expected parameters: a*',
+        '*actual parameters: a, b*',
+    ])
+
 def test_parametrize_indirect(testdir):
     testdir.makefile('.nt', """\
             test_eq:
@@ -937,6 +1255,32 @@ def test_fixture(testdir):
     result = testdir.runpytest()
     result.assert_outcomes(passed=2)
 
+def test_fixture_lazy(testdir):
+    testdir.makefile('.nt', """\
+            ab:
+              -
+                a: 1
+                b: 1
+              -
+                a: 2
+                b: x
+    """)
+    testdir.makefile('.py', """\
+            import parametrize_from_file as pff
+
+            @pff.fixture(schema=pff.cast(a=int, b=int), lazy=True)
+            def ab(request):
+                return request.param
+
+            def test_eq(ab):
+                assert ab.a == ab.b
+    """)
+    result = testdir.runpytest()
+    result.assert_outcomes(passed=1, errors=1)
+    result.stdout.fnmatch_lines([
+        '*test case failed schema validation*',
+    ])
+
 def test_fixture_id_marks(testdir):
     testdir.makefile('.nt', """\
             ab:
@@ -1086,3 +1430,24 @@ def test_load_parameters_err(files, get_path, key, messages, tmp_path):
         assert err.match(msg)
         
 
+def test_import_lazily():
+    # Some tools import the package many times over (e.g. once per serverless 
+    # invocation), so the third-party libraries that are only needed for 
+    # certain file formats, or that are only needed once tests are being 
+    # collected, shouldn't be imported up front.  See 
+    # `benchmarks/bench_import.py` for how long the import actually takes.
+    code = 'import sys, parametrize_from_file; print(*sys.modules)'
+    result = subprocess.run(
+            [sys.executable, '-c', code],
+            capture_output=True,
+            text=True,
+            check=True,
+    )
+    modules = set(result.stdout.split())
+    lazy_modules = [
+            'yaml', 'toml', 'nestedtext', 'orjson', 'pytest', 'unittest.mock',
+            'more_itertools', 'difflib',
+    ]
+
+    for module in lazy_modules:
+        assert module not in modules
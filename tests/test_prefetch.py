@@ -0,0 +1,174 @@
+import os
+import pytest
+import parametrize_from_file as pff
+import parametrize_from_file.prefetch as pffp
+import parametrize_from_file.cache as pffc
+
+pytest_plugins = ['pytester']
+
+def load_upper(path):
+    return {'text': path.read_text().upper()}
+
+def test_find_param_paths(tmp_path):
+    loaders = {'.txt': load_upper, '.dat': load_upper}
+
+    (tmp_path / 'test_a.py').write_text('')
+    (tmp_path / 'test_a.txt').write_text('a')
+
+    # Multiple candidates:
+    (tmp_path / 'test_b.py').write_text('')
+    (tmp_path / 'test_b.txt').write_text('b')
+    (tmp_path / 'test_b.dat').write_text('b')
+
+    # No candidates:
+    (tmp_path / 'test_c.py').write_text('')
+
+    # Not a test module:
+    (tmp_path / 'd.py').write_text('')
+    (tmp_path / 'd.txt').write_text('d')
+
+    # Excluded directory:
+    (tmp_path / 'e').mkdir()
+    (tmp_path / 'e' / 'test_e.py').write_text('')
+    (tmp_path / 'e' / 'test_e.txt').write_text('e')
+
+    # Subdirectory:
+    (tmp_path / 'f').mkdir()
+    (tmp_path / 'f' / 'test_f.py').write_text('')
+    (tmp_path / 'f' / 'test_f.txt').write_text('f')
+
+    param_paths = pffp.find_param_paths(
+            [tmp_path],
+            norecursedirs=['e'],
+            loaders=loaders,
+    )
+    assert param_paths == {
+            tmp_path / 'test_a.txt': load_upper,
+            tmp_path / 'f' / 'test_f.txt': load_upper,
+    }
+
+    param_paths = pffp.find_param_paths(
+            [tmp_path / 'e' / 'test_e.py'],
+            loaders=loaders,
+    )
+    assert param_paths == {
+            tmp_path / 'e' / 'test_e.txt': load_upper,
+    }
+
+@pytest.mark.parametrize('executor', ['threads', 'processes'])
+def test_prefetch(executor, tmp_path):
+    pff.get_cache().clear()
+
+    p1 = tmp_path / 'params_1.txt'
+    p2 = tmp_path / 'params_2.txt'
+    p3 = tmp_path / 'params_3.txt'
+
+    p1.write_text('a')
+    p2.write_text('b')
+
+    param_paths = {p1: load_upper, p2: load_upper, p3: load_upper}
+    assert pffp.prefetch(param_paths, executor=executor, max_workers=2) == 2
+
+    cache = pff.get_cache()
+    assert cache.get(load_upper, p1, os.stat(p1)) == {'text': 'A'}
+    assert cache.get(load_upper, p2, os.stat(p2)) == {'text': 'B'}
+
+    # Files that are already cached aren't loaded again.
+    assert pffp.prefetch(param_paths, executor=executor) == 0
+
+def test_prefetch_err(tmp_path):
+    pff.get_cache().clear()
+
+    def load_err(path):
+        raise ValueError
+
+    p = tmp_path / 'params.txt'
+    p.write_text('a')
+
+    assert pffp.prefetch({p: load_err}) == 0
+    assert pff.get_cache().get(load_err, p, os.stat(p)) is pffc.MISSING
+
+@pytest.mark.parametrize('executor', ['threads', 'processes'])
+def test_pff_prefetch(executor, testdir):
+    testdir.makeconftest("""\
+            import parametrize_from_file as pff
+
+            def load_logged(path):
+                with open('load_log', 'a') as f:
+                    f.write(path.name + '\\n')
+                return {'test_eq': [{'a': 'x', 'b': 'x'}]}
+
+            pff.add_loader('.xyz', load_logged)
+    """)
+    testdir.makefile('.xyz', test_file_1='', test_file_2='')
+    testdir.makefile('.py', test_file_1="""\
+            with open('load_log', 'a') as f:
+                f.write('test_file_1.py\\n')
+
+            import parametrize_from_file
+
+            @parametrize_from_file
+            def test_eq(a, b):
+                assert a == b
+    """)
+    testdir.makefile('.py', test_file_2="""\
+            import parametrize_from_file
+
+            @parametrize_from_file
+            def test_eq(a, b):
+                assert a == b
+    """)
+    log = testdir.tmpdir / 'load_log'
+
+    result = testdir.runpytest_subprocess('--pff-prefetch', executor)
+    result.assert_outcomes(passed=2)
+
+    # Both files are loaded before the first test module is imported, and
+    # neither is loaded again.
+    lines = log.read_text('utf8').splitlines()
+    assert sorted(lines[:2]) == ['test_file_1.xyz', 'test_file_2.xyz']
+    assert lines[2:] == ['test_file_1.py']
+
+def test_pff_xdist_share(testdir):
+    pytest.importorskip('xdist')
+
+    testdir.makeconftest("""\
+            import parametrize_from_file as pff
+
+            def load_logged(path):
+                with open('load_log', 'a') as f:
+                    f.write(path.name + '\\n')
+                return {'test_eq': [{'a': 'x', 'b': 'x'}]}
+
+            pff.add_loader('.xyz', load_logged)
+    """)
+    testdir.makefile('.xyz', test_file_1='', test_file_2='')
+    testdir.makefile('.py', test_file_1="""\
+            import parametrize_from_file
+
+            @parametrize_from_file
+            def test_eq(a, b):
+                assert a == b
+    """)
+    testdir.makefile('.py', test_file_2="""\
+            import parametrize_from_file
+
+            @parametrize_from_file
+            def test_eq(a, b):
+                assert a == b
+    """)
+    log = testdir.tmpdir / 'load_log'
+
+    # Without sharing, each worker loads each file.
+    result = testdir.runpytest_subprocess('-n', '2')
+    result.assert_outcomes(passed=2)
+    assert len(log.read_text('utf8').splitlines()) == 4
+
+    log.remove()
+
+    result = testdir.runpytest_subprocess('-n', '2', '--pff-xdist-share')
+    result.assert_outcomes(passed=2)
+    assert sorted(log.read_text('utf8').splitlines()) == [
+            'test_file_1.xyz',
+            'test_file_2.xyz',
+    ]
@@ -0,0 +1,254 @@
+import pytest
+import parametrize_from_file.prefilter as pffp
+
+pytest_plugins = ['pytester']
+
+def test_func():
+    pass
+
+class TestClass:
+    def test_method(self):
+        pass
+
+@pytest.mark.parametrize(
+        'args, test_func, expected', [
+            ([], test_func, None),
+            (['.'], test_func, None),
+            (['test_x.py'], test_func, None),
+            (['test_x.py::test_func'], test_func, None),
+            (['test_y.py::test_func[a]'], test_func, None),
+            (['test_x.py::test_other[a]'], test_func, None),
+            (['test_x.py::test_func[a]'], test_func, ['a']),
+            (['test_x.py::test_func[a-b]'], test_func, ['a', 'b']),
+            (['test_x.py::test_func[a]', 'test_x.py::test_func[b]'], test_func, ['a', 'b']),
+            (['test_x.py::test_func[a]', 'test_x.py'], test_func, None),
+            (['test_x.py::TestClass'], TestClass, None),
+            (['test_x.py::TestClass::test_method[a]'], TestClass, ['a']),
+            (['test_x.py::TestClass::test_method[a]'], TestClass.test_method, ['a']),
+            (['test_x.py::TestClass[a]'], TestClass, None),
+        ],
+)
+def test_prefilter_node_ids(args, test_func, expected, tmp_path):
+    prefilter = pffp.Prefilter(args=args, invocation_dir=tmp_path)
+    case_ids = ['a', 'b', 'c']
+    predicate = prefilter.make_predicate(
+            tmp_path / 'test_x.py', test_func, case_ids,
+    )
+
+    if expected is None:
+        assert predicate is None
+    else:
+        assert [x for x in case_ids if predicate(x, [])] == expected
+        assert predicate(None, [])
+
+@pytest.mark.parametrize(
+        'keyword, expected', [
+            # Identifiers that don't match a test case might still match 
+            # something else, e.g. a parent directory or a mark on the module.
+            ('one', ['one', 'two', 'three', 'slow']),
+            ('not one', ['two', 'three', 'slow']),
+            ('not ONE', ['two', 'three', 'slow']),
+            ('not (one or two)', ['three', 'slow']),
+            ('one or two', ['one', 'two', 'three', 'slow']),
+            ('not test_func', []),
+            ('not test_x', []),
+            ('x and not one', ['two', 'three', 'slow']),
+            ('unknown', ['one', 'two', 'three', 'slow']),
+            ('not unknown', ['one', 'two', 'three', 'slow']),
+            ('slow', ['one', 'two', 'three', 'slow']),
+            ('not slow', ['one', 'two', 'three']),
+            ('marked', ['one', 'two', 'three', 'slow']),
+            ('not marked', ['one', 'two', 'slow']),
+            
+            # Give up if there are too many unknown identifiers.
+            ('not (u1 or u2 or u3 or u4 or u5 or u6 or u7 or u8 or u9 or one)', ['one', 'two', 'three', 'slow']),
+        ],
+)
+def test_prefilter_keyword(keyword, expected, tmp_path):
+    prefilter = pffp.Prefilter(keyword=keyword, invocation_dir=tmp_path)
+    case_ids = ['one', 'two', 'three', 'slow']
+    marks = {'three': ['marked']}
+    predicate = prefilter.make_predicate(
+            tmp_path / 'test_x.py', test_func, case_ids,
+    )
+    assert [x for x in case_ids if predicate(x, marks.get(x, []))] == expected
+
+@pytest.mark.parametrize(
+        'deselect, case_ids, expected', [
+            (['test_x.py::test_func[a]'], ['a', 'b'], ['b']),
+            (['test_x.py::test_func[a]'], ['a', 'a', 'b'], None),
+            (['test_x.py::test_other[a]'], ['a', 'b'], None),
+            (['test_x.py::test_func'], ['a', 'b'], None),
+        ],
+)
+def test_prefilter_deselect(deselect, case_ids, expected, tmp_path):
+    prefilter = pffp.Prefilter(deselect=deselect, rootdir=tmp_path)
+    predicate = prefilter.make_predicate(
+            tmp_path / 'test_x.py', test_func, case_ids,
+    )
+
+    if expected is None:
+        assert predicate is None
+    else:
+        assert [x for x in case_ids if predicate(x, [])] == expected
+
+@pytest.mark.parametrize(
+        'kwargs', [
+            dict(args=['test_x.py::test_func[caf\\xe9]']),
+            dict(keyword='not café'),
+            dict(keyword='not caf'),
+            dict(deselect=['test_x.py::test_func[café]']),
+        ],
+)
+def test_prefilter_escaped_ids(kwargs, tmp_path):
+    # Pytest matches the command line against escaped ids, so test cases with 
+    # ids that would be escaped can't be ruled out.
+    prefilter = pffp.Prefilter(**kwargs, invocation_dir=tmp_path, rootdir=tmp_path)
+    case_ids = ['café', 'tab\there', 'back\\slash']
+    predicate = prefilter.make_predicate(
+            tmp_path / 'test_x.py', test_func, case_ids,
+    )
+    assert all(predicate(x, []) for x in case_ids)
+
+def test_pff_prefilter(testdir):
+    testdir.makefile('.nt', test_file="""\
+            test_eq:
+              -
+                a: 1
+                b: 1
+              -
+                id: two
+                a: 2
+                b: 2
+              -
+                id: err
+                a: 3
+                b: x
+              -
+                a: 4
+                b: 4
+    """)
+    testdir.makefile('.py', test_file="""\
+            import parametrize_from_file as pff
+
+            def log(params):
+                with open('schema_log', 'a') as f:
+                    f.write(params['a'] + '\\n')
+                return params
+
+            @pff.parametrize(schema=[log, pff.cast(a=int, b=int)])
+            def test_eq(a, b):
+                assert a == b
+    """)
+    log = testdir.tmpdir / 'schema_log'
+
+    # Without the prefilter, the broken test case prevents collection.
+    result = testdir.runpytest('test_file.py::test_eq[two]')
+    result.assert_outcomes(errors=1)
+    log.remove()
+
+    result = testdir.runpytest('--pff-prefilter', 'test_file.py::test_eq[two]', '-v')
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(['*test_eq?two? PASSED*'])
+
+    # Test cases without ids are kept, because the schema could give them 
+    # one.
+    assert log.read_text('utf8').splitlines() == ['1', '2', '4']
+    log.remove()
+
+    result = testdir.runpytest('--pff-prefilter', '-k', 'not err', '-v')
+    result.assert_outcomes(passed=3)
+    assert log.read_text('utf8').splitlines() == ['1', '2', '4']
+
+@pytest.mark.parametrize(
+        'keyword', ['ab', 'slow'],
+)
+def test_pff_prefilter_keyword_unknown(testdir, keyword):
+    # The identifiers match the directory and the mark on the function, 
+    # neither of which the prefilter knows about, so every test case should 
+    # be selected.
+    testdir.makeini("""\
+            [pytest]
+            markers = slow
+    """)
+    testdir.mkdir('ab')
+    testdir.makefile('.json', **{'ab/test_file': '''\
+            {"test_eq": [
+                {"id": "a", "x": 1},
+                {"id": "ab", "x": 1},
+                {"id": "slowpath", "x": 1}
+            ]}
+    '''})
+    testdir.makefile('.py', **{'ab/test_file': """\
+            import pytest
+            import parametrize_from_file as pff
+
+            @pytest.mark.slow
+            @pff.parametrize
+            def test_eq(x):
+                pass
+    """})
+
+    result = testdir.runpytest('--pff-prefilter', '-k', keyword)
+    result.assert_outcomes(passed=3)
+
+@pytest.mark.parametrize(
+        'args', [
+            ['-k', 'not café'],
+            ['test_file.py::test_eq[caf\\xe9]'],
+        ],
+)
+def test_pff_prefilter_escaped_ids(testdir, args):
+    testdir.makefile('.json', test_file='''\
+            {"test_eq": [
+                {"id": "café", "x": 1},
+                {"id": "tea", "x": 1}
+            ]}
+    ''')
+    testdir.makefile('.py', test_file="""\
+            import parametrize_from_file as pff
+
+            @pff.parametrize
+            def test_eq(x):
+                pass
+    """)
+
+    expected = testdir.runpytest(*args).parseoutcomes()
+    assert expected['passed'] >= 1
+
+    result = testdir.runpytest('--pff-prefilter', *args)
+    assert result.parseoutcomes() == expected
+
+def test_pff_prefilter_default_ids(testdir):
+    testdir.makefile('.nt', test_file="""\
+            test_eq:
+              -
+                a: 1
+                b: 1
+              -
+                id: err
+                a: 2
+                b: x
+              -
+                a: 3
+                b: 3
+    """)
+    testdir.makefile('.py', test_file="""\
+            import parametrize_from_file as pff
+
+            @pff.parametrize
+            def test_eq(a, b):
+                assert a == b
+    """)
+
+    # The default ids don't change when other test cases are skipped.
+    result = testdir.runpytest('--pff-prefilter', 'test_file.py::test_eq[3]', '-v')
+    result.assert_outcomes(passed=1)
+    result.stdout.fnmatch_lines(['*test_eq?3? PASSED*'])
+
+    result = testdir.runpytest('--pff-prefilter', '--deselect', 'test_file.py::test_eq[err]', '-v')
+    result.assert_outcomes(passed=2)
+    result.stdout.fnmatch_lines([
+        '*test_eq?1? PASSED*',
+        '*test_eq?3? PASSED*',
+    ])
@@ -0,0 +1,237 @@
+import json
+import pytest
+import tracemalloc
+import parametrize_from_file as pff
+import parametrize_from_file.profile as pffprof
+
+pytest_plugins = ['pytester']
+
+def test_profiler():
+    profiler = pffprof.Profiler()
+    assert profiler.stats() == {}
+
+    profiler.record('a', 1)
+    profiler.record('b', 2)
+    profiler.record('a', 3)
+
+    with profiler.timed('c'):
+        pass
+
+    stats = profiler.stats()
+    assert list(stats) == ['a', 'b', 'c']
+    assert stats['a'] == pffprof.PhaseStats(seconds=4, calls=2)
+    assert stats['b'] == pffprof.PhaseStats(seconds=2, calls=1)
+    assert stats['c'].calls == 1
+    assert stats['c'].seconds >= 0
+
+def test_profiler_nested(monkeypatch):
+    profiler = pffprof.Profiler()
+
+    # Use a fake clock, so the times are predictable.
+    ticks = iter([0, 1, 4, 10])
+    monkeypatch.setattr(pffprof, 'perf_counter', lambda: next(ticks))
+
+    with profiler.timed('outer'):
+        with profiler.timed('inner'):
+            pass
+
+    stats = profiler.stats()
+    assert stats['inner'].seconds == 3
+    assert stats['outer'].seconds == 7
+
+def test_profiler_recording():
+    profiler = pffprof.Profiler()
+
+    profiler.record('a', 1)
+
+    with profiler.recording('x.json', 'k', 'test_x.py::test_k') as record:
+        profiler.record('a', 2)
+        profiler.record('b', 3)
+        profiler.record_schema('cast', 4)
+        record.cases = 5
+
+    profiler.record_schema('cast', 6)
+
+    assert profiler.records == [record]
+    assert record.path == 'x.json'
+    assert record.key == 'k'
+    assert record.test == 'test_x.py::test_k'
+    assert record.cases == 5
+    assert record.phases == {'a': 2, 'b': 3}
+    assert record.schema == {'cast': 4}
+    assert record.peak_bytes is None
+    assert record.seconds >= 0
+
+    assert profiler.stats()['a'] == pffprof.PhaseStats(seconds=3, calls=2)
+    assert profiler.schema_stats() == {'cast': 10}
+
+    js = profiler.to_json()
+    assert js['phases']['a'] == {'seconds': 3, 'calls': 2}
+    assert js['schema'] == {'cast': 10}
+    assert js['records'] == [{
+        'path': ['x.json'],
+        'key': ['k'],
+        'test': 'test_x.py::test_k',
+        'cases': 5,
+        'seconds': record.seconds,
+        'phases': {'a': 2, 'b': 3},
+        'schema': {'cast': 4},
+        'peak_bytes': None,
+    }]
+
+    report = '\n'.join(profiler.format_report())
+    assert 'x.json' in report
+    assert 'cast' in report
+
+def test_profiler_report_limit():
+    profiler = pffprof.Profiler()
+
+    for i in range(5):
+        with profiler.recording(f'{i}.json', 'k'):
+            profiler.record('load', i)
+
+    report = profiler.format_report(limit=2)
+    assert '(3 more not shown)' in report
+
+@pytest.mark.skipif(
+        not hasattr(tracemalloc, 'reset_peak'),
+        reason="requires python≥3.9",
+)
+def test_profiler_memory():
+    profiler = pffprof.Profiler(memory=True)
+
+    try:
+        assert tracemalloc.is_tracing()
+
+        with profiler.recording('x.json', 'k') as record:
+            x = bytearray(2**20)
+            del x
+
+    finally:
+        profiler.close()
+
+    assert not tracemalloc.is_tracing()
+    assert record.peak_bytes >= 2**20
+    assert 'peak' in '\n'.join(profiler.format_report())
+
+def test_get_schema_name():
+    from parametrize_from_file.schema import _fuse_schema
+
+    def f(x):
+        return x
+
+    assert pffprof.get_schema_name(pff.cast(a=int)) == 'cast'
+    assert pffprof.get_schema_name(f) == 'test_get_schema_name.<locals>.f'
+
+    fused, = _fuse_schema([pff.rename(a='b'), pff.cast(b=int)])
+    assert pffprof.get_schema_name(fused) == 'rename+cast'
+
+def test_profiling(tmp_path):
+    p = tmp_path / 'params.json'
+    p.write_text('{"test_f": [{"a": "1"}, {"a": "2"}]}')
+
+    def test_f(a):
+        pass
+
+    assert pffprof.get_profiler() is None
+
+    with pffprof.timed('x'):
+        pass
+
+    try:
+        profiler = pffprof.enable_profiling()
+        assert pffprof.get_profiler() is profiler
+
+        pff.parametrize(p, schema=[pff.cast(a=int), lambda x: x])(test_f)
+        pff.parametrize(p)(test_f)
+
+    finally:
+        pffprof.disable_profiling()
+
+    assert pffprof.get_profiler() is None
+
+    stats = profiler.stats()
+    assert set(stats) >= {
+            'resolve module',
+            'resolve path',
+            'load',
+            'preprocess',
+            'schema',
+            'check keys',
+            'params',
+    }
+    assert stats['resolve module'].calls == 2
+    assert stats['schema'].calls == 2
+
+    r1, r2 = profiler.records
+    assert r1.path == p
+    assert r1.key == 'test_f'
+    assert r1.test.endswith('::test_profiling::<locals>::test_f')
+    assert r1.cases == 2
+    assert list(r1.schema) == ['cast', 'test_profiling.<locals>.<lambda>']
+    assert r2.cases == 2
+    assert r2.schema == {}
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_profiling_check_keys(compact):
+    # The keys should be timed whether or not they match, and whether or not 
+    # the test cases are compacted.
+    from parametrize_from_file.parameters import _init_parametrize_args
+    from parametrize_from_file.rows import compact_cases
+
+    test_params = [{'a': 1}, {'a': 2}]
+    if compact:
+        test_params = compact_cases(test_params)
+
+    try:
+        profiler = pffprof.enable_profiling()
+        _init_parametrize_args(test_params)
+    finally:
+        pffprof.disable_profiling()
+
+    assert profiler.stats()['check keys'].calls == 1
+
+def test_pff_profile(testdir):
+    testdir.makefile('.json', test_file='{"test_a": [{"x": 1}, {"x": 2}]}')
+    testdir.makefile('.py', test_file="""\
+            import parametrize_from_file as pff
+
+            @pff(schema=pff.cast(x=str))
+            def test_a(x):
+                pass
+    """)
+
+    result = testdir.runpytest_subprocess('--pff-profile', '--pff-profile-json', 'profile.json')
+    result.assert_outcomes(passed=2)
+    result.stdout.fnmatch_lines([
+            '*parametrize_from_file profile*',
+            'file*key*cases*',
+            'test_file.json*test_a*2*',
+            'schema function*',
+            'cast*',
+    ])
+
+    profile = json.loads((testdir.tmpdir / 'profile.json').read_text('utf8'))
+    record, = profile['records']
+    assert record['path'] == ['test_file.json']
+    assert record['key'] == ['test_a']
+    assert record['test'] == 'test_file.py::test_a'
+    assert record['cases'] == 2
+    assert set(record['schema']) == {'cast'}
+
+def test_pff_profile_json_only(testdir):
+    testdir.makefile('.json', test_file='{"test_a": [{"x": 1}]}')
+    testdir.makefile('.py', test_file="""\
+            import parametrize_from_file as pff
+
+            @pff
+            def test_a(x):
+                pass
+    """)
+
+    result = testdir.runpytest_subprocess('--pff-profile-json', 'profile.json')
+    result.assert_outcomes(passed=1)
+    result.stdout.no_fnmatch_line('*parametrize_from_file profile*')
+
+    profile = json.loads((testdir.tmpdir / 'profile.json').read_text('utf8'))
+    assert len(profile['records']) == 1
@@ -0,0 +1,69 @@
+import pytest
+import parametrize_from_file.rows as pffr
+from parametrize_from_file.rows import CaseRow, compact_case, compact_cases, get_layout
+
+def test_case_row():
+    row = compact_case({'a': 1, 'b': 'x'})
+
+    assert isinstance(row, CaseRow)
+    assert row == {'a': 1, 'b': 'x'}
+    assert list(row) == ['a', 'b']
+    assert len(row) == 2
+    assert row['a'] == 1
+    assert row['b'] == 'x'
+    assert 'a' in row
+    assert 'c' not in row
+    assert row.get('a') == 1
+    assert row.get('c') is None
+    assert row.get('c', 2) == 2
+    assert dict(row) == {'a': 1, 'b': 'x'}
+    assert repr(row) == "CaseRow({'a': 1, 'b': 'x'})"
+
+    with pytest.raises(KeyError):
+        row['c']
+
+    with pytest.raises(AttributeError):
+        row.c = 1
+
+def test_case_row_replace():
+    row = compact_case({'a': 1})
+
+    assert row.replace(id='x') == {'a': 1, 'id': 'x'}
+    assert row.replace(a=2) == {'a': 2}
+    assert row == {'a': 1}
+
+def test_compact_cases_layouts():
+    rows = compact_cases([
+        {'a': 1, 'b': 2},
+        {'a': 3, 'b': 4},
+        {'b': 5, 'a': 6},
+        {'a': 7},
+    ])
+
+    assert rows[0].layout is rows[1].layout
+    assert rows[0].layout is not rows[2].layout
+    assert rows[0].layout is not rows[3].layout
+    assert rows[0].layout is get_layout(('a', 'b'))
+
+def test_compact_cases_strings():
+    # Build strings at runtime, so they aren't already shared by the compiler.
+    values = [''.join(['x', 'y']) for _ in range(2)]
+    assert values[0] is not values[1]
+
+    rows = compact_cases([{'a': x} for x in values])
+    assert rows[0]['a'] is rows[1]['a']
+
+def test_get_layout_bounded(monkeypatch):
+    monkeypatch.setattr(pffr, '_LAYOUTS', {})
+    monkeypatch.setattr(pffr, '_MAX_LAYOUTS', 2)
+
+    a = get_layout(('a',))
+    get_layout(('b',))
+    assert len(pffr._LAYOUTS) == 2
+
+    # Rows created before the layouts were forgotten still work.
+    row = CaseRow(a, (1,))
+    c = get_layout(('c',))
+    assert len(pffr._LAYOUTS) == 1
+    assert get_layout(('c',)) is c
+    assert row == {'a': 1}
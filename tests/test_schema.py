@@ -49,6 +49,42 @@ def test_cast_missing():
     schema = pff.cast(a=int)
     assert schema({}) == {}
 
+def test_cast_eval_many():
+    ns = pff.Namespace(x=1)
+    schema = pff.cast(a=[ns.eval_many, str])
+    assert schema({'a': 'x + 1', 'b': 2}) == {'a': '2', 'b': 2}
+
+    columns = {'a': ['x', pff.schema.MISSING, 'x + 1']}
+    assert schema.columns(columns) == {'a': ['1', pff.schema.MISSING, '2']}
+
+def test_cast_not_vectorized():
+    schema = pff.cast(a=pff.Namespace().eval)
+    assert not schema.vectorized
+
+    columns = {'a': ['1', pff.MISSING]}
+    assert schema.columns(columns) == {'a': [1, pff.MISSING]}
+
+def test_cast_vectorized():
+    @pff.vectorized
+    def double(values):
+        return [2 * x for x in values]
+
+    schema = pff.cast(a=[int, double])
+    assert schema.vectorized
+    assert schema({'a': '1'}) == {'a': 2}
+
+    columns = {'a': ['1', pff.MISSING, '2']}
+    assert schema.columns(columns) == {'a': [2, pff.MISSING, 4]}
+
+def test_defaults_columns():
+    schema = pff.defaults(a=1, b=0)
+    columns = {'b': [2, pff.MISSING], 'c': [3, 4]}
+    assert schema.columns(columns) == {
+            'a': [1, 1],
+            'b': [2, 0],
+            'c': [3, 4],
+    }
+
 def test_rename_positional():
     schema = pff.rename({'a': 'b'})
     assert schema({'a': 1, 'z': 2}) == {'b': 1, 'z': 2}
@@ -57,6 +93,30 @@ def test_rename_keyword():
     schema = pff.rename(a='b')
     assert schema({'a': 1, 'z': 2}) == {'b': 1, 'z': 2}
 
+def test_rename_columns():
+    schema = pff.rename(a='b')
+    columns = {'a': [1, 2], 'z': [3, 4]}
+    assert schema.columns(columns) == {'b': [1, 2], 'z': [3, 4]}
+
+def test_rename_columns_collision():
+    schema = pff.rename(a='b')
+    columns = {'a': [1, pff.MISSING], 'b': [2, 3]}
+    assert schema.columns(columns) == {'b': [2, 3]}
+
+def test_vectorized():
+    @pff.vectorized
+    def total(columns):
+        return {**columns, 'c': [a + b for a, b in zip(columns['a'], columns['b'])]}
+
+    assert total({'a': 1, 'b': 2}) == {'a': 1, 'b': 2, 'c': 3}
+    assert total.columns({'a': [1, 2], 'b': [3, 4]}) == {
+            'a': [1, 2],
+            'b': [3, 4],
+            'c': [4, 6],
+    }
+    assert total.vectorized
+    assert total.__name__ == 'total'
+
 def test_rename_positional_and_keyword():
     schema = pff.rename({'a': 'b'}, a='c')
     assert schema({'a': 1, 'z': 2}) == {'c': 1, 'z': 2}
@@ -339,3 +399,87 @@ def test_error_or_ambiguous():
     assert err.match(r"expected value parameter\(s\): a")
     assert err.match(r"error parameter: error")
 
+
+@pytest.mark.parametrize(
+        'schema', [
+            [pff.cast(a=int)],
+            [pff.cast(a=[int, str])],
+            [pff.defaults(a='1', b='2')],
+            [pff.rename(a='b')],
+            [pff.rename(a='c', b='c')],
+            [pff.rename(c='a'), pff.defaults(a='3', b='4'), pff.cast(a=int)],
+            [pff.defaults(b='1'), pff.defaults(b='2', c='3'), pff.cast(b=int)],
+            [pff.cast(a=int), pff.cast(a=str, b=int)],
+            [pff.cast(a=int), pff.defaults(a='5')],
+            [pff.rename(a='b'), pff.rename(b='a')],
+            [pff.defaults(x=1), lambda p: {**p, 'y': p['x']}, pff.cast(y=str)],
+            [pff.cast(a=pff.Namespace().eval_many), pff.rename(a='x')],
+        ],
+)
+@pytest.mark.parametrize(
+        'params', [
+            {},
+            {'a': '1'},
+            {'b': '2', 'a': '1'},
+            {'a': '1', 'c': '2'},
+        ],
+)
+def test_fuse_schema(schema, params):
+    def eval_sequentially(params):
+        for schema_i in schema:
+            params = schema_i(params)
+        return params
+
+    def eval_fused(params):
+        for schema_i in pff.schema._fuse_schema(schema):
+            params = schema_i(params)
+        return params
+
+    try:
+        expected = eval_sequentially(params.copy())
+    except Exception as err:
+        with pytest.raises(type(err)):
+            eval_fused(params.copy())
+    else:
+        actual = eval_fused(params.copy())
+        assert list(actual.items()) == list(expected.items())
+
+def test_fuse_schema_count():
+    def f(p):
+        return p
+
+    schema = [
+            pff.rename(a='b'),
+            pff.defaults(b=1),
+            pff.cast(b=str),
+            f,
+            pff.cast(b=int),
+            pff.rename(b='c'),
+    ]
+    fused = pff.schema._fuse_schema(schema)
+    assert len(fused) == 4
+    assert fused[1] is f
+
+def test_fuse_schema_many():
+    # The same schema and parameters as `benchmarks/bench_schema.py`, which 
+    # has the timing comparison.
+    schema = [
+            pff.rename(input='x'),
+            pff.defaults(y='0', z='0'),
+            pff.cast(x=int, y=int, z=[int, abs]),
+    ]
+    params = [
+            {'input': str(i), 'y': str(-i)}
+            for i in range(1000)
+    ]
+
+    def eval_schema(schema):
+        out = []
+        for params_i in params:
+            for schema_i in schema:
+                params_i = schema_i(params_i)
+            out.append(params_i)
+        return out
+
+    fused = pff.schema._fuse_schema(schema)
+    assert eval_schema(fused) == eval_schema(schema)
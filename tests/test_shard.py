@@ -0,0 +1,302 @@
+import json
+import pytest
+import parametrize_from_file.shard as pffs
+from pathlib import Path
+
+pytest_plugins = ['pytester']
+
+def test_func():
+    pass
+
+@pytest.mark.parametrize('count', [1, 2, 3, 7])
+def test_sharder(count):
+    case_ids = [str(i) for i in range(100)]
+    test_path = Path('test_x.py')
+    selected = [
+            pffs.Sharder(i, count).select(test_path, test_func, case_ids)
+            for i in range(count)
+    ]
+
+    # Each test case belongs to exactly one shard.
+    for i in range(len(case_ids)):
+        assert sum(x[i] for x in selected) == 1
+
+    # The same test cases are always assigned to the same shard.
+    assert selected[0] == \
+            pffs.Sharder(0, count).select(test_path, test_func, case_ids)
+
+def test_sharder_durations():
+    case_ids = ['a', 'b', 'c', 'd', 'e']
+    test_path = Path('test_x.py')
+    durations = {
+            pffs.get_case_name(test_path, test_func, 'a'): 4,
+            pffs.get_case_name(test_path, test_func, 'b'): 3,
+            pffs.get_case_name(test_path, test_func, 'c'): 2,
+            pffs.get_case_name(test_path, test_func, 'd'): 1,
+    }
+    selected = [
+            pffs.Sharder(i, 2, durations=durations).select(
+                test_path, test_func, case_ids,
+            )
+            for i in range(2)
+    ]
+    shards = [
+            [x for x, keep in zip(case_ids, selected_i) if keep]
+            for selected_i in selected
+    ]
+
+    # The recorded test cases are assigned longest first.  Test cases without 
+    # a recorded duration are assigned by hash.
+    assert shards == [['a', 'd'], ['b', 'c', 'e']]
+
+    # The assignments don't depend on the order in which the test cases are 
+    # seen, or on which other test cases are seen first.
+    sharder = pffs.Sharder(0, 2, durations=durations)
+    assert sharder.select(test_path, test_func, ['e', 'd']) == [False, True]
+    assert sharder.select(test_path, test_func, ['c', 'b', 'a']) == [False, False, True]
+
+    durations_reversed = dict(reversed(durations.items()))
+    sharder = pffs.Sharder(0, 2, durations=durations_reversed)
+    assert sharder.select(test_path, test_func, case_ids) == selected[0]
+
+@pytest.mark.parametrize(
+        'index, count, message', [
+            (0, 0, "shard count must be positive, not 0"),
+            (2, 2, "shard index must be between 0 and 1, not 2"),
+            (-1, 2, "shard index must be between 0 and 1, not -1"),
+        ],
+)
+def test_sharder_err(index, count, message):
+    with pytest.raises(ValueError, match=message):
+        pffs.Sharder(index, count)
+
+def test_get_case_name(tmp_path):
+    class TestClass:
+        pass
+
+    assert pffs.get_case_name(Path('a/test_x.py'), test_func, 'b') == \
+            'a/test_x.py::test_func[b]'
+    assert pffs.get_case_name(Path('a/test_x.py'), TestClass, 'b') == \
+            'a/test_x.py::test_get_case_name::<locals>::TestClass[b]'
+
+    # Paths are relative to the root directory, like pytest node ids.
+    assert pffs.get_case_name(tmp_path / 'a' / 'test_x.py', test_func, 'b', tmp_path) == \
+            'a/test_x.py::test_func[b]'
+    assert pffs.get_case_name(Path('a/test_x.py'), test_func, 'b', tmp_path) == \
+            'a/test_x.py::test_func[b]'
+
+def test_save_durations(tmp_path):
+    path = tmp_path / 'durations.json'
+    assert pffs.load_durations(path) == {}
+
+    pffs.save_durations(path, {'a': 1, 'b': 2})
+    assert pffs.load_durations(path) == {'a': 1, 'b': 2}
+
+    pffs.save_durations(path, {'b': 3, 'c': 4})
+    assert pffs.load_durations(path) == {'a': 1, 'b': 3, 'c': 4}
+
+def test_pff_shard(testdir, monkeypatch):
+    testdir.makefile('.nt', test_file="""\
+            test_eq:
+              -
+                id: a
+                x: 1
+              -
+                id: b
+                x: 2
+              -
+                id: c
+                x: 3
+              -
+                id: d
+                x: 4
+    """)
+    testdir.makefile('.py', test_file="""\
+            import parametrize_from_file as pff
+
+            def log(params):
+                with open('schema_log', 'a') as f:
+                    f.write(params['x'] + '\\n')
+                return params
+
+            @pff.parametrize(schema=log)
+            def test_eq(x):
+                pass
+    """)
+    log = testdir.tmpdir / 'schema_log'
+    collected = []
+
+    for i in range(3):
+        result = testdir.runpytest('--pff-shard-index', str(i), '--pff-shard-count', '3')
+        if log.exists():
+            collected += log.read_text('utf8').splitlines()
+            log.remove()
+
+        # Make sure the environment variables work too.
+        monkeypatch.setenv('PFF_SHARD_INDEX', str(i))
+        monkeypatch.setenv('PFF_SHARD_COUNT', '3')
+        result_env = testdir.runpytest()
+        assert result_env.parseoutcomes() == result.parseoutcomes()
+        if log.exists():
+            log.remove()
+
+    assert sorted(collected) == ['1', '2', '3', '4']
+
+@pytest.mark.parametrize('count', [2, 3])
+def test_pff_shard_stacked(testdir, count):
+    testdir.makefile('.yml', test_file="""\
+            test_a:
+              - id: a1
+              - id: a2
+              - id: a3
+              - id: a4
+            test_b:
+              - id: b1
+              - id: b2
+              - id: b3
+              - id: b4
+            test_c:
+              - id: c1
+              - id: c2
+              - id: c3
+              - id: c4
+    """)
+    testdir.makefile('.py', test_file="""\
+            import pytest
+            import parametrize_from_file as pff
+
+            @pff.parametrize(key='test_a')
+            @pff.parametrize(key='test_b')
+            def test_f():
+                pass
+
+            @pff.parametrize(key='test_a')
+            class TestClass:
+
+                @pff.parametrize(key='test_b')
+                def test_g(self):
+                    pass
+
+            @pff.fixture(key='test_b')
+            def b(request):
+                return request.param
+
+            @pff.fixture(key='test_c')
+            def c(request):
+                return request.param
+
+            @pff.parametrize(key='test_a')
+            def test_h(b):
+                pass
+
+            def test_i(b, c):
+                pass
+    """)
+
+    # If a shard doesn't get any of a decorator's test cases, pytest collects 
+    # a placeholder that gets skipped.  Ignore these.
+    def collect(*args):
+        result = testdir.runpytest('--collect-only', '-q', *args)
+        return [
+                x for x in result.outlines
+                if '::' in x and 'NOTSET' not in x
+        ]
+
+    expected = collect()
+    assert len(expected) == 4 * 16
+
+    shards = [
+            collect('--pff-shard-index', str(i), '--pff-shard-count', str(count))
+            for i in range(count)
+    ]
+    assert sorted(sum(shards, [])) == sorted(expected)
+
+def test_pff_shard_err(testdir):
+    result = testdir.runpytest('--pff-shard-index', '0')
+    result.stderr.fnmatch_lines(["*pff_shard: must specify both the shard index and the shard count*"])
+
+    result = testdir.runpytest('--pff-shard-index', '1', '--pff-shard-count', '1')
+    result.stderr.fnmatch_lines(["*pff_shard: shard index must be between 0 and 0, not 1*"])
+
+def test_pff_record_durations(testdir):
+    # Use test files with the same name in different directories, to make 
+    # sure their test cases aren't confused with each other.
+    for dir in ['x', 'y']:
+        testdir.mkdir(dir)
+        testdir.makefile('.nt', **{f'{dir}/test_file': """\
+                test_eq:
+                  -
+                    id: a
+                    x: 1
+                  -
+                    id: b
+                    x: 2
+        """})
+        testdir.makefile('.py', **{f'{dir}/test_file': """\
+                import parametrize_from_file as pff
+
+                @pff.parametrize
+                def test_eq(x):
+                    pass
+        """})
+
+    result = testdir.runpytest('--import-mode=importlib', '--pff-record-durations', 'durations.json')
+    result.assert_outcomes(passed=4)
+
+    durations = json.loads((testdir.tmpdir / 'durations.json').read_text('utf8'))
+    assert set(durations) == {
+            'x/test_file.py::test_eq[a]',
+            'x/test_file.py::test_eq[b]',
+            'y/test_file.py::test_eq[a]',
+            'y/test_file.py::test_eq[b]',
+    }
+
+    outcomes = [
+            testdir.runpytest(
+                '--import-mode=importlib',
+                '--pff-shard-index', str(i),
+                '--pff-shard-count', '2',
+                '--pff-shard-durations', 'durations.json',
+            ).parseoutcomes()
+            for i in range(2)
+    ]
+    assert sum(x['passed'] for x in outcomes) == 4
+
+def test_pff_record_durations_stacked(testdir):
+    testdir.makefile('.yml', test_file="""\
+            test_a:
+              - id: a1
+              - id: a2
+            test_b:
+              - id: b1
+              - id: b2
+    """)
+    testdir.makefile('.py', test_file="""\
+            import parametrize_from_file as pff
+
+            @pff.parametrize(key='test_a')
+            @pff.parametrize(key='test_b')
+            def test_f():
+                pass
+
+            @pff.fixture(key='test_a')
+            def a(request):
+                return request.param
+
+            def test_g(a):
+                pass
+    """)
+
+    result = testdir.runpytest('--pff-record-durations', 'durations.json')
+    result.assert_outcomes(passed=6)
+
+    # The stacked test cases are recorded by the name of the test case from 
+    # the decorator that shards them, since that's how they'll be looked up.  
+    # The fixture test cases are sharded by node id.
+    durations = json.loads((testdir.tmpdir / 'durations.json').read_text('utf8'))
+    assert set(durations) == {
+            'test_file.py::test_f[b1]',
+            'test_file.py::test_f[b2]',
+            'test_file.py::test_g[a1]',
+            'test_file.py::test_g[a2]',
+    }